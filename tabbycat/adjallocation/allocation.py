@@ -1,7 +1,13 @@
 import logging
 from warnings import warn
 
-from adjallocation.models import DebateAdjudicator
+from django.db import router, transaction
+from django.db.models import Q
+from django.db.models.deletion import Collector
+
+from adjallocation.models import DebateAdjudicator, RoundHistory
+from tournaments.models import Round
+from utils.cache import invalidate_public_pages
 
 logger = logging.getLogger(__name__)
 
@@ -49,23 +55,36 @@ class AdjudicatorAllocation:
             if not debateadjs._prefetch_done:
                 debateadjs = debateadjs.prefetch_related('adjudicator')
 
-            for a in debateadjs:
-                if a.type == DebateAdjudicator.TYPE_CHAIR:
-                    self.chair = a.adjudicator
-                elif a.type == DebateAdjudicator.TYPE_PANEL:
-                    self.panellists.append(a.adjudicator)
-                elif a.type == DebateAdjudicator.TYPE_TRAINEE:
-                    self.trainees.append(a.adjudicator)
-
-            # Sort panellists/trainees names for more consistent ballots/prints
-            self.panellists.sort(key=lambda adj: adj.name)
-            self.trainees.sort(key=lambda adj: adj.name)
+            self._load_debateadjudicators(debateadjs)
 
         else:
             self.chair = chair
             self.panellists = panellists or []
             self.trainees = trainees or []
 
+    @classmethod
+    def from_debateadjudicators(cls, container, debateadjs):
+        """Returns an allocation for `container` from `debateadjs`, an iterable
+        of instances of the related model described in the constructor, which
+        the caller has already fetched (e.g., in bulk for many debates). This
+        does the same as `from_db=True`, without querying the database."""
+        allocation = cls(container)
+        allocation._load_debateadjudicators(debateadjs)
+        return allocation
+
+    def _load_debateadjudicators(self, debateadjs):
+        for a in debateadjs:
+            if a.type == DebateAdjudicator.TYPE_CHAIR:
+                self.chair = a.adjudicator
+            elif a.type == DebateAdjudicator.TYPE_PANEL:
+                self.panellists.append(a.adjudicator)
+            elif a.type == DebateAdjudicator.TYPE_TRAINEE:
+                self.trainees.append(a.adjudicator)
+
+        # Sort panellists/trainees names for more consistent ballots/prints
+        self.panellists.sort(key=lambda adj: adj.name)
+        self.trainees.sort(key=lambda adj: adj.name)
+
     def __len__(self):
         return (0 if self.chair is None else 1) + len(self.panellists) + len(self.trainees)
 
@@ -196,10 +215,107 @@ class AdjudicatorAllocation:
         self.trainees = []
 
     def save(self):
-        self.container.related_adjudicator_set.exclude(adjudicator__in=self.all()).delete()
-        for adj, t in self.with_debateadj_types():
-            if not adj:
+        save_allocations([self])
+
+
+def save_allocations(allocations):
+    """Saves the given `AdjudicatorAllocation`s together; see
+    `save_adjudicator_positions()`. Returns the containers whose allocations
+    changed."""
+    return save_adjudicator_positions([
+        (allocation.container, [(adj.id, t) for adj, t in allocation.with_debateadj_types() if adj])
+        for allocation in allocations
+    ])
+
+
+def save_adjudicator_positions(container_positions):
+    """Sets the adjudicators of many containers (debates or preformed panels,
+    as described in `AdjudicatorAllocation`) at once. `container_positions` is
+    a list of tuples `(container, positions)`, where `positions` is a list of
+    `(adjudicator_id, type)` tuples, `type` being a `DebateAdjudicator.TYPE_*`
+    constant. All containers must be of the same model.
+
+    The existing adjudicators of all the containers are fetched in a single
+    query, and the differences applied with (at most) one bulk delete, one bulk
+    create and one bulk update, in one transaction. The related adjudicators of
+    each container are then left in its prefetch cache, so that they can be
+    serialized without being fetched again. Returns the containers whose
+    adjudicators changed."""
+
+    if len(container_positions) == 0:
+        return []
+
+    related_manager = container_positions[0][0].related_adjudicator_set
+    model = related_manager.model
+    field = related_manager.field
+    cache_name = field.remote_field.get_cache_name()
+
+    existing = {}
+    containers = [container for container, positions in container_positions]
+    for related_adj in model.objects.filter(**{field.name + '__in': containers}).select_related(None):
+        existing.setdefault(getattr(related_adj, field.attname), {})[related_adj.adjudicator_id] = related_adj
+
+    to_delete = []
+    to_create = []
+    to_update = []
+    changed = []
+
+    for container, positions in container_positions:
+        old = existing.get(container.pk, {})
+        related_adjs = []
+        seen = set()
+        modified = False
+        for adj_id, adj_type in positions:
+            if adj_id in seen:
                 continue
-            _, created = self.container.related_adjudicator_set.update_or_create(
-                    adjudicator=adj, defaults={'type': t})
-            logger.debug("%s: %s, %s, %s", "Created" if created else "Updated", self.container, adj, t)
+            seen.add(adj_id)
+            related_adj = old.pop(adj_id, None)
+            if related_adj is None:
+                related_adj = model(adjudicator_id=adj_id, type=adj_type)
+                to_create.append(related_adj)
+                modified = True
+            elif related_adj.type != adj_type:
+                related_adj.type = adj_type
+                to_update.append(related_adj)
+                modified = True
+            setattr(related_adj, field.name, container)
+            related_adjs.append(related_adj)
+
+        to_delete.extend(old.values())  # what's left wasn't in the new positions
+        if modified or old:
+            changed.append(container)
+
+        # Same as what prefetch_related() would leave
+        queryset = container.related_adjudicator_set.all()
+        queryset._result_cache = related_adjs
+        queryset._prefetch_done = True
+        container.__dict__.setdefault('_prefetched_objects_cache', {})[cache_name] = queryset
+
+    if not (to_delete or to_create or to_update):
+        return []
+
+    with transaction.atomic():
+        if to_delete:
+            # Deleting these instances (rather than a queryset) lets signal
+            # receivers see `batched`, so that they leave the work to us
+            for related_adj in to_delete:
+                related_adj.batched = True
+            collector = Collector(using=router.db_for_write(model))
+            collector.collect(to_delete)
+            collector.delete()
+        if to_create:
+            model.objects.bulk_create(to_create)
+        if to_update:
+            model.objects.bulk_update(to_update, ['type'])
+        if model is DebateAdjudicator:
+            # Bulk operations don't send signals, so do what the receivers
+            # would have done, once for all debates
+            RoundHistory.objects.filter(round__debate__in=changed).delete()
+            tournament_ids = Round.objects.filter(Q(draw_status=Round.Status.RELEASED) | Q(completed=True),
+                debate__in=changed).values_list('tournament_id', flat=True)
+            for tournament_id in set(tournament_ids):
+                invalidate_public_pages(tournament_id)
+
+    logger.debug("Saved allocations: %d deleted, %d created, %d updated",
+        len(to_delete), len(to_create), len(to_update))
+    return changed
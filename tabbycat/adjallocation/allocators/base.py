@@ -1,4 +1,5 @@
 import logging
+from typing import NamedTuple
 
 from django.db.models import QuerySet
 from django.utils.translation import gettext as _
@@ -22,13 +23,61 @@ class AdjudicatorAllocationError(RuntimeError):
     pass
 
 
+ALLOCATION_PREFERENCES = {
+    'min_score': 'adj_min_score',
+    'max_score': 'adj_max_score',
+    'min_voting_score': 'adj_min_voting_score',
+    'conflict_penalty': 'adj_conflict_penalty',
+    'history_penalty': 'adj_history_penalty',
+    'mismatch_penalty': 'preformed_panel_mismatch_penalty',
+    'no_panellists': 'no_panellist_position',
+    'no_trainees': 'no_trainee_position',
+}
+
+
+class AllocationSettings(NamedTuple):
+    """Tuning parameters used by allocators. Allocators that aren't given
+    settings use `from_preferences()`, so by default these are the tournament's
+    preferences; the allocation editor passes the values in its settings form
+    as `overrides`, so that trying different values doesn't change the stored
+    preferences."""
+
+    min_score: float
+    max_score: float
+    min_voting_score: float
+    conflict_penalty: int
+    history_penalty: int
+    mismatch_penalty: int
+    no_panellists: bool
+    no_trainees: bool
+
+    @classmethod
+    def from_preferences(cls, tournament, overrides=None):
+        """Returns settings from the tournament's preferences, overridden by
+        `overrides`, a dict keyed by preference name (with or without the
+        section, e.g. "draw_rules__adj_conflict_penalty"). Overriding values
+        are converted to the preference's type, since they might have come from
+        a form."""
+        prefs = {pref_name: tournament.pref(pref_name) for pref_name in ALLOCATION_PREFERENCES.values()}
+
+        for key, value in (overrides or {}).items():
+            pref_name = key.split('__')[-1]
+            if pref_name not in prefs:
+                raise ValueError("Unrecognised allocation setting: %s" % key)
+            prefs[pref_name] = type(prefs[pref_name])(value)
+
+        return cls(**{field: prefs[pref_name] for field, pref_name in ALLOCATION_PREFERENCES.items()})
+
+
 class BaseAdjudicatorAllocator:
 
-    def __init__(self, debates, adjudicators, round):
+    def __init__(self, debates, adjudicators, round, progress=None, settings=None):
         self.tournament = round.tournament
         self.round = round
         self.debates = debates
         self.adjudicators = adjudicators
+        self.progress = progress
+        self.settings = settings or AllocationSettings.from_preferences(self.tournament)
 
         if len(self.adjudicators) == 0:
             info = _("There are no available adjudicators. Ensure there are "
@@ -43,8 +92,14 @@ class BaseAdjudicatorAllocator:
         else:
             teams = None
 
-        self.conflicts = ConflictsInfo(teams=teams, adjudicators=self.adjudicators)
+        self.conflicts = ConflictsInfo(teams=teams, adjudicators=self.adjudicators, tournament=self.tournament)
         self.history = HistoryInfo(round=round)
 
     def allocate(self):
         raise NotImplementedError
+
+    def report_progress(self, stage):
+        """Calls the `progress` callback, if there is one, with the stage that
+        the allocation is starting, either "costing" or "solving"."""
+        if self.progress is not None:
+            self.progress(stage)
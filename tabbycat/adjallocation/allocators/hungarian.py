@@ -3,7 +3,9 @@ import random
 from math import exp
 
 from django.utils.translation import gettext as _, ngettext
-from munkres import Munkres
+
+from draw.generator.assignment import solve_assignment
+from participants.prefetch import populate_feedback_scores
 
 from .base import AdjudicatorAllocationError, BaseAdjudicatorAllocator, register
 from ..allocation import AdjudicatorAllocation
@@ -16,19 +18,17 @@ class BaseHungarianAllocator(BaseAdjudicatorAllocator):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        t = self.tournament
-        self.min_score = t.pref('adj_min_score')
-        self.max_score = t.pref('adj_max_score')
-        self.min_voting_score = t.pref('adj_min_voting_score')
-        self.conflict_penalty = t.pref('adj_conflict_penalty')
-        self.history_penalty = t.pref('adj_history_penalty')
-        self.no_panellists = t.pref('no_panellist_position')
-        self.no_trainees = t.pref('no_trainee_position')
+        settings = self.settings
+        self.min_score = settings.min_score
+        self.max_score = settings.max_score
+        self.min_voting_score = settings.min_voting_score
+        self.conflict_penalty = settings.conflict_penalty
+        self.history_penalty = settings.history_penalty
+        self.no_panellists = settings.no_panellists
+        self.no_trainees = settings.no_trainees
         self.feedback_weight = self.round.feedback_weight
         self.user_warnings = []  # Surfaced to users for non-error disclosures
 
-        self.munkres = Munkres()
-
     def allocate(self):
         self.populate_adj_scores(self.adjudicators)
         return self.run_allocation(), self.user_warnings
@@ -37,6 +37,8 @@ class BaseHungarianAllocator(BaseAdjudicatorAllocator):
         score_min = self.min_score
         score_range = self.max_score - score_min
 
+        populate_feedback_scores([adj for adj in adjudicators if not hasattr(adj, '_feedback_score_cache')])
+
         for adj in adjudicators:
             adj._weighted_score = adj.weighted_score(self.feedback_weight)  # used in min_voting_score filter
             try:
@@ -77,27 +79,62 @@ class BaseHungarianAllocator(BaseAdjudicatorAllocator):
             cost += self.history_penalty * self.history.seen_adj_adj(adj, chair)
 
         impt = normalised_importance + adjustment
-        diff = 5 + impt - adj._normalized_score
-        if diff > 0.25:
-            cost += 1000 * exp(diff - 0.25)
+        cost += self._score_penalty(5 + impt - adj._normalized_score)
 
         cost += self.max_score - adj._normalized_score
 
         return cost
 
+    def calc_costs(self, rows, adjs):
+        """Returns a cost matrix with one row for each `(debate, adjustment,
+        chair)` tuple in `rows` and one column for each adjudicator in `adjs`.
+        Each element is what `calc_cost()` would return, but the conflict and
+        history penalties for the debate's teams are computed only once per
+        debate, and the score terms only once per distinct importance, rather
+        than for every element."""
+        self.report_progress("costing")
+        team_penalties = {}  # debate -> row
+        score_penalties = {}  # importance -> row
+        base_costs = [self.max_score - adj._normalized_score for adj in adjs]
+
+        matrix = []
+        for debate, adjustment, chair in rows:
+            if debate not in team_penalties:
+                team_penalties[debate] = [sum(
+                    self.conflict_penalty * self.conflicts.conflict_adj_team(adj, team) +
+                    self.history_penalty * self.history.seen_adj_team(adj, team)
+                    for team in debate.teams) for adj in adjs]
+            row = team_penalties[debate]
+
+            if chair:
+                row = [cost + self.conflict_penalty * self.conflicts.conflict_adj_adj(adj, chair) +
+                       self.history_penalty * self.history.seen_adj_adj(adj, chair)
+                       for cost, adj in zip(row, adjs)]
+
+            # Normalise debate importances back to the 1-5 (not ±2) range expected
+            impt = debate.importance + 3 + adjustment
+            if impt not in score_penalties:
+                score_penalties[impt] = [self._score_penalty(5 + impt - adj._normalized_score) for adj in adjs]
+
+            matrix.append([cost + score + base for cost, score, base in zip(row, score_penalties[impt], base_costs)])
+
+        return matrix
+
+    @staticmethod
+    def _score_penalty(diff):
+        return 1000 * exp(diff - 0.25) if diff > 0.25 else 0
+
     def allocate_trainees(self, trainees, allocation, debates):
         if len(trainees) > 0 and len(debates) > 0:
             allocation_by_debate = {aa.container: aa for aa in allocation}
 
             logger.info("costing trainees")
-            cost_matrix = []
-            for debate in debates:
-                chair = allocation_by_debate[debate].chair
-                row = [self.calc_cost(debate, adj, adjustment=-2.0, chair=chair) for adj in trainees]
-                cost_matrix.append(row)
+            rows = [(debate, -2.0, allocation_by_debate[debate].chair) for debate in debates]
+            cost_matrix = self.calc_costs(rows, trainees)
 
             logger.info("optimizing trainees (matrix size: %d positions by %d trainees)", len(cost_matrix), len(cost_matrix[0]))
-            indices = self.munkres.compute(cost_matrix)
+            self.report_progress("solving")
+            indices = solve_assignment(cost_matrix)
             total_cost = sum(cost_matrix[i][j] for i, j in indices)
             logger.info('total cost for %d trainees: %f', len(indices), total_cost)
 
@@ -180,13 +217,11 @@ class VotingHungarianAllocator(BaseHungarianAllocator):
 
         if len(solos) > 0 and len(solo_debates) > 0:
             logger.info("costing solos")
-            cost_matrix = []
-            for debate in solo_debates:
-                row = [self.calc_cost(debate, adj) for adj in solos]
-                cost_matrix.append(row)
+            cost_matrix = self.calc_costs([(debate, 0, None) for debate in solo_debates], solos)
 
             logger.info("optimizing solos (matrix size: %d positions by %d adjudicators)", len(cost_matrix), len(cost_matrix[0]))
-            indices = self.munkres.compute(cost_matrix)
+            self.report_progress("solving")
+            indices = solve_assignment(cost_matrix)
             total_cost = sum(cost_matrix[i][j] for i, j in indices)
             logger.info('total cost for %d solo debates: %f', len(solos), total_cost)
 
@@ -202,17 +237,18 @@ class VotingHungarianAllocator(BaseHungarianAllocator):
         # Allocate panellists
         if len(panellists) > 0 and len(panel_debates) > 0:
             logger.info("costing panellists")
-            cost_matrix = []
+            rows = []
             for i, debate in enumerate(panel_debates):
                 for j in range(3):
                     # for the top half of these debates, the final panellist
                     # can be of lower quality than the other 2
                     adjustment = -1.0 if i < len(panel_debates)/2 and j == 2 else 0.0
-                    row = [self.calc_cost(debate, adj, adjustment) for adj in panellists]
-                    cost_matrix.append(row)
+                    rows.append((debate, adjustment, None))
+            cost_matrix = self.calc_costs(rows, panellists)
 
             logger.info("optimizing panellists (matrix size: %d positions by %d adjudicators)", len(cost_matrix), len(cost_matrix[0]))
-            indices = self.munkres.compute(cost_matrix)
+            self.report_progress("solving")
+            indices = solve_assignment(cost_matrix)
             total_cost = sum(cost_matrix[i][j] for i, j in indices)
             logger.info('total cost for %d panel debates: %f', len(panel_debates), total_cost)
 
@@ -289,15 +325,13 @@ class ConsensusHungarianAllocator(BaseHungarianAllocator):
 
         # Allocate voting
         logger.info("costing voting adjudicators")
-        cost_matrix = []
-        for debate, njudges in zip(debates_sorted, judges_per_room):
-            for i in range(njudges):
-                row = [self.calc_cost(debate, adj, adjustment=-i) for adj in voting]
-                cost_matrix.append(row)
+        rows = [(debate, -i, None) for debate, njudges in zip(debates_sorted, judges_per_room) for i in range(njudges)]
+        cost_matrix = self.calc_costs(rows, voting)
 
         logger.info("optimizing voting adjudicators (matrix size: %d positions by %d adjudicators)",
                 len(cost_matrix), len(cost_matrix[0]))
-        indices = self.munkres.compute(cost_matrix)
+        self.report_progress("solving")
+        indices = solve_assignment(cost_matrix)
         indices.sort()
         total_cost = sum(cost_matrix[i][j] for i, j in indices)
         logger.info('total cost for %d debates: %f', n_debates, total_cost)
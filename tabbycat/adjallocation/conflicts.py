@@ -1,16 +1,29 @@
 """Utilities for querying and listing conflicts and history between
 participants."""
 import logging
-from itertools import combinations, product
+from array import array
+from itertools import chain, combinations, groupby, product
+from operator import itemgetter
 from typing import Dict, List, Tuple, TypedDict
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils.functional import cached_property
 
 from adjallocation.models import (AdjudicatorAdjudicatorConflict, AdjudicatorInstitutionConflict,
-                     AdjudicatorTeamConflict, TeamInstitutionConflict)
-from draw.models import Debate
-from participants.models import Adjudicator, Team
+                     AdjudicatorTeamConflict, DebateAdjudicator, RoundHistory, TeamInstitutionConflict)
+from draw.models import DebateTeam
+from participants.models import Adjudicator, Institution, Team
+from tournaments.models import Round
 
 logger = logging.getLogger(__name__)
 
+# Changed to invalidate all tournaments' conflicts indices, e.g. when a conflict
+# involving an adjudicator not attached to any tournament changes
+CONFLICTS_VERSION_KEY = "conflicts_index_version"
+
 
 class AdjudicatorConflicts(TypedDict):
     class Conflict(TypedDict):
@@ -24,18 +37,100 @@ class AdjudicatorConflicts(TypedDict):
 TeamConflicts = AdjudicatorConflicts
 
 
+class ConflictsIndex:
+    """All conflicts involving the teams and adjudicators of a tournament
+    (including adjudicators not attached to any tournament), stored as flat
+    integer arrays of primary key pairs, e.g. `[adj1, team1, adj2, team2, ...]`
+    for adjudicator-team conflicts, so that it's compact when pickled into the
+    cache. Use `get_conflicts_index()` to retrieve one."""
+
+    def __init__(self, tournament):
+        adjudicator_in_tournament = Q(tournament=tournament) | Q(tournament__isnull=True)
+        adjudicators = Adjudicator.objects.filter(adjudicator_in_tournament)
+        teams = Team.objects.filter(tournament=tournament)
+
+        self.adjteam = self._pairs(AdjudicatorTeamConflict.objects.filter(
+            adjudicator__in=adjudicators, team__in=teams,
+        ), 'adjudicator_id', 'team_id')
+        self.adjadj = self._pairs(AdjudicatorAdjudicatorConflict.objects.filter(
+            adjudicator1__in=adjudicators, adjudicator2__in=adjudicators,
+        ), 'adjudicator1_id', 'adjudicator2_id')
+        self.teaminst = self._pairs(TeamInstitutionConflict.objects.filter(
+            team__in=teams,
+        ), 'team_id', 'institution_id')
+        self.adjinst = self._pairs(AdjudicatorInstitutionConflict.objects.filter(
+            adjudicator__in=adjudicators,
+        ), 'adjudicator_id', 'institution_id')
+
+    @staticmethod
+    def _pairs(queryset, *fields):
+        return array('l', chain.from_iterable(queryset.values_list(*fields).distinct()))
+
+    @staticmethod
+    def iterpairs(flat):
+        return zip(flat[::2], flat[1::2])
+
+
+def _tournament_version_key(tournament_id):
+    return "%s_conflicts_index_version" % tournament_id
+
+
+def _conflicts_version(key):
+    cache.add(key, uuid4().hex, None)
+    return cache.get(key)
+
+
+def _change_version(key):
+    """Changes the version both immediately and when the current transaction
+    commits, so that an index built from uncommitted data in the meantime isn't
+    used."""
+
+    def change():
+        cache.set(key, uuid4().hex, None)
+
+    change()
+    transaction.on_commit(change)
+
+
+def clear_conflicts_index(tournament_id):
+    """Invalidates the conflicts index of the tournament. Called by
+    `adjallocation.signals` when a conflict in the tournament changes; must be
+    called manually after bulk operations (like `bulk_create()`) that don't
+    send signals."""
+    _change_version(_tournament_version_key(tournament_id))
+
+
+def clear_conflicts_indices():
+    """Invalidates the conflicts indices of all tournaments."""
+    _change_version(CONFLICTS_VERSION_KEY)
+
+
+def get_conflicts_index(tournament):
+    """Returns the `ConflictsIndex` for `tournament`, from the cache if no
+    conflicts have changed since it was built."""
+    key = "%s_conflicts_index_%s_%s" % (tournament.slug, _conflicts_version(CONFLICTS_VERSION_KEY),
+                                        _conflicts_version(_tournament_version_key(tournament.id)))
+    index = cache.get(key)
+    if index is None:
+        logger.debug("Building conflicts index %s", key)
+        index = ConflictsIndex(tournament)
+        cache.set(key, index)
+    return index
+
+
 class ConflictsInfo:
     """Manages information about conflicts between participants.
 
     The main purpose of this class is to streamline queries about conflicts.
-    This class hits the database once, on creation, with one query per type of
-    conflict (adjudicator-team, adjudicator-adjudicator, adjudicator-institution
-    and adjudicator-team). It then can be used to find efficiently whether
-    particular participants conflict, without a need for further SQL queries or
-    excessive data processing.
+    On creation, this class retrieves the tournament's `ConflictsIndex`, which
+    is cached, and only built (with one query per type of conflict) if a
+    conflict has changed since it was last built. It then can be used to find
+    efficiently whether particular participants conflict, without a need for
+    further SQL queries or excessive data processing.
 
     All queries must relate to teams and adjudicators that were in the QuerySets
-    or other iterables that were provided to the constructor.
+    or other iterables that were provided to the constructor. If `tournament`
+    isn't provided, it's taken from the first team or adjudicator.
 
     Although the attributes `self.adjteamconflicts`, `self.adjadjconflicts`,
     etc. aren't marked as such, they should be treated a private implementation
@@ -43,69 +138,68 @@ class ConflictsInfo:
     methods of the class to access conflict information.
     """
 
-    def __init__(self, teams=None, adjudicators=None):
+    def __init__(self, teams=None, adjudicators=None, tournament=None):
         self.teams = teams or Team.objects.none()
         self.adjudicators = adjudicators or Adjudicator.objects.none()
+        self.tournament = tournament
         self._fetch_conflicts_from_db()
 
     def _fetch_conflicts_from_db(self):
-        """Fetches relevant conflicts from the database, based on `self.teams`
-        and `self.adjudicators`."""
+        """Fetches relevant conflicts from the tournament's conflicts index,
+        based on `self.teams` and `self.adjudicators`."""
 
         # Refresh `self.adjudicator_ids` and `self.team_ids`
         self.adjudicator_ids = {adj.id for adj in self.adjudicators}
         self.team_ids = {team.id for team in self.teams}
 
+        if self.tournament is None:
+            participant = next(chain(self.teams, self.adjudicators), None)
+            self.tournament = participant and participant.tournament
+
         # Adjudicator-team and adjudicator-adjudicator conflicts are stored as
         # sets of primary keys. Primary keys to avoid having to select_related
         # all the teams and adjudicators from the database, and sets so that
         # they're stored in a hash-map structure (for O(1) `x in S` check)
         # rather than an array (O(n)). Adjudicator pairs are stored both ways
         # round, i.e. under both `(adj1.id, adj2.id)` and `(adj2.id, adj1.id)`.
+        #
+        # Adjudicator-institution and team-institution conflicts are stored as
+        # sets of institution primary keys, which in turn are in dicts whose
+        # keys are the adjudicator/team primary keys. They're sets to allow the
+        # use of the set intersection operator to check for institution overlap.
+        # Institution objects are only fetched if they're needed.
 
-        adjteamconflict_instances = AdjudicatorTeamConflict.objects.filter(
-            adjudicator__in=self.adjudicators,
-            team__in=self.teams,
-        ).distinct()
-        self.adjteamconflicts = {(c.adjudicator_id, c.team_id) for c in adjteamconflict_instances}
-
-        adjadjconflict_instances = AdjudicatorAdjudicatorConflict.objects.filter(
-            adjudicator1__in=self.adjudicators,
-            adjudicator2__in=self.adjudicators,
-        ).distinct()
+        self.adjteamconflicts = set()
         self.adjadjconflicts = set()
-        for conflict in adjadjconflict_instances:
-            self.adjadjconflicts.add((conflict.adjudicator1_id, conflict.adjudicator2_id))
-            self.adjadjconflicts.add((conflict.adjudicator2_id, conflict.adjudicator1_id))
-
-        # Adjudicator-institution and team-institution conflicts are stored as
-        # sets, which in turn are in dicts whose keys are the adjudicator/team
-        # primary keys. The sets contain the entire institution objects, since
-        # it's useful in some contexts to be able to grab institution details
-        # quickly from them. They're sets to allow the use of the set
-        # intersection operator to check for institution overlap.
-
-        teaminstconflict_instances = TeamInstitutionConflict.objects.filter(
-            team__in=self.teams,
-        ).select_related('institution').distinct()
         self.teaminstconflicts = {team_id: set() for team_id in self.team_ids}
-        for conflict in teaminstconflict_instances:
-            if conflict.team_id in self.teaminstconflicts:
-                self.teaminstconflicts[conflict.team_id].add(conflict.institution)
-            else:
-                logger.warning("Couldnt add conflict for team ID %s to \
-                                institution %s" % (conflict.team_id, conflict.institution))
-
-        adjinstconflict_instances = AdjudicatorInstitutionConflict.objects.filter(
-            adjudicator__in=self.adjudicators,
-        ).select_related('institution').distinct()
         self.adjinstconflicts = {adj_id: set() for adj_id in self.adjudicator_ids}
-        for conflict in adjinstconflict_instances:
-            if conflict.adjudicator_id in self.adjinstconflicts:
-                self.adjinstconflicts[conflict.adjudicator_id].add(conflict.institution)
-            else:
-                logger.warning("Couldnt add conflict for adjudicator ID %s to \
-                                institution %s" % (conflict.adjudicator_id, conflict.institution))
+
+        if self.tournament is None:
+            return
+        index = get_conflicts_index(self.tournament)
+
+        for adj_id, team_id in index.iterpairs(index.adjteam):
+            if adj_id in self.adjudicator_ids and team_id in self.team_ids:
+                self.adjteamconflicts.add((adj_id, team_id))
+
+        for adj1_id, adj2_id in index.iterpairs(index.adjadj):
+            if adj1_id in self.adjudicator_ids and adj2_id in self.adjudicator_ids:
+                self.adjadjconflicts.add((adj1_id, adj2_id))
+                self.adjadjconflicts.add((adj2_id, adj1_id))
+
+        for team_id, institution_id in index.iterpairs(index.teaminst):
+            if team_id in self.teaminstconflicts:
+                self.teaminstconflicts[team_id].add(institution_id)
+
+        for adj_id, institution_id in index.iterpairs(index.adjinst):
+            if adj_id in self.adjinstconflicts:
+                self.adjinstconflicts[adj_id].add(institution_id)
+
+    @cached_property
+    def institutions(self):
+        """Dict mapping primary keys to institutions that are in conflicts."""
+        institution_ids = set().union(*self.teaminstconflicts.values(), *self.adjinstconflicts.values())
+        return Institution.objects.in_bulk(institution_ids)
 
     def personal_conflict_adj_team(self, adj, team):
         """Returns True if the adjudicator and team personally conflict."""
@@ -121,11 +215,13 @@ class ConflictsInfo:
 
     def conflicting_institutions_adj_team(self, adj, team):
         """Returns a set of institutions that the adjudicator and team share."""
-        return self.adjinstconflicts[adj.id] & self.teaminstconflicts[team.id]
+        shared = self.adjinstconflicts[adj.id] & self.teaminstconflicts[team.id]
+        return {self.institutions[institution_id] for institution_id in shared}
 
     def conflicting_institutions_adj_adj(self, adj1, adj2):
         """Returns a set of institutions that the two adjudicators share."""
-        return self.adjinstconflicts[adj1.id] & self.adjinstconflicts[adj2.id]
+        shared = self.adjinstconflicts[adj1.id] & self.adjinstconflicts[adj2.id]
+        return {self.institutions[institution_id] for institution_id in shared}
 
     def institutional_conflict_adj_team(self, adj, team):
         """Returns True if the adjudicator and team share at least one institution."""
@@ -165,10 +261,10 @@ class ConflictsInfo:
             adjudicators[adj1_id]['adjudicator'].append({'id': adj2_id})
 
         for team_id, institutions in self.teaminstconflicts.items():
-            teams[team_id]['institution'] = [{'id': inst.id} for inst in institutions]
+            teams[team_id]['institution'] = [{'id': inst_id} for inst_id in institutions]
 
         for adj_id, institutions in self.adjinstconflicts.items():
-            adjudicators[adj_id]['institution'] = [{'id': inst.id} for inst in institutions]
+            adjudicators[adj_id]['institution'] = [{'id': inst_id} for inst_id in institutions]
 
         return teams, adjudicators
 
@@ -180,8 +276,11 @@ class HistoryInfo:
     round.
 
     The main purpose of this class is to streamline queries about history. This
-    class hits the database once, on creation, with queries for
-    `DebateAdjudicator` and `DebateTeam`. It then can be used to find
+    class hits the database once, on creation, to read the `RoundHistory` of
+    every prior round. Rounds that aren't completed, or whose history hasn't
+    yet been recorded, are read from `DebateAdjudicator` and `DebateTeam`
+    instead, and the histories of completed rounds are then saved, so that
+    later rounds don't need to do this again. It then can be used to find
     efficiently whether particular participants have seen each other, without a
     need for further SQL queries or excessive data processing.
 
@@ -197,20 +296,13 @@ class HistoryInfo:
         self._fetch_histories_from_db()
 
     def _fetch_histories_from_db(self):
-        """Fetches history information from the database, based on `self.teams`
-        and `self.adjudicators`."""
+        """Fetches history information from the database for all rounds before
+        `self.round`."""
 
-        # The prefetches don't need `.select_related('adjudicator')` and
-        # `.select_related('team')`, because we only deal with the primary keys
-        # of adjudicators and teams.
-
-        debates = Debate.objects.filter(
-            round__tournament=self.tournament,
-            round__seq__lt=self.round.seq,
-        ).prefetch_related(
-            'debateadjudicator_set',
-            'debateteam_set',
-        ).select_related('round')
+        rounds = Round.objects.filter(
+            tournament=self.tournament,
+            seq__lt=self.round.seq,
+        ).values_list('id', 'seq', 'completed', 'history__adjteam', 'history__adjadj')
 
         # Histories are stored in a dict, where keys are (adj.id, team.id) or
         # (adj1.id, adj2.id) tuples, and values are lists of `seq` integers
@@ -226,18 +318,47 @@ class HistoryInfo:
 
         self.adjteamhistories = {}
         self.adjadjhistories = {}
+        new_records = []
 
-        for debate in debates:
-            r = debate.round.seq
+        for round_id, r, completed, adjteam, adjadj in rounds:
+            if not completed or adjteam is None:
+                adjteam, adjadj = self._read_round_history(round_id)
+                if completed:
+                    new_records.append(RoundHistory(round_id=round_id, adjteam=adjteam, adjadj=adjadj))
 
-            for da, dt in product(debate.debateadjudicator_set.all(), debate.debateteam_set.all()):
-                pair = (da.adjudicator_id, dt.team_id)
+            for pair in zip(adjteam[::2], adjteam[1::2]):
                 self.adjteamhistories.setdefault(pair, []).append(r)
 
-            for da1, da2 in combinations(debate.debateadjudicator_set.all(), 2):
-                pair = (da1.adjudicator_id, da2.adjudicator_id)
+            for pair in zip(adjadj[::2], adjadj[1::2]):
                 self.adjadjhistories.setdefault(pair, []).append(r)
 
+        if new_records:
+            logger.debug("Recording history for %d rounds", len(new_records))
+            RoundHistory.objects.bulk_create(new_records, ignore_conflicts=True)
+
+    @staticmethod
+    def _read_round_history(round_id):
+        """Returns flattened lists of adjudicator-team and adjudicator-
+        adjudicator pairs who saw each other in the given round, in the format
+        used by `RoundHistory`."""
+
+        debateteams = DebateTeam.objects.filter(debate__round_id=round_id).order_by('debate_id', 'id')
+        team_ids = {debate_id: [team_id for _, team_id in group] for debate_id, group in
+                    groupby(debateteams.values_list('debate_id', 'team_id'), key=itemgetter(0))}
+
+        debateadjs = DebateAdjudicator.objects.filter(debate__round_id=round_id).order_by('debate_id', 'id')
+        adjteam = []
+        adjadj = []
+
+        for debate_id, group in groupby(debateadjs.values_list('debate_id', 'adjudicator_id'), key=itemgetter(0)):
+            adj_ids = [adj_id for _, adj_id in group]
+            for pair in product(adj_ids, team_ids.get(debate_id, [])):
+                adjteam.extend(pair)
+            for pair in combinations(adj_ids, 2):
+                adjadj.extend(pair)
+
+        return adjteam, adjadj
+
     def seen_adj_team(self, adj, team):
         """Returns True if the adjudicator has seen this team in the history
         covered by this object."""
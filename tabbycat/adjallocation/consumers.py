@@ -1,4 +1,5 @@
 import logging
+from functools import partial
 from itertools import groupby
 from operator import attrgetter
 
@@ -9,10 +10,12 @@ from django.utils.translation import gettext as _, ngettext
 from actionlog.models import ActionLogEntry
 from breakqual.utils import calculate_live_thresholds
 from draw.consumers import BaseAdjudicatorContainerConsumer, EditDebateOrPanelWorkerMixin
+from draw.models import Debate
 from participants.prefetch import populate_win_counts
 from tournaments.models import Round
 
-from .allocators.base import AdjudicatorAllocationError
+from .allocation import save_allocations
+from .allocators.base import AdjudicatorAllocationError, AllocationSettings
 from .allocators.hungarian import ConsensusHungarianAllocator, VotingHungarianAllocator
 from .models import PreformedPanel
 from .preformed import copy_panels_to_debates
@@ -35,54 +38,47 @@ class PanelEditConsumer(BaseAdjudicatorContainerConsumer):
 
 class AdjudicatorAllocationWorkerConsumer(EditDebateOrPanelWorkerMixin):
 
-    def _apply_allocation_settings(self, round, settings):
-        t = round.tournament
-        for key, value in settings.items():
-            if key in ("usePreformedPanels", "allocationMethod"):
-                # Passing this here is much easier than splitting the function
-                continue # (Not actually a preference; just a toggle from Vue)
-            # No way to force front-end to only accept floats/integers :(
-            if isinstance(t.preferences[key], bool):
-                t.preferences[key] = bool(value)
-            elif isinstance(t.preferences[key], int):
-                t.preferences[key] = int(value)
-            elif isinstance(t.preferences[key], float):
-                t.preferences[key] = float(value)
-            else:
-                t.preferences[key] = value
+    def _get_allocation_settings(self, round, settings):
+        """Returns the allocation settings for this run, which are the values
+        from the editor's settings form. They aren't saved to the tournament's
+        preferences, so that adjusting them doesn't change the preferences for
+        everyone else."""
+        # Passing these here is much easier than splitting the function
+        # (Not actually preferences; just toggles from Vue)
+        overrides = {key: value for key, value in settings.items()
+                     if key not in ("usePreformedPanels", "allocationMethod")}
+        return AllocationSettings.from_preferences(round.tournament, overrides)
 
     def allocate_debate_adjs(self, event):
         round = Round.objects.get(pk=event['extra']['round_id'])
-        self._apply_allocation_settings(round, event['extra']['settings'])
+        settings = self._get_allocation_settings(round, event['extra']['settings'])
 
         if round.draw_status == round.Status.RELEASED:
-            self.return_error(event['extra']['group_name'],
-                _("Draw is already released, unrelease draw to redo auto-allocations."))
+            self.return_error(event, _("Draw is already released, unrelease draw to redo auto-allocations."))
             return
         if round.draw_status != round.Status.CONFIRMED:
-            self.return_error(event['extra']['group_name'],
-                _("Draw is not confirmed, confirm draw to run auto-allocations."))
+            self.return_error(event, _("Draw is not confirmed, confirm draw to run auto-allocations."))
             return
 
         if event['extra']['settings']['usePreformedPanels']:
             if not round.preformedpanel_set.exists():
-                self.return_error(event['extra']['group_name'],
-                    _("There are no preformed panels available to allocate."))
+                self.return_error(event, _("There are no preformed panels available to allocate."))
                 return
 
             logger.info("Preformed panels exist, allocating panels to debates")
 
             debates = round.debate_set.all()
             panels = round.preformedpanel_set.all()
+            progress = partial(self.report_progress, event)
             if event['extra']['settings']['allocationMethod'] == 'hungarian':
-                allocator = HungarianPreformedPanelAllocator(debates, panels, round)
+                allocator = HungarianPreformedPanelAllocator(debates, panels, round, progress=progress, settings=settings)
             else:
-                allocator = DirectPreformedPanelAllocator(debates, panels, round)
+                allocator = DirectPreformedPanelAllocator(debates, panels, round, progress=progress, settings=settings)
 
             debates, panels = allocator.allocate()
-            copy_panels_to_debates(debates, panels)
-
-            self.log_action(event['extra'], round, ActionLogEntry.ActionType.PREFORMED_PANELS_DEBATES_AUTO)
+            with self.saving(event):
+                changed = copy_panels_to_debates(debates, panels)
+                self.log_action(event['extra'], round, ActionLogEntry.ActionType.PREFORMED_PANELS_DEBATES_AUTO)
 
             msg = _("Successfully auto-allocated preformed panels to debates.")
             level = 'success'
@@ -92,21 +88,21 @@ class AdjudicatorAllocationWorkerConsumer(EditDebateOrPanelWorkerMixin):
 
             debates = round.debate_set.all()
             adjs = round.active_adjudicators.all()
+            progress = partial(self.report_progress, event)
 
             try:
                 if round.ballots_per_debate == 'per-adj':
-                    allocator = VotingHungarianAllocator(debates, adjs, round)
+                    allocator = VotingHungarianAllocator(debates, adjs, round, progress=progress, settings=settings)
                 else:
-                    allocator = ConsensusHungarianAllocator(debates, adjs, round)
+                    allocator = ConsensusHungarianAllocator(debates, adjs, round, progress=progress, settings=settings)
                 allocation, user_warnings = allocator.allocate()
             except AdjudicatorAllocationError as e:
-                self.return_error(event['extra']['group_name'], str(e))
+                self.return_error(event, str(e))
                 return
 
-            for alloc in allocation:
-                alloc.save()
-
-            self.log_action(event['extra'], round, ActionLogEntry.ActionType.ADJUDICATORS_AUTO)
+            with self.saving(event):
+                changed = save_allocations(allocation)
+                self.log_action(event['extra'], round, ActionLogEntry.ActionType.ADJUDICATORS_AUTO)
 
             if user_warnings:
                 msg = ngettext(
@@ -119,40 +115,39 @@ class AdjudicatorAllocationWorkerConsumer(EditDebateOrPanelWorkerMixin):
                 msg = _("Successfully auto-allocated adjudicators to debates.")
                 level = 'success'
 
-        # TODO: return debates directly from allocator function?
-        content = self.reserialize_debates(SimpleDebateAllocationSerializer, round)
+        # Only debates whose adjudicators changed need to be sent
+        content = self.reserialize_debates(SimpleDebateAllocationSerializer, round, changed)
 
-        self.return_response(content, event['extra']['group_name'], msg, level)
+        self.return_response(content, event, msg, level)
 
     def allocate_panel_adjs(self, event):
         round = Round.objects.get(pk=event['extra']['round_id'])
-        self._apply_allocation_settings(round, event['extra']['settings'])
+        settings = self._get_allocation_settings(round, event['extra']['settings'])
 
         panels = round.preformedpanel_set.all()
 
         if not panels.exists():
-            self.return_error(event['extra']['group_name'],
-                _("There aren't any panels to fill. Create panels first."))
+            self.return_error(event, _("There aren't any panels to fill. Create panels first."))
             return
 
         adjs = round.active_adjudicators.all()
+        progress = partial(self.report_progress, event)
 
         try:
             if round.ballots_per_debate == 'per-adj':
-                allocator = VotingHungarianAllocator(panels, adjs, round)
+                allocator = VotingHungarianAllocator(panels, adjs, round, progress=progress, settings=settings)
             else:
-                allocator = ConsensusHungarianAllocator(panels, adjs, round)
+                allocator = ConsensusHungarianAllocator(panels, adjs, round, progress=progress, settings=settings)
 
             allocation, user_warnings = allocator.allocate()
         except AdjudicatorAllocationError as e:
-            self.return_error(event['extra']['group_name'], str(e))
+            self.return_error(event, str(e))
             return
 
-        for alloc in allocation:
-            alloc.save()
-
-        self.log_action(event['extra'], round, ActionLogEntry.ActionType.PREFORMED_PANELS_ADJUDICATOR_AUTO)
-        content = self.reserialize_panels(SimplePanelAllocationSerializer, round)
+        with self.saving(event):
+            changed = save_allocations(allocation)
+            self.log_action(event['extra'], round, ActionLogEntry.ActionType.PREFORMED_PANELS_ADJUDICATOR_AUTO)
+        content = self.reserialize_panels(SimplePanelAllocationSerializer, round, changed)
 
         if user_warnings:
             msg = ngettext(
@@ -165,10 +160,12 @@ class AdjudicatorAllocationWorkerConsumer(EditDebateOrPanelWorkerMixin):
             msg = _("Successfully auto-allocated adjudicators to preformed panels.")
             level = 'success'
 
-        self.return_response(content, event['extra']['group_name'], mark_safe(msg), level)
+        self.return_response(content, event, mark_safe(msg), level)
 
     def _prioritise_by_bracket(self, instances, bracket_attrname):
-        instances = instances.order_by('-' + bracket_attrname)
+        """Sets the importance of each instance from its bracket, and returns
+        the instances in bracket order. Doesn't save them."""
+        instances = list(instances.order_by('-' + bracket_attrname))
         nimportancelevels = 4
         importance = 1
         boundary = round(len(instances) / nimportancelevels)
@@ -177,11 +174,11 @@ class AdjudicatorAllocationWorkerConsumer(EditDebateOrPanelWorkerMixin):
             group = list(group)
             for panel in group:
                 panel.importance = importance
-                panel.save()
             n += len(group)
             if n >= boundary:
                 importance -= 1
                 boundary = round((nimportancelevels - 2 - importance) * len(instances) / nimportancelevels)
+        return instances
 
     def prioritise_debates(self, event):
         # TODO: Debates and panels should really be unified in a single function
@@ -205,19 +202,19 @@ class AdjudicatorAllocationWorkerConsumer(EditDebateOrPanelWorkerMixin):
                         debate.importance = -2
                     else:
                         debate.importance = 1
-                    debate.save()
             else:
-                self.return_error(event['extra']['group_name'],
-                    _("You have no break category set as 'is general' so debate importances can't be calculated."))
+                self.return_error(event, _("You have no break category set as 'is general' so debate importances can't be calculated."))
                 return
 
         elif priority_method == 'bracket':
-            self._prioritise_by_bracket(debates, 'bracket')
+            debates = self._prioritise_by_bracket(debates, 'bracket')
 
-        self.log_action(event['extra'], round, ActionLogEntry.ActionType.DEBATE_IMPORTANCE_AUTO)
+        with self.saving(event):
+            Debate.objects.bulk_update(debates, ['importance'])
+            self.log_action(event['extra'], round, ActionLogEntry.ActionType.DEBATE_IMPORTANCE_AUTO)
         content = self.reserialize_debates(SimpleDebateImportanceSerializer, round, debates)
         msg = _("Succesfully auto-prioritised debates.")
-        self.return_response(content, event['extra']['group_name'], msg, 'success')
+        self.return_response(content, event, msg, 'success')
 
     def prioritise_panels(self, event):
         rd = Round.objects.get(pk=event['extra']['round_id'])
@@ -235,33 +232,42 @@ class AdjudicatorAllocationWorkerConsumer(EditDebateOrPanelWorkerMixin):
                         panel.importance = 0
                     else:
                         panel.importance = -2
-                    panel.save()
             else:
-                self.return_error(event['extra']['group_name'],
-                    _("You have no break category set as 'is general' so panel importances can't be calculated."))
+                self.return_error(event, _("You have no break category set as 'is general' so panel importances can't be calculated."))
                 return
 
         elif priority_method == 'bracket':
             panels = panels.annotate(bracket_mid=(F('bracket_max') + F('bracket_min')) / 2)
-            self._prioritise_by_bracket(panels, 'bracket_mid')
+            panels = self._prioritise_by_bracket(panels, 'bracket_mid')
 
-        self.log_action(event['extra'], rd, ActionLogEntry.ActionType.PREFORMED_PANELS_IMPORTANCE_AUTO)
+        with self.saving(event):
+            PreformedPanel.objects.bulk_update(panels, ['importance'])
+            self.log_action(event['extra'], rd, ActionLogEntry.ActionType.PREFORMED_PANELS_IMPORTANCE_AUTO)
         content = self.reserialize_panels(SimplePanelImportanceSerializer, rd, panels)
         msg = _("Succesfully auto-prioritised preformed panels.")
-        self.return_response(content, event['extra']['group_name'], msg, 'success')
+        self.return_response(content, event, msg, 'success')
 
     def create_preformed_panels(self, event):
         round = Round.objects.get(pk=event['extra']['round_id'])
-        for i, (bracket_min, bracket_max, liveness) in enumerate(
-                calculate_anticipated_draw(round), start=1):
-            PreformedPanel.objects.update_or_create(round=round, room_rank=i,
-                defaults={
-                    'bracket_max': bracket_max,
-                    'bracket_min': bracket_min,
-                    'liveness': liveness,
-                })
-
-        self.log_action(event['extra'], round, ActionLogEntry.ActionType.PREFORMED_PANELS_CREATE)
+        anticipated = list(calculate_anticipated_draw(round))
+
+        with self.saving(event):
+            existing = {panel.room_rank: panel for panel in round.preformedpanel_set.all()}
+            to_create, to_update = [], []
+            for i, (bracket_min, bracket_max, liveness) in enumerate(anticipated, start=1):
+                panel = existing.get(i)
+                if panel is None:
+                    panel = PreformedPanel(round=round, room_rank=i)
+                    to_create.append(panel)
+                else:
+                    to_update.append(panel)
+                panel.bracket_min = bracket_min
+                panel.bracket_max = bracket_max
+                panel.liveness = liveness
+            PreformedPanel.objects.bulk_create(to_create)
+            PreformedPanel.objects.bulk_update(to_update, ['bracket_min', 'bracket_max', 'liveness'])
+            self.log_action(event['extra'], round, ActionLogEntry.ActionType.PREFORMED_PANELS_CREATE)
+
         content = self.reserialize_panels(EditPanelAdjsPanelSerializer, round)
 
         if round.prev is None:
@@ -273,4 +279,4 @@ class AdjudicatorAllocationWorkerConsumer(EditDebateOrPanelWorkerMixin):
         else:
             msg, level = _("Succesfully created new preformed panels for this round."), 'success'
 
-        self.return_response(content, event['extra']['group_name'], msg, level)
+        self.return_response(content, event, msg, level)
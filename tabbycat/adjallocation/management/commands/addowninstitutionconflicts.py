@@ -1,5 +1,6 @@
 from django.db.models import F
 
+from adjallocation.conflicts import clear_conflicts_index
 from utils.management.base import TournamentCommand
 
 
@@ -16,11 +17,11 @@ class Command(TournamentCommand):
 
     def handle_tournament(self, tournament, **options):
         if not options["teams_only"]:
-            self.add_for_queryset(tournament.adjudicator_set)
+            self.add_for_queryset(tournament, tournament.adjudicator_set)
         if not options["adjudicators_only"]:
-            self.add_for_queryset(tournament.team_set)
+            self.add_for_queryset(tournament, tournament.team_set)
 
-    def add_for_queryset(self, qs):
+    def add_for_queryset(self, tournament, qs):
         conflict_model = qs.model.institution_conflicts.through
         field = qs.model.__name__.lower()
 
@@ -31,6 +32,7 @@ class Command(TournamentCommand):
         conflict_model.objects.bulk_create([
             conflict_model(**{field: obj, "institution": obj.institution}) for obj in qs
         ])
+        clear_conflicts_index(tournament.id)
         self.stdout.write("Done, created {missing} previously-missing {model} own-institution conflicts.".format(
             missing=missing, model=qs.model._meta.verbose_name))
         self.stdout.write("{existing} {models} already had own-institution conflicts defined.".format(
@@ -1,5 +1,6 @@
 from django.core.management.base import CommandError
 
+from adjallocation.allocation import save_allocations
 from adjallocation.allocators import registry
 from tournaments.models import Round
 from utils.management.base import RoundCommand
@@ -50,8 +51,7 @@ class Command(RoundCommand):
         allocations, user_warnings = allocator.allocate()
 
         if not options["dry_run"]:
-            for alloc in allocations:
-                alloc.save()
+            save_allocations(allocations)
             self.stdout.write(self.style.SUCCESS("Saved debate adjudicators for {:d} debates.".format(len(allocations))))
         else:
             self.stdout.write(self.style.MIGRATE_LABEL("Dry run requested, not saving to database."))
@@ -1,6 +1,7 @@
 from itertools import zip_longest
 
 from adjallocation.preformed import copy_panels_to_debates, registry
+from participants.prefetch import populate_feedback_scores
 from utils.management.base import RoundCommand
 
 
@@ -35,6 +36,7 @@ class Command(RoundCommand):
         if not options["quiet"]:
             print("Allocations:")
             feedback_weight = round.feedback_weight
+            populate_feedback_scores([adj for panel in panels if panel is not None for adj in panel.adjudicators.all()])
             for debate, panel in zip_longest(debates, panels, fillvalue=None):
                 print("To debate: {}".format(debate))
                 if panel is None:
@@ -0,0 +1,29 @@
+# Generated by Django 4.1.7 on 2026-10-17 07:37
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0010_alter_round_draw_type'),
+        ('adjallocation', '0009_auto_20200902_1208'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoundHistory',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('adjteam', django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), default=list, size=None, verbose_name='adjudicator-team pairs')),
+                ('adjadj', django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), default=list, size=None, verbose_name='adjudicator-adjudicator pairs')),
+                ('round', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='history', to='tournaments.round', verbose_name='round')),
+            ],
+            options={
+                'verbose_name': 'round history',
+                'verbose_name_plural': 'round histories',
+            },
+        ),
+    ]
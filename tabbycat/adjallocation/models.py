@@ -1,3 +1,4 @@
+from django.contrib.postgres.fields import ArrayField
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
@@ -39,6 +40,31 @@ class DebateAdjudicator(models.Model):
         return '{} in {} ({})'.format(self.adjudicator, self.debate, self.get_type_display())
 
 
+class RoundHistory(models.Model):
+    """Who saw whom in a completed round, as used by `HistoryInfo`. Each field
+    is a flattened list of primary key pairs, i.e. `[adj1, team1, adj2, team2,
+    ...]` for `adjteam` and `[adj1, adj2, adj3, adj4, ...]` for `adjadj`, with
+    one pair for each encounter in the round.
+
+    Records are created by `HistoryInfo` the first time a later round needs
+    them, and deleted (see `adjallocation.signals`) whenever a debate team or
+    debate adjudicator in the round changes."""
+
+    round = models.OneToOneField('tournaments.Round', models.CASCADE, related_name='history',
+        verbose_name=_("round"))
+    adjteam = ArrayField(base_field=models.IntegerField(), default=list,
+        verbose_name=_("adjudicator-team pairs"))
+    adjadj = ArrayField(base_field=models.IntegerField(), default=list,
+        verbose_name=_("adjudicator-adjudicator pairs"))
+
+    class Meta:
+        verbose_name = _("round history")
+        verbose_name_plural = _("round histories")
+
+    def __str__(self):
+        return str(self.round)
+
+
 # ==============================================================================
 # Conflicts
 # ==============================================================================
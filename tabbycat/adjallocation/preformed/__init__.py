@@ -1,5 +1,6 @@
 from itertools import zip_longest
 
+from ..allocation import save_adjudicator_positions
 from .base import registry
 # These imports add the allocator classes in those files to the registry.
 from . import dumb
@@ -8,7 +9,8 @@ from . import hungarian
 
 
 def copy_panels_to_debates(debates, panels):
-    """Copies the adjudicators in the given `panels` to the given `debates`.
+    """Copies the adjudicators in the given `panels` to the given `debates`,
+    and returns the debates whose adjudicators changed.
 
     If a debate lacks a corresponding panel, either because the iterable of
     panels runs out or because the corresponding panel is `None`, then the
@@ -16,10 +18,10 @@ def copy_panels_to_debates(debates, panels):
     debate are ignored. The iterable `debates` must not contain `None`
     (otherwise this function will stop copying there).
     """
+    debate_positions = []
     for debate, panel in zip_longest(debates, panels, fillvalue=None):
         if debate is None:
             break
-        debate.debateadjudicator_set.all().delete()
-        if panel is not None:
-            for ppa in panel.preformedpaneladjudicator_set.all():
-                debate.debateadjudicator_set.create(adjudicator=ppa.adjudicator, type=ppa.type)
+        positions = [(ppa.adjudicator_id, ppa.type) for ppa in panel.preformedpaneladjudicator_set.all()] if panel else []
+        debate_positions.append((debate, positions))
+    return save_adjudicator_positions(debate_positions)
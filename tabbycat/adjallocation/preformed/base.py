@@ -6,7 +6,7 @@ from django.utils.translation import gettext as _
 from adjallocation.models import PreformedPanelAdjudicator
 from participants.models import Adjudicator, Team
 
-from ..allocators.base import AdjudicatorAllocationError
+from ..allocators.base import AdjudicatorAllocationError, AllocationSettings
 from ..conflicts import ConflictsInfo, HistoryInfo
 
 logger = logging.getLogger(__name__)
@@ -27,12 +27,16 @@ class BasePreformedPanelAllocator:
     have been created *and* the draw for the relevant round has been created.
     """
 
-    def __init__(self, debates, panels, round):
-        """`debates` and `panels` must both be QuerySets, not other iterables."""
+    def __init__(self, debates, panels, round, progress=None, settings=None):
+        """`debates` and `panels` must both be QuerySets, not other iterables.
+        `settings` is an `AllocationSettings`, by default from the tournament's
+        preferences."""
 
         self.tournament = round.tournament
         self.round = round
         self.debates = debates
+        self.progress = progress
+        self.settings = settings or AllocationSettings.from_preferences(self.tournament)
         self.panels = panels.prefetch_related(
             Prefetch('preformedpaneladjudicator_set',
                 queryset=PreformedPanelAdjudicator.objects.select_related('adjudicator')))
@@ -46,7 +50,7 @@ class BasePreformedPanelAllocator:
 
         teams = Team.objects.filter(debateteam__debate__in=debates)
         adjudicators = Adjudicator.objects.filter(preformedpaneladjudicator__panel__in=panels)
-        self.conflicts = ConflictsInfo(teams=teams, adjudicators=adjudicators)
+        self.conflicts = ConflictsInfo(teams=teams, adjudicators=adjudicators, tournament=self.tournament)
         self.history = HistoryInfo(round=round)
 
     def allocate(self):
@@ -56,3 +60,9 @@ class BasePreformedPanelAllocator:
         have `None` in it, to indicate that the corresponding debate should have
         its adjudicators cleared."""
         raise NotImplementedError
+
+    def report_progress(self, stage):
+        """Calls the `progress` callback, if there is one, with the stage that
+        the allocation is starting, either "costing" or "solving"."""
+        if self.progress is not None:
+            self.progress(stage)
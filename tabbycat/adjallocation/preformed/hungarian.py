@@ -1,6 +1,6 @@
 import logging
 
-from munkres import Munkres
+from draw.generator.assignment import solve_assignment
 
 from .base import BasePreformedPanelAllocator, register
 
@@ -15,12 +15,9 @@ class HungarianPreformedPanelAllocator(BasePreformedPanelAllocator):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        t = self.tournament
-        self.conflict_penalty = t.pref('adj_conflict_penalty')
-        self.history_penalty = t.pref('adj_history_penalty')
-        self.mismatch_penalty = t.pref('preformed_panel_mismatch_penalty')
-
-        self.munkres = Munkres()
+        self.conflict_penalty = self.settings.conflict_penalty
+        self.history_penalty = self.settings.history_penalty
+        self.mismatch_penalty = self.settings.mismatch_penalty
 
     def calc_cost(self, debate, panel):
         cost = 0
@@ -36,13 +33,15 @@ class HungarianPreformedPanelAllocator(BasePreformedPanelAllocator):
         return cost
 
     def allocate(self):
+        self.report_progress("costing")
         cost_matrix = [
             [self.calc_cost(debate, panel) for panel in self.panels]
             for debate in self.debates
         ]
 
         logger.info("optimizing panels (matrix size: %d debates by %d panels", len(cost_matrix), len(cost_matrix[0]))
-        indices = self.munkres.compute(cost_matrix)
+        self.report_progress("solving")
+        indices = solve_assignment(cost_matrix)
         indices.sort()
         total_cost = sum(cost_matrix[i][j] for i, j in indices)
         logger.info("total cost: %f", total_cost)
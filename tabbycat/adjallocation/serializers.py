@@ -29,7 +29,7 @@ class EditDebateAdjsDebateSerializer(DebateSerializerMixin):
     """ Returns debates for the Edit Adjudicator Allocation view"""
 
     def adjudicator_representation(self, debate_or_panel_adj):
-        return debate_or_panel_adj.adjudicator.pk
+        return debate_or_panel_adj.adjudicator_id
 
 
 class EditPanelAdjsPanelSerializer(EditDebateAdjsDebateSerializer):
@@ -0,0 +1,95 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from draw.models import DebateTeam
+from participants.models import Adjudicator, Team
+from tournaments.models import Round
+from tournaments.signals import is_debate_round_completed
+
+from .conflicts import clear_conflicts_index, clear_conflicts_indices
+from .models import (AdjudicatorAdjudicatorConflict, AdjudicatorInstitutionConflict,
+                     AdjudicatorTeamConflict, DebateAdjudicator, RoundHistory, TeamInstitutionConflict)
+
+CONFLICT_MODELS = (AdjudicatorTeamConflict, AdjudicatorAdjudicatorConflict,
+                   AdjudicatorInstitutionConflict, TeamInstitutionConflict)
+
+
+@receiver(post_save, sender=DebateAdjudicator)
+@receiver(post_delete, sender=DebateAdjudicator)
+@receiver(post_save, sender=DebateTeam)
+@receiver(post_delete, sender=DebateTeam)
+def clear_round_history(sender, instance, raw=False, **kwargs):
+    """Deletes the recorded history of the round, so that `HistoryInfo` reads
+    it again from the debates the next time it's needed. Only completed rounds
+    have recorded history. Instances marked `batched` are from
+    `save_adjudicator_positions()`, which does this itself."""
+    if raw or getattr(instance, 'batched', False):
+        return
+    debate = instance.debate if type(instance).debate.is_cached(instance) else None
+    if is_debate_round_completed(instance.debate_id, debate):
+        RoundHistory.objects.filter(round__debate__id=instance.debate_id).delete()
+
+
+@receiver(post_save, sender=Round)
+def clear_uncompleted_round_history(sender, instance, raw=False, **kwargs):
+    """Changes to rounds that aren't completed don't clear their history, so
+    it's deleted when a round is marked as not completed."""
+    if not raw and not instance.completed:
+        RoundHistory.objects.filter(round=instance).delete()
+
+
+def _conflict_tournament_ids(instance, action, model, pk_set):
+    """Returns the IDs of the tournaments of the teams and adjudicators in the
+    changed conflicts, including None if any adjudicator isn't attached to a
+    tournament, or if the participants can't be known. Participants already
+    loaded on the instance (e.g. by the importer) aren't queried."""
+    tournament_ids = set()
+    ids = {Team: [], Adjudicator: []}
+
+    if action is None:  # post_save or post_delete of the conflict itself
+        for name in ('team', 'adjudicator', 'adjudicator1', 'adjudicator2'):
+            descriptor = getattr(type(instance), name, None)
+            if descriptor is None:
+                continue
+            if descriptor.is_cached(instance):
+                tournament_ids.add(getattr(instance, name).tournament_id)
+            else:
+                ids[descriptor.field.related_model].append(getattr(instance, descriptor.field.attname))
+    else:  # m2m_changed, through a many-to-many field on either side
+        if isinstance(instance, (Team, Adjudicator)):
+            tournament_ids.add(instance.tournament_id)
+        elif pk_set is None:  # cleared from an institution
+            return {None}
+        if model in ids:
+            ids[model].extend(pk_set or [])
+
+    for participant_model, participant_ids in ids.items():
+        if participant_ids:
+            tournament_ids.update(participant_model.objects.filter(
+                id__in=participant_ids).values_list('tournament_id', flat=True))
+    return tournament_ids
+
+
+def clear_conflicts_index_for_conflict(sender, instance, raw=False, action=None, model=None, pk_set=None, **kwargs):
+    """Invalidates the cached conflicts indices (see `get_conflicts_index()`)
+    of the tournaments of the teams and adjudicators in the changed conflicts.
+    Conflicts involving adjudicators not attached to a tournament can be in
+    any tournament's index, so then all indices are invalidated, as they are
+    for raw saves, since loading fixtures changes conflicts."""
+    if action is not None and not action.startswith('post_'):
+        return
+
+    tournament_ids = {None} if raw else _conflict_tournament_ids(instance, action, model, pk_set)
+    if None in tournament_ids:
+        clear_conflicts_indices()
+        return
+    for tournament_id in tournament_ids:
+        clear_conflicts_index(tournament_id)
+
+
+for model in CONFLICT_MODELS:
+    # The models are the "through" models of many-to-many fields on Team and
+    # Adjudicator, so changes through those fields send `m2m_changed` instead.
+    post_save.connect(clear_conflicts_index_for_conflict, sender=model)
+    post_delete.connect(clear_conflicts_index_for_conflict, sender=model)
+    m2m_changed.connect(clear_conflicts_index_for_conflict, sender=model)
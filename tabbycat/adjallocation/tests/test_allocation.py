@@ -0,0 +1,88 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from adjallocation.allocation import AdjudicatorAllocation, save_allocations
+from adjallocation.conflicts import HistoryInfo
+from adjallocation.models import DebateAdjudicator, RoundHistory
+from adjallocation.preformed import copy_panels_to_debates
+from adjallocation.serializers import SimpleDebateAllocationSerializer
+from utils.tests import CompletedTournamentTestMixin
+
+
+class TestSaveAllocations(CompletedTournamentTestMixin, TestCase):
+
+    round_seq = 4
+
+    def setUp(self):
+        super().setUp()
+        self.debates = list(self.round.debate_set.order_by('id'))
+        self.current = {debate: AdjudicatorAllocation(debate, from_db=True) for debate in self.debates}
+
+    def rotated_allocations(self, debates):
+        """Moves each debate's panel to the next debate, and makes the first
+        panellist (if any) the chair."""
+        allocations = []
+        for debate, previous in zip(debates, debates[-1:] + debates[:-1]):
+            old = self.current[previous]
+            voting = list(old.voting())
+            allocations.append(AdjudicatorAllocation(debate, chair=voting[-1], panellists=voting[:-1],
+                                                     trainees=old.trainees))
+        return allocations
+
+    def assertSaved(self, allocations):  # noqa: N802
+        for allocation in allocations:
+            saved = AdjudicatorAllocation(allocation.container, from_db=True)
+            self.assertEqual(saved.chair, allocation.chair)
+            self.assertCountEqual(saved.panellists, allocation.panellists)
+            self.assertCountEqual(saved.trainees, allocation.trainees)
+
+    def test_save(self):
+        allocations = self.rotated_allocations(self.debates)
+        changed = save_allocations(allocations)
+        self.assertCountEqual(changed, self.debates)
+        self.assertSaved(allocations)
+
+    def test_query_count_independent_of_debates(self):
+        query_counts = []
+        for debates in [self.debates[:2], self.debates[2:]]:
+            with CaptureQueriesContext(connection) as context:
+                save_allocations(self.rotated_allocations(debates))
+            query_counts.append(len(context.captured_queries))
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_unchanged(self):
+        with self.assertNumQueries(1):
+            changed = save_allocations(self.current.values())
+        self.assertEqual(changed, [])
+
+    def test_serialize_without_refetch(self):
+        changed = save_allocations(self.rotated_allocations(self.debates))
+        with self.assertNumQueries(0):
+            data = SimpleDebateAllocationSerializer(changed, many=True).data
+        for debate_data in data:
+            expected = DebateAdjudicator.objects.filter(debate_id=debate_data['id'])
+            self.assertCountEqual([adj for adjs in debate_data['adjudicators'].values() for adj in adjs],
+                                  expected.values_list('adjudicator_id', flat=True))
+
+    def test_clears_round_history(self):
+        HistoryInfo(self.round)
+        previous = self.tournament.round_set.get(seq=self.round_seq - 1)
+        self.assertTrue(RoundHistory.objects.filter(round=previous).exists())
+        save_allocations([AdjudicatorAllocation(previous.debate_set.first())])
+        self.assertFalse(RoundHistory.objects.filter(round=previous).exists())
+        self.assertTrue(RoundHistory.objects.exclude(round=previous).exists())
+
+    def test_copy_panels_to_debates(self):
+        debates = self.debates[:3]
+        for i, debate in enumerate(debates):
+            panel = self.round.preformedpanel_set.create(importance=0, room_rank=i + 1)
+            for adj, adj_type in self.current[debates[-1 - i]].with_debateadj_types():
+                panel.preformedpaneladjudicator_set.create(adjudicator=adj, type=adj_type)
+
+        panels = list(self.round.preformedpanel_set.order_by('room_rank'))
+        changed = copy_panels_to_debates(debates, panels + [None])
+        self.assertCountEqual(changed, [debates[0], debates[2]])  # middle debate is unchanged
+        for debate, panel in zip(debates, panels):
+            self.assertCountEqual(debate.debateadjudicator_set.values_list('adjudicator_id', 'type'),
+                                  panel.preformedpaneladjudicator_set.values_list('adjudicator_id', 'type'))
@@ -0,0 +1,77 @@
+from django.test import TestCase
+
+from adjallocation.allocators.base import AllocationSettings
+from adjallocation.allocators.hungarian import ConsensusHungarianAllocator, VotingHungarianAllocator
+from utils.tests import CompletedTournamentTestMixin
+
+
+class TestHungarianAllocatorCosts(CompletedTournamentTestMixin, TestCase):
+
+    round_seq = 4
+
+    def setUp(self):
+        super().setUp()
+        self.debates = list(self.round.debate_set.all())
+        self.adjs = list(self.tournament.adjudicator_set.all())
+
+    def test_calc_costs_matches_calc_cost(self):
+        allocator = VotingHungarianAllocator(self.debates, self.adjs, self.round)
+        allocator.populate_adj_scores(self.adjs)
+        chair = self.adjs[0]
+        rows = [(debate, adjustment, chair if i % 2 else None)
+                for i, debate in enumerate(self.debates) for adjustment in [0, -1, -2.0]]
+
+        matrix = allocator.calc_costs(rows, self.adjs)
+        self.assertEqual(len(matrix), len(rows))
+        for (debate, adjustment, row_chair), costs in zip(rows, matrix):
+            expected = [allocator.calc_cost(debate, adj, adjustment, row_chair) for adj in self.adjs]
+            for cost, exp_cost in zip(costs, expected):
+                self.assertAlmostEqual(cost, exp_cost)
+
+    def test_populate_adj_scores_query_count(self):
+        allocator = VotingHungarianAllocator(self.debates, self.adjs, self.round)
+        with self.assertNumQueries(1):
+            allocator.populate_adj_scores(self.adjs)
+        with self.assertNumQueries(0):
+            allocator.populate_adj_scores(self.adjs)
+
+    def test_allocate(self):
+        for allocator_class in [VotingHungarianAllocator, ConsensusHungarianAllocator]:
+            with self.subTest(allocator=allocator_class.key):
+                allocator = allocator_class(self.debates, self.adjs, self.round)
+                allocations, _ = allocator.allocate()
+                self.assertEqual(len(allocations), len(self.debates))
+                allocated = [adj for aa in allocations for adj in aa.all()]
+                self.assertEqual(len(allocated), len(set(allocated)))
+                self.assertTrue(all(aa.chair is not None for aa in allocations))
+
+
+class TestAllocationSettings(CompletedTournamentTestMixin, TestCase):
+
+    round_seq = 4
+
+    def test_from_preferences(self):
+        settings = AllocationSettings.from_preferences(self.tournament)
+        self.assertEqual(settings.conflict_penalty, self.tournament.pref('adj_conflict_penalty'))
+        self.assertEqual(settings.no_trainees, self.tournament.pref('no_trainee_position'))
+
+    def test_overrides(self):
+        penalty = self.tournament.pref('adj_conflict_penalty')
+        settings = AllocationSettings.from_preferences(self.tournament, {
+            'draw_rules__adj_conflict_penalty': str(penalty + 1),
+            'adj_min_voting_score': 2,
+        })
+        self.assertEqual(settings.conflict_penalty, penalty + 1)
+        self.assertIsInstance(settings.min_voting_score, float)
+        self.assertEqual(settings.min_voting_score, 2.0)
+        self.assertEqual(self.tournament.preferences['draw_rules__adj_conflict_penalty'], penalty)
+
+    def test_unrecognised_override(self):
+        with self.assertRaises(ValueError):
+            AllocationSettings.from_preferences(self.tournament, {'usePreformedPanels': True})
+
+    def test_allocator_uses_settings(self):
+        settings = AllocationSettings.from_preferences(self.tournament)._replace(history_penalty=12345)
+        adjs = list(self.tournament.adjudicator_set.all())
+        allocator = VotingHungarianAllocator(self.round.debate_set.all(), adjs, self.round, settings=settings)
+        self.assertEqual(allocator.history_penalty, 12345)
@@ -0,0 +1,148 @@
+from itertools import combinations, product
+
+from django.test import TestCase
+
+from adjallocation.conflicts import clear_conflicts_indices, ConflictsInfo, HistoryInfo
+from adjallocation.models import AdjudicatorTeamConflict, DebateAdjudicator, RoundHistory
+from draw.models import Debate
+from participants.models import Adjudicator
+from tournaments.models import Tournament
+from utils.tests import CompletedTournamentTestMixin
+
+
+class TestHistoryInfo(CompletedTournamentTestMixin, TestCase):
+
+    round_seq = 4
+
+    def setUp(self):
+        super().setUp()
+        self.tournament.round_set.filter(seq__lt=self.round_seq).update(completed=True)
+
+    def expected_histories(self):
+        adjteam = {}
+        adjadj = {}
+        debates = Debate.objects.filter(round__tournament=self.tournament, round__seq__lt=self.round_seq)
+        for debate in debates.prefetch_related('debateadjudicator_set', 'debateteam_set'):
+            das = sorted(debate.debateadjudicator_set.all(), key=lambda da: da.id)
+            for da, dt in product(das, debate.debateteam_set.all()):
+                adjteam.setdefault((da.adjudicator_id, dt.team_id), []).append(debate.round.seq)
+            for da1, da2 in combinations(das, 2):
+                adjadj.setdefault((da1.adjudicator_id, da2.adjudicator_id), []).append(debate.round.seq)
+        return adjteam, adjadj
+
+    def assertHistoriesEqual(self, history):  # noqa: N802
+        adjteam, adjadj = self.expected_histories()
+        self.assertEqual({k: sorted(v) for k, v in history.adjteamhistories.items()}, adjteam)
+        self.assertEqual({k: sorted(v) for k, v in history.adjadjhistories.items()}, adjadj)
+
+    def test_records_completed_rounds(self):
+        self.assertFalse(RoundHistory.objects.exists())
+        self.assertHistoriesEqual(HistoryInfo(self.round))
+        self.assertEqual(RoundHistory.objects.count(), self.round_seq - 1)
+
+        with self.assertNumQueries(1):
+            history = HistoryInfo(self.round)
+        self.assertHistoriesEqual(history)
+
+    def test_incomplete_round_not_recorded(self):
+        self.tournament.round_set.filter(seq=3).update(completed=False)
+        self.assertHistoriesEqual(HistoryInfo(self.round))
+        self.assertFalse(RoundHistory.objects.filter(round__seq=3).exists())
+        self.assertEqual(RoundHistory.objects.count(), self.round_seq - 2)
+
+    def test_change_clears_record(self):
+        HistoryInfo(self.round)
+        da = DebateAdjudicator.objects.filter(debate__round__tournament=self.tournament, debate__round__seq=2).first()
+        da.delete()
+        self.assertFalse(RoundHistory.objects.filter(round__seq=2).exists())
+        self.assertEqual(RoundHistory.objects.count(), self.round_seq - 2)
+        self.assertHistoriesEqual(HistoryInfo(self.round))
+        self.assertEqual(RoundHistory.objects.count(), self.round_seq - 1)
+
+    def test_incomplete_round_change_skips_history(self):
+        da = DebateAdjudicator.objects.filter(debate__round=self.round).select_related('debate__round').first()
+        with self.assertNumQueries(1):
+            da.save()
+
+    def test_uncompleting_round_clears_record(self):
+        HistoryInfo(self.round)
+        round = self.tournament.round_set.get(seq=2)
+        round.completed = False
+        round.save()
+        self.assertFalse(RoundHistory.objects.filter(round__seq=2).exists())
+        self.assertEqual(RoundHistory.objects.count(), self.round_seq - 2)
+
+
+class TestConflictsInfo(CompletedTournamentTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.teams = list(self.tournament.team_set.all())
+        self.adjs = list(self.tournament.adjudicator_set.all())
+
+    def tearDown(self):
+        clear_conflicts_indices()  # changes are rolled back without signals
+        super().tearDown()
+
+    def get_conflicts(self):
+        return ConflictsInfo(teams=self.teams, adjudicators=self.adjs, tournament=self.tournament)
+
+    def test_index_cached(self):
+        conflicts = self.get_conflicts()
+        with self.assertNumQueries(0):
+            cached = self.get_conflicts()
+        self.assertEqual(cached.adjteamconflicts, conflicts.adjteamconflicts)
+        self.assertEqual(cached.adjadjconflicts, conflicts.adjadjconflicts)
+        self.assertEqual(cached.teaminstconflicts, conflicts.teaminstconflicts)
+        self.assertEqual(cached.adjinstconflicts, conflicts.adjinstconflicts)
+
+    def test_matches_database(self):
+        conflicts = self.get_conflicts()
+        expected = {(c.adjudicator_id, c.team_id) for c in AdjudicatorTeamConflict.objects.filter(
+            team__tournament=self.tournament)}
+        self.assertEqual(conflicts.adjteamconflicts, expected)
+        for adj in self.adjs:
+            self.assertEqual(conflicts.adjinstconflicts[adj.id],
+                             set(adj.institution_conflicts.values_list('id', flat=True)))
+
+    def test_conflict_created(self):
+        adj, team = self.adjs[0], self.teams[0]
+        AdjudicatorTeamConflict.objects.filter(adjudicator=adj, team=team).delete()
+        self.assertFalse(self.get_conflicts().personal_conflict_adj_team(adj, team))
+        AdjudicatorTeamConflict.objects.create(adjudicator=adj, team=team)
+        self.assertTrue(self.get_conflicts().personal_conflict_adj_team(adj, team))
+
+    def test_conflict_added_through_many_to_many(self):
+        adj1, adj2 = self.adjs[:2]
+        adj1.adjudicator_conflicts.remove(adj2)
+        adj2.adjudicator_conflicts.remove(adj1)
+        self.assertFalse(self.get_conflicts().personal_conflict_adj_adj(adj1, adj2))
+        adj1.adjudicator_conflicts.add(adj2)
+        conflicts = self.get_conflicts()
+        self.assertTrue(conflicts.personal_conflict_adj_adj(adj1, adj2))
+        self.assertTrue(conflicts.personal_conflict_adj_adj(adj2, adj1))
+
+    def test_institution_conflicts(self):
+        adj, team = self.adjs[0], self.teams[0]
+        team.institution_conflicts.add(adj.institution)
+        adj.institution_conflicts.add(adj.institution)
+        conflicts = self.get_conflicts()
+        self.assertIn(adj.institution, conflicts.conflicting_institutions_adj_team(adj, team))
+        self.assertTrue(conflicts.institutional_conflict_adj_team(adj, team))
+
+    def test_other_tournaments_unaffected(self):
+        other = Tournament.objects.create(slug="other", name="Other")
+        ConflictsInfo(teams=[], adjudicators=[], tournament=other)
+        adj, team = self.adjs[0], self.teams[0]
+        AdjudicatorTeamConflict.objects.filter(adjudicator=adj, team=team).delete()
+        AdjudicatorTeamConflict.objects.create(adjudicator=adj, team=team)
+        with self.assertNumQueries(0):
+            ConflictsInfo(teams=[], adjudicators=[], tournament=other)
+
+    def test_unattached_adjudicator_affects_all_tournaments(self):
+        other = Tournament.objects.create(slug="other", name="Other")
+        ConflictsInfo(teams=[], adjudicators=[], tournament=other)
+        adj = Adjudicator.objects.create(name="Unattached", tournament=None)
+        AdjudicatorTeamConflict.objects.create(adjudicator=adj, team=self.teams[0])
+        with self.assertNumQueries(4):  # one query per type of conflict
+            ConflictsInfo(teams=[], adjudicators=[], tournament=other)
@@ -9,14 +9,14 @@ from participants.models import Adjudicator, Team
 from .conflicts import ConflictsInfo
 
 
-def adjudicator_conflicts_display(debates):
+def adjudicator_conflicts_display(debates, tournament=None):
     """Returns a dict mapping elements (debates) in `debates` to a list of
     strings of explaining conflicts between adjudicators and teams, and
     conflicts between adjudicators and each other."""
 
     adjudicators = Adjudicator.objects.filter(debateadjudicator__debate__in=debates)
     teams = Team.objects.filter(debateteam__debate__in=debates)
-    conflicts = ConflictsInfo(teams=teams, adjudicators=adjudicators)
+    conflicts = ConflictsInfo(teams=teams, adjudicators=adjudicators, tournament=tournament)
 
     conflict_messages = {debate: [] for debate in debates}
 
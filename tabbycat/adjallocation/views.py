@@ -71,7 +71,8 @@ class BaseEditDebateOrPanelAdjudicatorsView(DebateDragAndDropMixin, Administrato
 
     def get_adjudicator_conflicts(self):
         conflicts = ConflictsInfo(teams=self.tournament.team_set.all(),
-                                  adjudicators=self.tournament.adjudicator_set.all())
+                                  adjudicators=self.tournament.adjudicator_set.all(),
+                                  tournament=self.tournament)
         team_conflicts, adj_conflicts = conflicts.serialized_by_participant()
         return {'teams': team_conflicts, 'adjudicators': adj_conflicts}
 
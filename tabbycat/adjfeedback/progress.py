@@ -23,6 +23,17 @@ from .utils import expected_feedback_targets
 logger = logging.getLogger(__name__)
 
 
+def _share_debates(debate_objects):
+    """Makes all objects in `debate_objects` (debate-teams or
+    debate-adjudicators) from the same debate use the same Debate instance, so
+    that its panel and confirmed result are only worked out once. Returns a
+    list of the distinct debates."""
+    debates = {}
+    for obj in debate_objects:
+        obj.debate = debates.setdefault(obj.debate_id, obj.debate)
+    return list(debates.values())
+
+
 class BaseFeedbackExpectedSubmissionTracker:
     """Represents a single piece of expected feedback."""
 
@@ -64,6 +75,11 @@ class BaseFeedbackExpectedSubmissionTracker:
     def acceptable_target_names(self):
         return [adj.get_public_name(self.round.tournament) for adj in self.acceptable_targets()]
 
+    def acceptable_target_ids(self):
+        if not hasattr(self, '_acceptable_target_ids'):
+            self._acceptable_target_ids = {adj.id for adj in self.acceptable_targets()}
+        return self._acceptable_target_ids
+
 
 class FeedbackExpectedSubmissionFromTeamTracker(BaseFeedbackExpectedSubmissionTracker):
     """Represents a single piece of expected feedback from a team on any valid
@@ -193,8 +209,9 @@ class BaseFeedbackProgress:
         """Returns a list of trackers for feedback that was submitted but not
         expected to be there."""
         if self.show_unexpected:
+            expected_ids = {feedback.id for feedback in self.expected_feedback()}
             return [FeedbackUnexpectedSubmissionTracker(feedback) for feedback in
-                self.submitted_feedback() if feedback not in self.expected_feedback()]
+                self.submitted_feedback() if feedback.id not in expected_ids]
         else:
             return []
 
@@ -233,6 +250,9 @@ class BaseFeedbackProgress:
         return self.num_fulfilled() / self.num_expected()
 
     def _prefetch_tracker_acceptable_submissions(self, trackers, tracker_identifier, feedback_identifier):
+        """Populates the acceptable submissions of all `trackers` from the
+        submitted feedback, matching each feedback to at most one tracker by
+        its identifier, so that this takes linear time."""
         trackers_by_identifier = {}
         for tracker in trackers:
             tracker._acceptable_submissions = []
@@ -244,7 +264,7 @@ class BaseFeedbackProgress:
                 tracker = trackers_by_identifier[identifier]
             except KeyError:
                 continue
-            if feedback.adjudicator in tracker.acceptable_targets():
+            if feedback.adjudicator_id in tracker.acceptable_target_ids():
                 tracker._acceptable_submissions.append(feedback)
 
 
@@ -281,7 +301,8 @@ class FeedbackProgressForTeam(BaseFeedbackProgress):
             debate__round__stage=Round.Stage.PRELIMINARY,
         ).select_related('debate', 'debate__round').prefetch_related(
             'debate__debateadjudicator_set__adjudicator')
-        populate_confirmed_ballots([dt.debate for dt in debateteams], results=True)
+        debates = _share_debates(debateteams)
+        populate_confirmed_ballots(debates, results=True)
         return debateteams
 
     def _get_debateteams(self):
@@ -343,11 +364,13 @@ class FeedbackProgressForAdjudicator(BaseFeedbackProgress):
     @staticmethod
     def _debateadjudicator_queryset_operations(queryset):
         # this is also used by get_feedback_progress
-        return queryset.filter(
+        debateadjs = queryset.filter(
             debate__ballotsubmission__confirmed=True,
             debate__round__stage=Round.Stage.PRELIMINARY,
         ).select_related('debate', 'debate__round').prefetch_related(
             'debate__debateadjudicator_set__adjudicator')
+        _share_debates(debateadjs)
+        return debateadjs
 
     def _get_debateadjudicators(self):
         if not hasattr(self, '_debateadjudicators'):
@@ -400,7 +423,7 @@ def get_feedback_progress(tournament):
         debateteams_by_team_id[debateteam.team_id].append(debateteam)
 
     for team in teams:
-        progress = FeedbackProgressForTeam(team)
+        progress = FeedbackProgressForTeam(team, tournament)
         progress._submitted_feedback = submitted_feedback_by_team_id[team.id]
         progress._debateteams = debateteams_by_team_id[team.id]
         teams_progress.append(progress)
@@ -421,7 +444,7 @@ def get_feedback_progress(tournament):
         debateadjs_by_adj_id[debateadj.adjudicator_id].append(debateadj)
 
     for adj in adjudicators:
-        progress = FeedbackProgressForAdjudicator(adj)
+        progress = FeedbackProgressForAdjudicator(adj, tournament)
         progress._submitted_feedback = submitted_feedback_by_adj_id[adj.id]
         progress._debateadjudicators = debateadjs_by_adj_id[adj.id]
         adjs_progress.append(progress)
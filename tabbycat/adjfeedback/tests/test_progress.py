@@ -1,6 +1,9 @@
 import logging
+from unittest.mock import patch
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from adjallocation.models import DebateAdjudicator
 from adjfeedback.models import AdjudicatorFeedback
@@ -9,11 +12,11 @@ from participants.models import Adjudicator, Institution, Speaker, Team
 from results.models import BallotSubmission
 from results.result import DebateResultByAdjudicatorWithScores
 from tournaments.models import Round, Tournament
-from utils.tests import suppress_logs
+from utils.tests import CompletedTournamentTestMixin, suppress_logs
 from venues.models import Venue
 
 from ..progress import FeedbackExpectedSubmissionFromAdjudicatorTracker, FeedbackExpectedSubmissionFromTeamTracker
-from ..progress import FeedbackProgressForAdjudicator, FeedbackProgressForTeam
+from ..progress import FeedbackProgressForAdjudicator, FeedbackProgressForTeam, get_feedback_progress
 
 
 class TestFeedbackProgress(TestCase):
@@ -459,3 +462,62 @@ class TestFeedbackProgress(TestCase):
         self.tournament.preferences['feedback__show_unexpected_feedback'] = False
         progress = self.assertAdjudicatorProgress('with-p-on-c', 0, 3, 3, 0, 3, 0.0)
         self.assertEqual(len(progress.unexpected_trackers()), 0)
+
+
+class TestGetFeedbackProgress(CompletedTournamentTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tournament.preferences['feedback__feedback_from_teams'] = 'orallist'
+        self.tournament.preferences['feedback__show_unexpected_feedback'] = True
+
+    def create_feedback(self, n):
+        """Creates feedback from teams and chairs on up to `n` debate-adjudicators,
+        some of it on unexpected targets."""
+        das = DebateAdjudicator.objects.filter(debate__round__tournament=self.tournament).order_by('id')
+        for da in das[:n]:
+            for dt in da.debate.debateteam_set.all():
+                AdjudicatorFeedback.objects.get_or_create(adjudicator=da.adjudicator, source_team=dt, version=1,
+                    defaults=dict(score=3, confirmed=True, submitter_type=AdjudicatorFeedback.Submitter.TABROOM))
+            for other in da.debate.debateadjudicator_set.exclude(id=da.id):
+                AdjudicatorFeedback.objects.get_or_create(adjudicator=da.adjudicator, source_adjudicator=other, version=1,
+                    defaults=dict(score=3, confirmed=True, submitter_type=AdjudicatorFeedback.Submitter.TABROOM))
+
+    def summary(self, progress):
+        return (progress.num_submitted(), progress.num_expected(), progress.num_fulfilled(),
+                sorted(tracker.submission().id for tracker in progress.unexpected_trackers()))
+
+    def get_progress(self):
+        with CaptureQueriesContext(connection) as context:
+            teams_progress, adjs_progress = get_feedback_progress(self.tournament)
+            summaries = [self.summary(progress) for progress in teams_progress + adjs_progress]
+        return summaries, len(context.captured_queries)
+
+    def test_matches_individual_progress(self):
+        self.create_feedback(40)
+        summaries, _ = self.get_progress()
+        expected = [self.summary(FeedbackProgressForTeam(team)) for team in self.tournament.team_set.all()]
+        expected += [self.summary(FeedbackProgressForAdjudicator(adj)) for adj in self.tournament.adjudicator_set.all()]
+        self.assertEqual(summaries, expected)
+        self.assertTrue(any(unexpected for *_, unexpected in summaries))
+
+    def test_query_count_independent_of_feedback(self):
+        self.create_feedback(10)
+        _, num_queries = self.get_progress()
+        self.create_feedback(60)
+        _, more_num_queries = self.get_progress()
+        self.assertEqual(num_queries, more_num_queries)
+
+    def test_targets_worked_out_once_per_tracker(self):
+        # Create feedback on several adjudicators per team, which is then unexpected
+        self.tournament.preferences['feedback__feedback_from_teams'] = 'all-adjs'
+        self.create_feedback(100)
+        self.tournament.preferences['feedback__feedback_from_teams'] = 'orallist'
+        num_sources = AdjudicatorFeedback.objects.filter(source_team__isnull=False).values('source_team').distinct().count()
+        original = FeedbackExpectedSubmissionFromTeamTracker.acceptable_targets
+        with patch.object(FeedbackExpectedSubmissionFromTeamTracker, 'acceptable_targets',
+                          autospec=True, side_effect=original) as mocked:
+            teams_progress, _ = get_feedback_progress(self.tournament)
+            for progress in teams_progress:
+                progress.unexpected_trackers()
+        self.assertLessEqual(mocked.call_count, num_sources)
@@ -853,6 +853,43 @@ def get_metrics_field_type(generator):
     }
 
 
+class MotionStatisticsSerializer(serializers.Serializer):
+    class SideStatisticsSerializer(serializers.Serializer):
+        side = serializers.CharField()
+        wins = serializers.IntegerField()
+        losses = serializers.IntegerField()
+        points = serializers.DictField(child=serializers.IntegerField(),
+            help_text="Number of teams receiving each number of points")
+        average_points = serializers.FloatField(allow_null=True)
+        vetoes = serializers.IntegerField()
+
+    motion = fields.TournamentHyperlinkedRelatedField(view_name='api-motion-detail', read_only=True)
+    round = fields.TournamentHyperlinkedRelatedField(view_name='api-round-detail',
+        lookup_field='seq', lookup_url_kwarg='round_seq', read_only=True)
+    ballots = serializers.SerializerMethodField()
+    sides = serializers.SerializerMethodField()
+
+    def get_ballots(self, obj) -> int:
+        return self.context['counts'].ballots.get((obj.motion_id, obj.round_id), 0)
+
+    @extend_schema_field(SideStatisticsSerializer(many=True))
+    def get_sides(self, obj):
+        counts = self.context['counts']
+        sides = []
+        for side in self.context['tournament'].sides:
+            results = counts.results.get((obj.motion_id, obj.round_id, side), {})
+            sides.append({
+                'side': side,
+                'wins': counts.teams(obj.motion_id, obj.round_id, side, win=True),
+                'losses': counts.teams(obj.motion_id, obj.round_id, side, win=False),
+                'points': {points: counts.teams(obj.motion_id, obj.round_id, side, points=points)
+                           for points in sorted({p for p, w in results if p is not None})},
+                'average_points': counts.average_points(obj.motion_id, obj.round_id, side),
+                'vetoes': counts.vetoes.get((obj.motion_id, obj.round_id, side), 0),
+            })
+        return self.SideStatisticsSerializer(sides, many=True).data
+
+
 class BaseStandingsSerializer(serializers.Serializer):
     rank = serializers.SerializerMethodField()
     tied = serializers.SerializerMethodField()
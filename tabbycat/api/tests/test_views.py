@@ -4,6 +4,8 @@ from dynamic_preferences.registries import global_preferences_registry
 from rest_framework.test import APITestCase
 
 from breakqual.models import BreakingTeam
+from motions.models import RoundMotion
+from results.models import BallotSubmission
 from utils.tests import CompletedTournamentTestMixin
 
 
@@ -73,6 +75,27 @@ class MotionViewsetTests(CompletedTournamentTestMixin, APITestCase):
         self.assertEqual(response.status_code, 404)
 
 
+class MotionStatisticsViewTests(CompletedTournamentTestMixin, APITestCase):
+
+    def get_statistics(self):
+        return self.client.get(reverse('api-motion-statistics', kwargs={'tournament_slug': self.tournament.slug}))
+
+    def test_no_public_access(self):
+        self.tournament.preferences['tab_release__motion_tab_released'] = False
+        self.assertEqual(self.get_statistics().status_code, 401)
+
+    def test_statistics(self):
+        self.tournament.preferences['tab_release__motion_tab_released'] = True
+        response = self.get_statistics()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), RoundMotion.objects.filter(round__tournament=self.tournament).count())
+        self.assertEqual(sum(rm['ballots'] for rm in response.data), BallotSubmission.objects.filter(
+            confirmed=True, motion__isnull=False, debate__round__tournament=self.tournament).count())
+        for rm in response.data:
+            self.assertEqual([side['side'] for side in rm['sides']], self.tournament.sides)
+            self.assertEqual(sum(side['wins'] for side in rm['sides']), rm['ballots'])
+
+
 class SpeakerCategoryViewsetTests(CompletedTournamentTestMixin, APITestCase):
 
     def setUp(self):
@@ -45,6 +45,9 @@ urlpatterns = [
                     path('/<int:pk>',
                         views.MotionViewSet.as_view(detail_methods),
                         name='api-motion-detail'),
+                    path('/statistics',
+                        views.MotionStatisticsView.as_view(),
+                        name='api-motion-statistics'),
                 ])),
 
                 path('/feedback-questions', include([
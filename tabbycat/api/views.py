@@ -29,6 +29,8 @@ from checkins.consumers import CheckInEventConsumer
 from checkins.models import Event
 from checkins.utils import create_identifiers, get_unexpired_checkins
 from draw.models import Debate, DebateTeam
+from motions.models import RoundMotion
+from motions.statistics import get_motion_counts
 from options.models import TournamentPreferenceModel
 from participants.models import Adjudicator, Institution, Speaker, SpeakerCategory, Team
 from results.models import SpeakerScore, TeamScore
@@ -184,6 +186,30 @@ class MotionViewSet(TournamentAPIMixin, TournamentPublicAPIMixin, ModelViewSet):
         return super().get_queryset().filter(filters).prefetch_related('roundmotion_set', 'roundmotion_set__round')
 
 
+@extend_schema(tags=['motions'], parameters=[tournament_parameter])
+@extend_schema_view(
+    get=extend_schema(summary="Get motion statistics", responses=serializers.MotionStatisticsSerializer(many=True)),
+)
+class MotionStatisticsView(TournamentAPIMixin, TournamentPublicAPIMixin, GenericAPIView):
+    serializer_class = serializers.MotionStatisticsSerializer
+    access_preference = 'motion_tab_released'
+
+    def get_queryset(self):
+        return RoundMotion.objects.filter(round__tournament=self.tournament).select_related(
+            'round__tournament', 'motion__tournament').order_by('round__seq', 'seq')
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['counts'] = get_motion_counts(self.tournament)
+        return context
+
+    def get(self, request, **kwargs):
+        """Get the results and vetoes of each motion in each round, from
+        confirmed ballots"""
+        serializer = self.get_serializer(self.get_queryset(), many=True)
+        return Response(serializer.data)
+
+
 @extend_schema(tags=['break-categories'], parameters=[tournament_parameter])
 @extend_schema_view(
     list=extend_schema(summary="List tournament break categories"),
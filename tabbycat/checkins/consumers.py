@@ -1,6 +1,6 @@
 from asgiref.sync import async_to_sync
 from channels.generic.websocket import JsonWebsocketConsumer
-from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import prefetch_related_objects
 from django.utils.translation import gettext_lazy as _
 
 from options.utils import use_team_code_names_data_entry
@@ -15,68 +15,88 @@ class CheckInEventConsumer(TournamentWebsocketMixin, JsonWebsocketConsumer):
     group_prefix = 'checkins'
 
     def receive_json(self, content):
+        """Processes a scan once, in the consumer of the scanner that sent it,
+        and then sends the resulting check-ins to every consumer in the group."""
         # Because the public can receive but not send checkins we need to
         # re-authenticate here:
         if not self.scope["user"].is_authenticated:
             return
 
-        # Send message to room group about the new checkin
+        return_content = self.process_checkins(content)
+        if return_content is None:
+            return
+
+        # Send message to room group about the new checkins
         async_to_sync(self.channel_layer.group_send)(
             self.group_name(), {
                 'type': 'broadcast_checkin',
-                'content': content,
+                'content': return_content,
             },
         )
 
-    # Issue the relevant checkins
-    def broadcast_checkin(self, event):
-        content = event['content']
+    def process_checkins(self, content):
+        """Issues or revokes the check-ins for the barcodes in `content`, and
+        returns the content to broadcast, or None if there was an error."""
         barcode_ids = [b for b in content['barcodes'] if b is not None]
         return_content = {'created': content['status'], 'checkins': [],
                           'component_id': content['component_id']}
 
-        use_team_code_names = use_team_code_names_data_entry(self.tournament, True)
-
-        for barcode in barcode_ids:
-            try:
-                identifier = Identifier.objects.get(barcode=barcode)
-                if content['status'] is True:
-                    # If checking-in someone
-                    checkin = Event.objects.create(identifier=identifier,
-                                                   tournament=self.tournament)
-                    checkin_dict = checkin.serialize()
-
-                    if hasattr(identifier.owner, 'matchup'):
-                        if use_team_code_names:
-                            checkin_dict['owner_name'] = identifier.owner.matchup_codes
-                        else:
-                            checkin_dict['owner_name'] = identifier.owner.matchup
-                    else:
-                        checkin_dict['owner_name'] = identifier.owner.name
-
-                    return_content['checkins'].append(checkin_dict)
+        identifiers = self.get_identifiers(barcode_ids)
+
+        # Only raise an error for single check-ins as for multi-check-in
+        # events via the status page its clear what has failed or not
+        if len(barcode_ids) == 1 and not identifiers:
+            msg = _("Sent checkin identifier doesn't exist")
+            self.send_error(_("Checkins"), msg, content)
+            return None
+
+        if content['status'] is True:
+            # If checking-in people
+            checkins = Event.objects.bulk_create([
+                Event(identifier=identifier, tournament=self.tournament) for identifier in identifiers])
+            use_team_code_names = use_team_code_names_data_entry(self.tournament, True)
+
+            for checkin in checkins:
+                checkin_dict = checkin.serialize()
+                owner = checkin.identifier.owner
+                if hasattr(owner, 'matchup'):
+                    checkin_dict['owner_name'] = owner.matchup_codes if use_team_code_names else owner.matchup
                 else:
-                    # If undoing/revoking a check-in
-                    if content['type'] == 'people':
-                        window = 'checkin_window_people'
-                    else:
-                        window = 'checkin_window_venues'
-
-                    checkins = get_unexpired_checkins(self.tournament, window)
-                    checkins.filter(identifier=identifier).delete()
-                    return_content['checkins'].append({'identifier': barcode})
-
-            except ObjectDoesNotExist:
-                # Only raise an error for single check-ins as for multi-check-in
-                # events via the status page its clear what has failed or not
-                if len(barcode_ids) == 1:
-                    msg = _("Sent checkin identifier doesn't exist")
-                    self.send_error(_("Checkins"), msg, content)
-                    return
+                    checkin_dict['owner_name'] = owner.name
+                return_content['checkins'].append(checkin_dict)
+
+        else:
+            # If undoing/revoking check-ins
+            if content['type'] == 'people':
+                window = 'checkin_window_people'
+            else:
+                window = 'checkin_window_venues'
+
+            get_unexpired_checkins(self.tournament, window).filter(identifier__in=identifiers).delete()
+            return_content['checkins'] = [{'identifier': identifier.barcode} for identifier in identifiers]
 
         if len(return_content['checkins']) == 0 and content['status'] is not False:
             msg = _("No checkin identifiers exist for sent barcodes")
             self.send_error(_("Checkins"), msg, content)
-            return
+            return None
+
+        return return_content
+
+    def get_identifiers(self, barcodes):
+        """Returns the identifiers for `barcodes` that exist, in the same order,
+        with their owners prefetched."""
+        identifiers = {identifier.barcode: identifier for identifier in Identifier.objects.filter(barcode__in=barcodes)}
+        identifiers = [identifiers[barcode] for barcode in barcodes if barcode in identifiers]
 
-        self.send_json(return_content)
+        by_class = {}
+        for identifier in identifiers:
+            by_class.setdefault(type(identifier), []).append(identifier)
+        for klass, klass_identifiers in by_class.items():
+            if klass.instance_attr is not None:
+                prefetch_related_objects(klass_identifiers, klass.instance_attr)
+
+        return identifiers
+
+    # Send the check-ins to the client
+    def broadcast_checkin(self, event):
+        self.send_json(event['content'])
@@ -0,0 +1,76 @@
+from unittest.mock import AsyncMock, Mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from checkins.consumers import CheckInEventConsumer
+from checkins.models import Event, PersonIdentifier
+from checkins.utils import create_identifiers
+from participants.models import Adjudicator
+from utils.tests import CompletedTournamentTestMixin
+
+
+class TestCheckInEventConsumer(CompletedTournamentTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        create_identifiers(PersonIdentifier, Adjudicator.objects.filter(tournament=self.tournament))
+        self.barcodes = list(PersonIdentifier.objects.filter(
+            person__adjudicator__tournament=self.tournament).values_list('barcode', flat=True))
+
+    def get_consumer(self):
+        consumer = CheckInEventConsumer()
+        consumer.scope = {'user': get_user_model()(username="scanner")}
+        consumer._tournament_from_url = self.tournament
+        consumer.channel_name = "scanner"
+        consumer.channel_layer = Mock(group_send=AsyncMock())
+        consumer.send_json = Mock()
+        return consumer
+
+    def scan(self, consumer, barcodes, status=True):
+        consumer.receive_json({'barcodes': barcodes, 'status': status, 'type': 'people', 'component_id': 1})
+
+    def test_query_count_independent_of_barcodes(self):
+        self.scan(self.get_consumer(), self.barcodes[12:13])  # load content types and preferences
+        query_counts = []
+        for barcodes in [self.barcodes[:2], self.barcodes[2:12]]:
+            with CaptureQueriesContext(connection) as context:
+                self.scan(self.get_consumer(), barcodes)
+            query_counts.append(len(context.captured_queries))
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_checkins_created_once(self):
+        consumer = self.get_consumer()
+        self.scan(consumer, self.barcodes[:10] + ["000000"])
+        self.assertEqual(Event.objects.count(), 10)
+
+        consumer.send_json.assert_not_called()
+        consumer.channel_layer.group_send.assert_called_once()
+        group, message = consumer.channel_layer.group_send.call_args.args
+        self.assertEqual(message['type'], 'broadcast_checkin')
+        checkins = message['content']['checkins']
+        self.assertEqual([checkin['identifier'] for checkin in checkins], self.barcodes[:10])
+        self.assertTrue(all(checkin['owner_name'] for checkin in checkins))
+
+        # Receiving the broadcast only forwards it to the client
+        other = self.get_consumer()
+        with self.assertNumQueries(0):
+            other.broadcast_checkin(message)
+        other.send_json.assert_called_once_with(message['content'])
+
+    def test_revoke(self):
+        consumer = self.get_consumer()
+        self.scan(consumer, self.barcodes[:5])
+        self.scan(consumer, self.barcodes[:3], status=False)
+        self.assertEqual(Event.objects.count(), 2)
+        message = consumer.channel_layer.group_send.call_args.args[1]
+        self.assertEqual(message['content']['checkins'], [{'identifier': barcode} for barcode in self.barcodes[:3]])
+
+    def test_unknown_single_barcode(self):
+        consumer = self.get_consumer()
+        self.scan(consumer, ["000000"])
+        consumer.channel_layer.group_send.assert_not_called()
+        self.assertIn('error', consumer.send_json.call_args.args[0])
+        self.assertFalse(Event.objects.exists())
@@ -0,0 +1,51 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from checkins.models import Event, PersonIdentifier
+from checkins.utils import create_identifiers, get_checkins
+from participants.models import Adjudicator, Speaker
+from utils.tests import CompletedTournamentTestMixin
+
+
+class TestGetCheckins(CompletedTournamentTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tournament.preferences['data_entry__checkin_window_people'] = 12
+        create_identifiers(PersonIdentifier, Speaker.objects.filter(team__tournament=self.tournament))
+        create_identifiers(PersonIdentifier, Adjudicator.objects.filter(tournament=self.tournament))
+        self.now = timezone.now()
+
+    def check_in(self, person, hours_ago):
+        Event.objects.create(identifier=person.checkin_identifier, tournament=self.tournament,
+                             time=self.now - timedelta(hours=hours_ago))
+
+    def test_adjudicators(self):
+        adjs = list(Adjudicator.objects.filter(tournament=self.tournament).select_related('checkin_identifier'))
+        self.check_in(adjs[0], 2)
+        self.check_in(adjs[0], 1)
+        self.check_in(adjs[1], 20)  # expired
+
+        self.tournament.pref('checkin_window_people')  # load preferences
+        with self.assertNumQueries(1):
+            get_checkins(adjs, self.tournament, 'checkin_window_people')
+        self.assertTrue(adjs[0].checked_in)
+        self.assertEqual(adjs[0].time, self.now - timedelta(hours=2))
+        self.assertFalse(adjs[1].checked_in)
+        self.assertFalse(any(adj.checked_in for adj in adjs[2:]))
+
+    def test_teams(self):
+        teams = list(self.tournament.team_set.prefetch_related('speaker_set__checkin_identifier'))
+        nsubstantives = self.tournament.pref('substantive_speakers')
+        speakers = list(teams[0].speaker_set.all())
+        for speaker in speakers[:nsubstantives]:
+            self.check_in(speaker, 1)
+        for speaker in list(teams[1].speaker_set.all())[:nsubstantives - 1]:
+            self.check_in(speaker, 1)
+
+        get_checkins(teams, self.tournament, 'checkin_window_people')
+        self.assertEqual(teams[0].checked_icon, 'check')
+        self.assertEqual(teams[1].checked_icon, 'shuffle')
+        self.assertFalse(teams[2].checked_in)
@@ -4,7 +4,7 @@ import random
 import string
 
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Q
+from django.db.models import Min, Q
 from django.utils import timezone
 from django.utils.translation import gettext as _
 
@@ -42,6 +42,14 @@ def get_unexpired_checkins(tournament, window_preference_type):
     return Event.objects.filter(filters).select_related('identifier').order_by('time')
 
 
+def get_checkin_times(tournament, window_preference_type):
+    """Returns a dict mapping each barcode with an unexpired check-in to the
+    time of its first unexpired check-in, using one grouped query."""
+    events = get_unexpired_checkins(tournament, window_preference_type)
+    return dict(events.order_by().values('identifier__barcode').annotate(
+        first_time=Min('time')).values_list('identifier__barcode', 'first_time'))
+
+
 def create_identifiers(model_to_make, items_to_check):
     kind = model_to_make.instance_attr
     identifiers_to_make = items_to_check.filter(checkin_identifier__isnull=True)
@@ -52,7 +60,7 @@ def create_identifiers(model_to_make, items_to_check):
     return
 
 
-def single_checkin(instance, events):
+def single_checkin(instance, checkin_times):
     instance.checked_icon = ''
     instance.checked_in = False
     try:
@@ -65,7 +73,7 @@ def single_checkin(instance, events):
         instance.checked_tooltip = _("Not checked in; no barcode assigned")
 
     if identifier:
-        instance.time = next((e['time'] for e in events if e['identifier__barcode'] == identifier.barcode), None)
+        instance.time = checkin_times.get(identifier.barcode)
         if instance.time:
             instance.checked_in = True
             instance.checked_icon = 'check'
@@ -73,13 +81,13 @@ def single_checkin(instance, events):
     return instance
 
 
-def multi_checkin(team, events, t):
+def multi_checkin(team, checkin_times, t):
     team.checked_icon = ''
     team.checked_in = False
     tooltips = []
 
     for speaker in team.speaker_set.all():
-        speaker = single_checkin(speaker, events)
+        speaker = single_checkin(speaker, checkin_times)
         if speaker.checked_in:
             tooltip = _("%(speaker)s checked in at %(time)s.") % {'speaker': speaker.get_public_name(t), 'time': speaker.time.strftime('%H:%M')}
         else:
@@ -101,12 +109,14 @@ def multi_checkin(team, events, t):
 
 
 def get_checkins(queryset, t, window_preference_type):
-    events = get_unexpired_checkins(t, window_preference_type).values(
-        'time', 'identifier__barcode')
+    """Annotates each instance in `queryset` (teams, people, venues or
+    debates) with its check-in status. The check-in times are looked up by
+    barcode, so this takes time linear in the number of instances and events."""
+    checkin_times = get_checkin_times(t, window_preference_type)
     for instance in queryset:
         if hasattr(instance, 'use_institution_prefix'):
-            instance = multi_checkin(instance, events, t)
+            instance = multi_checkin(instance, checkin_times, t)
         else:
-            instance = single_checkin(instance, events)
+            instance = single_checkin(instance, checkin_times)
 
     return queryset
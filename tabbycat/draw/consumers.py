@@ -1,12 +1,16 @@
 import logging
 
 from asgiref.sync import async_to_sync
-from channels.consumer import SyncConsumer
 from channels.generic.websocket import JsonWebsocketConsumer
 from channels.layers import get_channel_layer
+from django.utils.translation import gettext as _
 
 from actionlog.models import ActionLogEntry
+from adjallocation.allocation import save_adjudicator_positions
 from adjallocation.serializers import SimpleDebateAllocationSerializer, SimpleDebateImportanceSerializer
+from jobs.consumers import JobWorkerConsumer
+from jobs.models import Job
+from jobs.utils import cancel_job, enqueue_job
 from tournaments.mixins import RoundWebsocketMixin
 from utils.mixins import SuperuserRequiredWebsocketMixin
 from venues.serializers import SimpleDebateVenueSerializer
@@ -34,17 +38,27 @@ class BaseAdjudicatorContainerConsumer(SuperuserRequiredWebsocketMixin, RoundWeb
                 self.receive_importance(content)
             elif key == 'adjudicators':
                 self.receive_adjudicators(content)
+            elif key == 'cancel':
+                self.receive_cancel(content['cancel'])
 
     def receive_action(self, action_function, action_settings, user):
         # TODO: Make this selection mechanism more robust
         worker = "venues" if action_function == "allocate_debate_venues" else "adjallocation"
-        async_to_sync(get_channel_layer().send)(worker, {
-            "type": action_function, # Corresponds to the function
-            "extra": {'user_id': user.id, 'round_id': self.round.id,
-                      'tournament_id': self.tournament.id,
-                      'settings': action_settings,
-                      'group_name': self.group_name()},
-        })
+        job = enqueue_job(worker, action_function, self.tournament, round=self.round, user=user,
+            group_name=self.group_name(), settings=action_settings)
+        self.send_json({'job': job.serialize()})
+
+    def receive_cancel(self, job_id):
+        """ Cancel a job; if it was running, the worker reports the cancellation """
+        job = cancel_job(job_id, self.tournament)
+        if job is not None:
+            message = {'text': _("The action was cancelled."), 'type': 'warning'}
+            async_to_sync(get_channel_layer().group_send)(
+                self.group_name(), {
+                    'type': 'broadcast_debates_or_panels',
+                    'content': {'job': job.serialize(), 'message': message},
+                },
+            )
 
     def get_debates_or_panels(self, debates_or_panels):
         """ Retrieve either the debates or panels from the JSON id keys """
@@ -66,35 +80,17 @@ class BaseAdjudicatorContainerConsumer(SuperuserRequiredWebsocketMixin, RoundWeb
         del content_to_return['importance'] # Reserialise as debatesOrPanels
         self.return_attributes(content_to_return, serialized)
 
-    def delete_adjudicators(self, debate_or_panel, adj_ids):
-        return debate_or_panel.related_adjudicator_set.exclude(
-            adjudicator_id__in=adj_ids).delete()
-
-    def create_adjudicators(self, debate_or_panel, adj_id, adj_type):
-        return debate_or_panel.related_adjudicator_set.update_or_create(
-            adjudicator_id=adj_id, defaults={'type': adj_type})
-
     def receive_adjudicators(self, content):
         """ Update adjudicators on the django data then reserialize/return it """
         changes = {int(c['id']): c for c in content['adjudicators']}
-        # TODO: prefetch the adjudicator allocation objects
-        debates_or_panels = self.get_debates_or_panels(changes)
-        for d_or_p in debates_or_panels:
-            sent_allocation = changes[d_or_p.id]['adjudicators']
-            sent_allocation_ids = []
-            for (position, position_ids) in sent_allocation.items():
-                sent_allocation_ids.extend(adj_id for adj_id in position_ids)
-
-            # Delete adjudicators in the posted information
-            self.delete_adjudicators(d_or_p, sent_allocation_ids)
-            # Re-create positions of adjudicators in debate
-            for (position, position_ids) in sent_allocation.items():
-                for adjudicator_id in position_ids:
-                    self.create_adjudicators(d_or_p, adjudicator_id, position)
-
-        # Re-fetch the modified data
-        # TODO: is it necessary to re-fetch? Or should the objects be returned?
         debates_or_panels = self.get_debates_or_panels(changes)
+        save_adjudicator_positions([
+            (d_or_p, [(adj_id, position) for (position, position_ids) in changes[d_or_p.id]['adjudicators'].items()
+                      for adj_id in position_ids])
+            for d_or_p in debates_or_panels
+        ])
+
+        # The saved adjudicators are cached on the objects, so aren't re-fetched
         serialized = self.adjudicators_serializer(debates_or_panels, many=True)
         content_to_return = content.copy()
         del content_to_return['adjudicators']
@@ -191,48 +187,40 @@ class DebateEditConsumer(BaseAdjudicatorContainerConsumer):
         self.return_attributes(content_to_return, serialized)
 
 
-class EditDebateOrPanelWorkerMixin(SyncConsumer):
+class EditDebateOrPanelWorkerMixin(JobWorkerConsumer):
     """ Mixin for consumers that are run by synchronous workers that perform
     actions to edit and re-serialise debates/panels """
 
+    group_message_type = 'broadcast_debates_or_panels'
+
     def log_action(self, extra, round, type):
         ActionLogEntry.objects.log(type=type, user_id=extra['user_id'],
                 round=round, tournament=round.tournament, content_object=round)
 
     def reserialize_panels(self, serialiser, round, panels=None):
-        if not panels:
+        if panels is None:
             panels = round.preformedpanel_set.all() # TODO: prefetch
 
         serialized_panels = serialiser(panels, many=True)
         return serialized_panels
 
     def reserialize_debates(self, serialiser, round, debates=None):
-        if not debates:
+        if debates is None:
             debates = round.debate_set.all() # TODO: prefetch
         serialized_debates = serialiser(debates, many=True)
         return serialized_debates
 
-    def return_error(self, group_name, error_text):
+    def return_error(self, event, error_text):
         """ Because the worker can't do proper returns we can't really catch
         exceptions across each function; provide a manual handler instead. """
         logger.warning(error_text)
-        content = {'message': {'text': error_text, 'type': 'danger'}}
-        async_to_sync(get_channel_layer().group_send)(
-            group_name, {
-                'type': 'broadcast_debates_or_panels',
-                'content': content,
-            },
-        )
+        self.finish_job(event, Job.Status.FAILED, error_text)
+        self.send_to_group(event, {'message': {'text': error_text, 'type': 'danger'}})
 
-    def return_response(self, serialized_debates_or_panels, group_name,
+    def return_response(self, serialized_debates_or_panels, event,
                         message_text, message_type):
-        content = {
+        self.finish_job(event, Job.Status.DONE, message_text)
+        self.send_to_group(event, {
             'debatesOrPanels': serialized_debates_or_panels.data,
             'message': {'text': message_text, 'type': message_type},
-        }
-        async_to_sync(get_channel_layer().group_send)(
-            group_name, {
-                'type': 'broadcast_debates_or_panels',
-                'content': content,
-            },
-        )
+        })
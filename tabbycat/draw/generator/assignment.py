@@ -0,0 +1,50 @@
+"""Solver for the linear assignment problem, used by the graph and BP draw
+generators and by the Hungarian adjudicator allocators.
+
+If SciPy is installed, its compiled `linear_sum_assignment()` is used. If not,
+this falls back to the pure-Python `munkres` package. Either way, the cost
+matrix may be a list of lists or a NumPy array, may be rectangular, and may
+contain `DISALLOWED` entries, which are treated as an infinite cost."""
+
+import munkres
+
+try:
+    import numpy
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+DISALLOWED = munkres.DISALLOWED
+
+
+class UnsolvableAssignmentError(munkres.UnsolvableMatrix):
+    """Raised if there is no assignment that avoids every DISALLOWED entry."""
+    pass
+
+
+def _solve_scipy(costs):
+    matrix = numpy.array([[numpy.inf if cost is DISALLOWED else cost for cost in row] for row in costs], dtype=float)
+    try:
+        rows, cols = linear_sum_assignment(matrix)
+    except ValueError as e:  # infeasible cost matrix
+        raise UnsolvableAssignmentError(str(e))
+    return [(int(i), int(j)) for i, j in zip(rows, cols)]
+
+
+def _solve_munkres(costs):
+    # munkres only accepts lists of lists (not, e.g., arrays)
+    try:
+        return munkres.Munkres().compute([list(row) for row in costs])
+    except munkres.UnsolvableMatrix as e:
+        raise UnsolvableAssignmentError(str(e))
+
+
+def solve_assignment(costs):
+    """Returns a list of `(row, col)` index pairs that minimizes the total cost
+    of `costs`, in increasing order of row. If the matrix isn't square, only
+    as many pairs as the smaller dimension are returned."""
+    if len(costs) == 0 or len(costs[0]) == 0:
+        return []
+    if linear_sum_assignment is not None:
+        return _solve_scipy(costs)
+    return _solve_munkres(costs)
@@ -5,9 +5,9 @@ from collections import Counter
 from math import log2
 from statistics import pvariance
 
-import munkres
 from django.utils.translation import gettext as _
 
+from .assignment import DISALLOWED, solve_assignment
 from .common import BaseBPDrawGenerator, DrawUserError
 from .pairing import BPPairing
 
@@ -81,12 +81,11 @@ class BPHungarianDrawGenerator(BaseBPDrawGenerator):
         super().__init__(*args, **kwargs)
         self.check_teams_for_attribute("points")
         self.check_teams_for_attribute("side_history")
-        self.munkres = munkres.Munkres()
 
     def generate(self):
         self._rooms = self.define_rooms([team.points for team in self.teams])
-        self._costs = self.generate_cost_matrix(self._rooms)
-        self._indices = self.solve_assignment(self._costs)
+        self._blocks = self.define_blocks(self._rooms, [team.points for team in self.teams])
+        self._indices = self.solve_blocks(self._rooms, self._blocks)
         self._draw = self.make_pairings(self._rooms, self._indices)
 
         self.annotate_team_flags(self._draw)  # operates in-place
@@ -217,7 +216,24 @@ class BPHungarianDrawGenerator(BaseBPDrawGenerator):
             return (2 - log2(sum([p ** α for p in probs])) / (1 - α)) * n
         return _position_cost_renyi_entropy
 
-    def generate_cost_matrix(self, rooms):
+    def get_position_costs(self):
+        """Returns a list with an element for each team in `self.teams`, being
+        the list of costs (raised to the exponent) of that team being in each
+        position. Costs depend only on the team's position history, so they're
+        computed once for each distinct history."""
+        cost = self.get_position_cost_function()
+        exponent = self.options["exponent"]
+
+        costs_by_history = {}
+        position_costs = []
+        for team in self.teams:
+            history = tuple(team.side_history)
+            if history not in costs_by_history:
+                costs_by_history[history] = [cost(pos, team.side_history) ** exponent for pos in range(4)]
+            position_costs.append(costs_by_history[history])
+        return position_costs
+
+    def generate_cost_matrix(self, rooms, team_indices=None, room_indices=None, position_costs=None):
         """Returns a cost matrix for the tournament.
         Rows (inner lists) are teams, in the same order as in `self.teams`.
         Columns (elements) are positions in rooms, ordered first by room in the
@@ -227,25 +243,64 @@ class BPHungarianDrawGenerator(BaseBPDrawGenerator):
            DISALLOWED.
          - otherwise, for each position, use the position cost for that position
            (for a team with that position history).
+
+        If `team_indices` and `room_indices` are given, the matrix is restricted
+        to those teams (indices in `self.teams`) and rooms (indices in `rooms`).
         """
-        nteams = len(self.teams)
-        cost = self.get_position_cost_function()
-        exponent = self.options["exponent"]
+        if team_indices is None:
+            team_indices = range(len(self.teams))
+        if room_indices is None:
+            room_indices = range(len(rooms))
+        if position_costs is None:
+            position_costs = self.get_position_costs()
 
         costs = []
-        for team in self.teams:
+        for t in team_indices:
+            points = self.teams[t].points
             row = []
-            for level, allowed in rooms:
-                if team.points not in allowed:
-                    row.extend([munkres.DISALLOWED] * 4)
+            for r in room_indices:
+                level, allowed = rooms[r]
+                if points not in allowed:
+                    row.extend([DISALLOWED] * 4)
                 else:
-                    row.extend([cost(pos, team.side_history) ** exponent for pos in range(4)])
-            assert len(row) == nteams
+                    row.extend(position_costs[t])
+            assert len(row) == len(team_indices)
             costs.append(row)
 
-        assert len(costs) == nteams
+        assert len(costs) == len(room_indices) * 4
         return costs
 
+    # Decomposition
+
+    @staticmethod
+    def define_blocks(rooms, points):
+        """Splits the draw into blocks that can be solved independently. Given
+        rooms as returned by `define_rooms()` and a list of team point values,
+        returns a list of 2-tuples `(team_indices, room_indices)`, where each
+        room's allowed point values, and each team, are in exactly one block.
+        Rooms whose allowed point values overlap (e.g., a room that pulls teams
+        up and the bracket that they're pulled up from) are in the same block.
+        """
+        parent = {}
+
+        def find(p):
+            while parent.setdefault(p, p) != p:
+                p = parent[p]
+            return p
+
+        for level, allowed in rooms:
+            first, *others = allowed
+            for p in others:
+                parent[find(p)] = find(first)
+
+        blocks = {}
+        for r, (level, allowed) in enumerate(rooms):
+            blocks.setdefault(find(next(iter(allowed))), ([], []))[1].append(r)
+        for t, p in enumerate(points):
+            blocks[find(p)][0].append(t)
+
+        return list(blocks.values())
+
     # Assignment algorithms
 
     ASSIGNMENT_ALGORITHM_FUNCTIONS = {
@@ -266,15 +321,39 @@ class BPHungarianDrawGenerator(BaseBPDrawGenerator):
         logger.info("Assignment took %.2f seconds, total cost: %f", elapsed, total_cost)
         return indices
 
+    def solve_blocks(self, rooms, blocks):
+        """Solves the assignment problem for each block returned by
+        `define_blocks()` separately. Since no team can be in a room outside
+        its block, this gives the same total cost as solving the whole cost
+        matrix at once, but each block is much smaller. Returns a list of
+        indices (row, col) for the cost matrix returned by
+        `generate_cost_matrix()`."""
+        function = self.get_option_function("assignment_method", self.ASSIGNMENT_ALGORITHM_FUNCTIONS)
+        position_costs = self.get_position_costs()
+        start = time.perf_counter()
+        logger.info("Running assignment algorithm for %d teams in %d blocks...", len(self.teams), len(blocks))
+
+        indices = []
+        total_cost = 0
+        for team_indices, room_indices in blocks:
+            costs = self.generate_cost_matrix(rooms, team_indices, room_indices, position_costs)
+            for i, j in function(costs):
+                total_cost += costs[i][j]
+                indices.append((team_indices[i], room_indices[j // 4] * 4 + j % 4))
+
+        elapsed = time.perf_counter() - start
+        logger.info("Assignment took %.2f seconds, total cost: %f", elapsed, total_cost)
+        return indices
+
     def _assign_hungarian(self, costs):
-        return self.munkres.compute(costs)
+        return solve_assignment(costs)
 
     def _assign_hungarian_preshuffled(self, costs):
         n = len(costs)
         K = random.sample(range(n), n)             # noqa: N806
         J = random.sample(range(n), n)             # noqa: N806
         C = [[costs[i][j] for j in J] for i in K]  # noqa: N806
-        indices = self.munkres.compute(C)
+        indices = solve_assignment(C)
         return [(K[i], J[j]) for i, j in indices]
 
     # Make pairings
@@ -1,8 +1,11 @@
+import heapq
 from collections import OrderedDict
+from itertools import combinations
 
-import munkres
 import networkx as nx
 
+from .assignment import DISALLOWED, solve_assignment
+
 
 def sign(n: int) -> int:
     """Sign function for integers, -1, 0, or 1"""
@@ -13,6 +16,11 @@ def sign(n: int) -> int:
 
 
 class GraphGeneratorMixin:
+
+    # Brackets with more teams than this are matched on a sparse graph
+    SPARSE_BRACKET_SIZE = 64
+    SPARSE_NEIGHBOURS = 16
+
     def avoid_conflicts(self, pairings):
         """Graph optimisation avoids conflicts, so method is extraneous."""
         pass
@@ -46,22 +54,66 @@ class GraphGeneratorMixin:
 
         return penalty
 
+    def pairing_costs(self, teams, bracket=None):
+        """Returns a dict mapping each pair of indices `(i, j)`, with `i < j`,
+        to the cost of pairing `teams[i]` with `teams[j]`. Disallowed pairings
+        are omitted. The cost is symmetric, so it's computed once per pair."""
+        n_teams = len(teams)
+        costs = {}
+        for i, j in combinations(range(n_teams), 2):
+            penalty = self.assignment_cost(teams[i], teams[j], n_teams, bracket)
+            if penalty is not None:
+                costs[(i, j)] = penalty
+        return costs
+
+    @staticmethod
+    def sparsify_costs(costs, n_teams, neighbours):
+        """Returns the subset of `costs` containing, for each team, only the
+        `neighbours` cheapest pairings for that team. Ties are broken in favour
+        of teams closer in the bracket, so that the result keeps a perfect
+        matching wherever the bracket order does."""
+        options = [[] for _ in range(n_teams)]
+        for (i, j), cost in costs.items():
+            options[i].append((cost, j - i, j))
+            options[j].append((cost, j - i, i))
+
+        kept = set()
+        for i, team_options in enumerate(options):
+            for _, _, j in heapq.nsmallest(neighbours, team_options):
+                kept.add((min(i, j), max(i, j)))
+        return {pair: costs[pair] for pair in kept}
+
+    @staticmethod
+    def min_weight_matching(teams, costs):
+        graph = nx.Graph()
+        graph.add_nodes_from(teams)
+        graph.add_weighted_edges_from((teams[i], teams[j], cost) for (i, j), cost in costs.items())
+        return nx.min_weight_matching(graph)
+
     def generate_pairings(self, brackets):
-        """Creates an undirected weighted graph for each bracket and gets the minimum weight matching"""
+        """Creates an undirected weighted graph for each bracket and gets the
+        minimum weight matching.
+
+        For brackets of more than `SPARSE_BRACKET_SIZE` teams, the graph is
+        first pruned to each team's `SPARSE_NEIGHBOURS` cheapest pairings, which
+        makes the matching much faster. If the pruned graph doesn't have a
+        perfect matching, the full graph is used instead."""
         from .pairing import Pairing
         pairings = OrderedDict()
         i = 0
         for j, (points, teams) in enumerate(brackets.items()):
             pairings[points] = []
-            graph = nx.Graph()
-            n_teams = len(teams)
-            for t1 in teams:
-                for t2 in teams:
-                    penalty = self.assignment_cost(t1, t2, n_teams, j)
-                    if penalty is not None:
-                        graph.add_edge(t1, t2, weight=penalty)
-
-            for pairing in nx.min_weight_matching(graph):
+            costs = self.pairing_costs(teams, j)
+
+            matching = None
+            if len(teams) > self.SPARSE_BRACKET_SIZE:
+                matching = self.min_weight_matching(teams, self.sparsify_costs(costs, len(teams), self.SPARSE_NEIGHBOURS))
+                if len(matching) < len(teams) // 2:
+                    matching = None
+            if matching is None:
+                matching = self.min_weight_matching(teams, costs)
+
+            for pairing in matching:
                 i += 1
                 pairings[points].append(Pairing(teams=pairing, bracket=points, room_rank=i))
 
@@ -77,7 +129,7 @@ class GraphAllocatedSidesMixin(GraphGeneratorMixin):
     def assignment_cost(self, t1, t2, size):
         penalty = super().assignment_cost(t1, t2, size)
         if penalty is None:
-            return munkres.DISALLOWED
+            return DISALLOWED
         return penalty
 
     def generate_pairings(self, brackets):
@@ -89,7 +141,7 @@ class GraphAllocatedSidesMixin(GraphGeneratorMixin):
             n_teams = len(pool['aff']) + len(pool['neg'])
             matrix = [[self.assignment_cost(aff, neg, n_teams) for neg in pool['neg']] for aff in pool['aff']]
 
-            for i_aff, i_neg in munkres.Munkres().compute(matrix):
+            for i_aff, i_neg in solve_assignment(matrix):
                 i += 1
                 pairings[points].append(Pairing(teams=[pool['aff'][i_aff], pool['neg'][i_neg]], bracket=points, room_rank=i))
 
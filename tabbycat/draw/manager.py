@@ -6,8 +6,10 @@ from typing import List, Tuple, TYPE_CHECKING
 from django.utils.translation import gettext as _
 
 from draw.generator.powerpair import BasePowerPairedDrawGenerator
+from participants.prefetch import populate_team_history
 from participants.utils import get_side_history
 from results.models import BallotSubmission, TeamScore
+from standings.store import refresh_debate_records
 from standings.teams import TeamStandingsGenerator
 from tournaments.models import Round
 
@@ -96,7 +98,7 @@ class BaseDrawManager:
         else:
             teams = self.round.tournament.team_set.all()
 
-        teams = list(teams)
+        teams = list(teams.select_related('institution'))
         n_byes = self.n_byes(len(teams))
         if n_byes:
             return teams[:-n_byes], teams[-n_byes:]
@@ -122,6 +124,11 @@ class BaseDrawManager:
             for team in teams:
                 team.side_history = [0] * len(sides)
 
+    def _populate_team_history(self, teams):
+        # Generators call Team.seen() for many pairs of teams, so load all
+        # encounters up front rather than querying for each pair
+        populate_team_history(teams)
+
     def _populate_team_side_allocations(self, teams):
         tsas = dict()
         for tsa in self.round.teamsideallocation_set.all():
@@ -167,6 +174,7 @@ class BaseDrawManager:
                 bs = BallotSubmission(submitter_type=BallotSubmission.Submitter.AUTOMATION, confirmed=True, debate=debate)
                 bs.save()
                 TeamScore.objects.create(ballot_submission=bs, debate_team=dt, points=1, win=True)
+                refresh_debate_records(debate)
 
     def delete(self):
         self.round.debate_set.all().delete()
@@ -190,6 +198,7 @@ class BaseDrawManager:
         rrseq = self.get_rrseq()
 
         self._populate_side_history(teams)
+        self._populate_team_history(teams)
         if options.get("side_allocations") == "preallocated":
             self._populate_team_side_allocations(teams)
 
@@ -240,7 +249,7 @@ class PowerPairedDrawManager(BaseDrawManager):
     def get_teams(self) -> Tuple[List['Team'], List['Team']]:
         """Get teams in ranked order."""
         teams = add(*super().get_teams())
-        teams = self.round.tournament.team_set.filter(id__in=[t.id for t in teams])
+        teams = self.round.tournament.team_set.filter(id__in=[t.id for t in teams]).select_related('institution')
 
         metrics = self.round.tournament.pref('team_standings_precedence')
         pullup_metric = BasePowerPairedDrawGenerator.PULLUP_RESTRICTION_METRICS[self.round.tournament.pref('draw_pullup_restriction')]
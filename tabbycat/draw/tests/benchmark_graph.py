@@ -0,0 +1,60 @@
+"""Times the graph-based power-paired draw generator on a single large
+bracket, comparing the sparse graph used for large brackets with the full
+(dense) graph, and reports the total cost of each resulting draw.
+
+This script does not interact with the database at all, and it is not a test.
+It must be run from the tabbycat directory, e.g.
+
+    python -m draw.tests.benchmark_graph 128 256 --insts 20"""
+
+import argparse
+import random
+import time
+
+from draw.generator.powerpair import GraphPowerPairedDrawGenerator
+from draw.tests.utils import TestTeam
+
+
+class BenchmarkTeam(TestTeam):
+
+    def same_institution(self, other):
+        return self.institution == other.institution
+
+
+def make_bracket(n_teams, n_insts, n_seen):
+    teams = [BenchmarkTeam(i, random.randrange(n_insts), subrank=i, side_history=[0, 0], pullup_debates=0)
+             for i in range(1, n_teams + 1)]
+    for _ in range(n_seen):  # simulate previous rounds of random pairings
+        shuffled = random.sample(teams, n_teams)
+        for aff, neg in zip(shuffled[::2], shuffled[1::2]):
+            aff.hist.append(neg.id)
+            neg.hist.append(aff.id)
+    return teams
+
+
+def run(teams, sparse_bracket_size, pairing_penalty):
+    generator = GraphPowerPairedDrawGenerator(teams, pairing_method="fold", avoid_conflicts="graph",
+                                              pairing_penalty=pairing_penalty)
+    generator.SPARSE_BRACKET_SIZE = sparse_bracket_size
+    start = time.perf_counter()
+    pairings = generator.generate_pairings({0: teams})[0]
+    elapsed = time.perf_counter() - start
+    cost = sum(generator.assignment_cost(*p.teams, len(teams), 0) for p in pairings)
+    return elapsed, cost
+
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("sizes", type=int, nargs="+", help="Numbers of teams in the bracket (must be even)")
+parser.add_argument("--insts", type=int, default=20, help="Number of institutions")
+parser.add_argument("--seen", type=int, default=3, help="Number of previous opponents of each team")
+parser.add_argument("--pairing-penalty", type=int, default=1, help="Pairing deviation penalty")
+parser.add_argument("--seed", type=int, default=0, help="Random seed")
+args = parser.parse_args()
+
+random.seed(args.seed)
+print("{:>6} {:>10} {:>10} {:>10} {:>10}".format("teams", "dense (s)", "cost", "sparse (s)", "cost"))
+for size in args.sizes:
+    teams = make_bracket(size, args.insts, args.seen)
+    dense_time, dense_cost = run(teams, size, args.pairing_penalty)
+    sparse_time, sparse_cost = run(teams, 0, args.pairing_penalty)
+    print("{:>6} {:>10.3f} {:>10} {:>10.3f} {:>10}".format(size, dense_time, dense_cost, sparse_time, sparse_cost))
@@ -0,0 +1,42 @@
+import unittest
+
+from ..generator.assignment import DISALLOWED, solve_assignment, UnsolvableAssignmentError
+
+
+class TestSolveAssignment(unittest.TestCase):
+
+    def assertOptimal(self, costs, expected_cost, expected_length):  # noqa: N802
+        indices = solve_assignment(costs)
+        self.assertEqual(len(indices), expected_length)
+        self.assertEqual(len({i for i, _ in indices}), expected_length)
+        self.assertEqual(len({j for _, j in indices}), expected_length)
+        self.assertEqual(indices, sorted(indices))
+        self.assertEqual(sum(costs[i][j] for i, j in indices), expected_cost)
+
+    def test_square(self):
+        costs = [[4, 1, 3], [2, 0, 5], [3, 2, 2]]
+        self.assertOptimal(costs, 5, 3)
+
+    def test_more_columns(self):
+        costs = [[4, 1, 3, 0], [2, 0, 5, 1]]
+        self.assertOptimal(costs, 0, 2)
+
+    def test_more_rows(self):
+        costs = [[4, 1], [2, 0], [3, 2], [0, 9]]
+        self.assertOptimal(costs, 0, 2)
+
+    def test_disallowed(self):
+        costs = [[DISALLOWED, 1, 3], [2, DISALLOWED, 5], [3, 2, DISALLOWED]]
+        self.assertOptimal(costs, 7, 3)
+
+    def test_unsolvable(self):
+        costs = [[DISALLOWED, DISALLOWED], [1, 2]]
+        self.assertRaises(UnsolvableAssignmentError, solve_assignment, costs)
+
+    def test_empty(self):
+        self.assertEqual(solve_assignment([]), [])
+        self.assertEqual(solve_assignment([[]]), [])
+
+    def test_tuples(self):
+        costs = ((1, 2), (2, 1))
+        self.assertOptimal(costs, 2, 2)
@@ -1,4 +1,6 @@
+import random
 import unittest
+from itertools import product
 
 from .utils import TestTeam
 from ..generator.bphungarian import BPHungarianDrawGenerator
@@ -45,3 +47,34 @@ class TestDefineRooms(unittest.TestCase):
 
     def test_pullup_one_room(self):
         self._test_define_rooms("one_room", self.one_room)
+
+
+class TestBlocks(unittest.TestCase):
+    """Tests that solving the assignment in blocks gives the same total cost as
+    solving the whole cost matrix."""
+
+    points = [9, 8, 8, 8, 8, 8, 8, 7, 6, 6, 6, 6, 5, 5, 5, 5, 5, 5, 5, 4, 2, 2, 2, 2]
+
+    def setUp(self):
+        random.seed(3)
+        self.teams = [TestTeam(i, None, points=p, side_history=[random.randint(0, 3) for _ in range(4)])
+                      for i, p in enumerate(self.points)]
+
+    def test_define_blocks(self):
+        rooms = BPHungarianDrawGenerator._define_rooms_anywhere(self.points)
+        blocks = BPHungarianDrawGenerator.define_blocks(rooms, self.points)
+        self.assertEqual(blocks, [(list(range(0, 8)), [0, 1]), (list(range(8, 12)), [2]),
+                                  (list(range(12, 20)), [3, 4]), (list(range(20, 24)), [5])])
+
+    def test_same_total_cost(self):
+        for pullup, position_cost in product(["anywhere", "one_room"], ["simple", "entropy", "variance"]):
+            with self.subTest(pullup=pullup, position_cost=position_cost):
+                generator = BPHungarianDrawGenerator(self.teams, pullup=pullup, position_cost=position_cost)
+                rooms = generator.define_rooms(self.points)
+                costs = generator.generate_cost_matrix(rooms)
+                expected = sum(costs[i][j] for i, j in generator.solve_assignment(costs))
+
+                indices = generator.solve_blocks(rooms, generator.define_blocks(rooms, self.points))
+                self.assertCountEqual([i for i, j in indices], range(len(self.teams)))
+                self.assertCountEqual([j for i, j in indices], range(len(self.teams)))
+                self.assertAlmostEqual(sum(costs[i][j] for i, j in indices), expected)
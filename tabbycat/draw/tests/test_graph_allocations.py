@@ -137,3 +137,18 @@ class TestPowerPairedDrawGeneratorParts(unittest.TestCase):
         gcm = GraphPowerPairedDrawGenerator([team, team])
         gcm.options = {'pullup_debates_penalty': 1, 'pairing_method': 'fold', 'avoid_history': False, 'avoid_institution': False, 'side_allocations': False, 'pairing_penalty': 1}
         self.assertEqual(gcm.assignment_cost(team, team, 2), None)
+
+    def _bracket_cost(self, gcm, teams):
+        pairings = gcm.generate_pairings({0: teams})[0]
+        self.assertEqual(sorted(t.id for p in pairings for t in p.teams), [t.id for t in teams])
+        return sum(gcm.assignment_cost(*p.teams, len(teams), 0) for p in pairings)
+
+    def test_sparse_graph_matches_dense(self):
+        # teams 2k-1 and 2k have seen each other, so "adjacent" has to work around that
+        teams = [TestTeam(i+1, 'A', subrank=i+1, hist=[i+2 if i % 2 == 0 else i]) for i in range(80)]
+        gcm = GraphPowerPairedDrawGenerator(teams, pairing_method='adjacent', avoid_conflicts='graph',
+                                            avoid_institution=False, side_allocations='none', pairing_penalty=1)
+        self.assertGreater(len(teams), gcm.SPARSE_BRACKET_SIZE)
+        sparse_cost = self._bracket_cost(gcm, teams)
+        gcm.SPARSE_BRACKET_SIZE = len(teams)
+        self.assertEqual(sparse_cost, self._bracket_cost(gcm, teams))
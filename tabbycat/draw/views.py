@@ -341,7 +341,7 @@ class AdminDrawUtilitiesMixin:
 
     @cached_property
     def adjudicator_conflicts(self):
-        return adjudicator_conflicts_display(self.get_draw())
+        return adjudicator_conflicts_display(self.get_draw(), self.tournament)
 
     @cached_property
     def venue_conflicts(self):
@@ -1,9 +1,12 @@
-from xml.etree.ElementTree import Element, SubElement
+from ast import literal_eval
+from xml.etree.ElementTree import Element, SubElement, tostring
+from xml.sax.saxutils import quoteattr
 
-from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Prefetch, Q
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects, Q
 from django.utils.text import slugify
 
+from adjallocation.allocation import AdjudicatorAllocation
 from adjallocation.models import AdjudicatorAdjudicatorConflict, DebateAdjudicator
 from adjfeedback.models import AdjudicatorFeedback, AdjudicatorFeedbackQuestion
 from breakqual.models import BreakCategory
@@ -17,7 +20,9 @@ from participants.models import Adjudicator, Institution, Region, Speaker, Speak
 from results.models import BallotSubmission, Submission
 from results.prefetch import populate_confirmed_ballots, populate_wins
 from results.result import DebateResult
+from standings.store import rebuild_store, store_enabled
 from tournaments.models import Round, Tournament
+from utils.cache import invalidate_public_pages
 from venues.models import Venue
 
 
@@ -35,6 +40,14 @@ QUESTION_PREFIX = "Q"
 
 
 class Exporter:
+    """Exports a tournament as an XML archive.
+
+    The archive is built one top-level element at a time: each round and each
+    participant is loaded with a fixed number of queries (however many debates,
+    ballots or feedback it has), converted to an element and then discarded.
+    `create_all()` collects these elements into a single tree, while
+    `stream_all()` serializes them as they are made, so that large tournaments
+    don't have to be held in memory all at once."""
 
     def __init__(self, tournament):
         self.t = tournament
@@ -42,17 +55,42 @@ class Exporter:
         if tournament.pref('teams_in_debate') == 'bp':
             self.root.set('style', 'bp')
 
+    def sections(self):
+        """Returns a list of `(wrapper, elements)` tuples, where `elements` is
+        an iterator of top-level elements and `wrapper` is the name of the
+        element that encloses them, or None if they are children of the root."""
+        return [
+            (None, self.add_rounds()),
+            ('participants', self.add_participants()),
+            (None, self.add_break_categories()),
+            (None, self.add_institutions()),
+            (None, self.add_motions()),
+            (None, self.add_venues()),
+            (None, self.add_questions()),
+        ]
+
     def create_all(self):
-        self.add_rounds()
-        self.add_participants()
-        self.add_break_categories()
-        self.add_institutions()
-        self.add_motions()
-        self.add_venues()
-        self.add_questions()
+        for wrapper, elements in self.sections():
+            parent = self.root if wrapper is None else SubElement(self.root, wrapper)
+            parent.extend(elements)
 
         return self.root
 
+    def stream_all(self):
+        """Yields the archive as strings, one top-level element at a time."""
+        attrs = "".join(" %s=%s" % (key, quoteattr(value)) for key, value in self.root.items())
+        yield "<%s%s>" % (self.root.tag, attrs)
+
+        for wrapper, elements in self.sections():
+            if wrapper is not None:
+                yield "<%s>" % wrapper
+            for element in elements:
+                yield tostring(element, encoding='unicode')
+            if wrapper is not None:
+                yield "</%s>" % wrapper
+
+        yield "</%s>" % self.root.tag
+
     def add_rounds(self):
         results_prefetch = Prefetch('ballotsubmission_set', queryset=BallotSubmission.objects.filter(confirmed=True).prefetch_related(
             'speakerscore_set', 'speakerscorebyadj_set', 'teamscore_set'))
@@ -66,11 +104,14 @@ class Exporter:
             'debateadjudicator_set', dt_prefetch, results_prefetch,
         ))
 
-        for round in self.t.round_set.all().prefetch_related(debate_prefetch, 'motion_set').order_by('seq'):
+        # Prefetch one round at a time, so that only one round's debates and
+        # results are in memory at once
+        for round in self.t.round_set.all().order_by('seq'):
+            prefetch_related_objects([round], debate_prefetch, 'motion_set')
             populate_confirmed_ballots(round.debate_set.all(), motions=True, results=True)
             populate_wins(round.debate_set.all())
 
-            round_tag = SubElement(self.root, 'round', {
+            round_tag = Element('round', {
                 'name': round.name,
                 'abbreviation': round.abbreviation,
                 'elimination': str(round.stage == Round.Stage.ELIMINATION).lower(),
@@ -83,11 +124,13 @@ class Exporter:
             if round.starts_at is not None and round.starts_at != "":
                 round_tag.set('start', str(round.starts_at))
 
-            motion = round.motion_set.first()
+            motion = next(iter(round.motion_set.all()), None)
 
             for debate in round.debate_set.all():
                 self.add_debates(round_tag, motion, debate)
 
+            yield round_tag
+
     def add_debates(self, round_tag, motion, debate):
         debate_tag = SubElement(round_tag, 'debate', {
             'id': DEBATE_PREFIX + str(debate.id),
@@ -98,8 +141,10 @@ class Exporter:
         if adjs != "":
             debate_tag.set('adjudicators', adjs)
 
-            chair = debate.debateadjudicator_set.get(type=DebateAdjudicator.TYPE_CHAIR).adjudicator_id
-            debate_tag.set('chair', ADJ_PREFIX + str(chair))
+            chair = next((d_adj.adjudicator_id for d_adj in debate.debateadjudicator_set.all()
+                          if d_adj.type == DebateAdjudicator.TYPE_CHAIR), None)
+            if chair is not None:
+                debate_tag.set('chair', ADJ_PREFIX + str(chair))
 
         # Venue
         if debate.venue_id is not None:
@@ -112,17 +157,16 @@ class Exporter:
             debate_tag.set('motion', MOTION_PREFIX + str(motion.id))
 
         if debate.confirmed_ballot is not None:
-            result = DebateResult(debate.confirmed_ballot, tournament=self.t)
+            result = debate.confirmed_ballot.result
 
             for side in self.t.sides:
                 side_tag = SubElement(debate_tag, 'side', {
                     'team': TEAM_PREFIX + str(debate.get_team(side).id),
                 })
 
-                dt = debate.get_dt(side)
-                if dt.debateteammotionpreference_set.exists():
-                    side_tag.set('motion-veto', MOTION_PREFIX + str(dt.debateteammotionpreference_set.first().motion_id))
-
+                veto = next(iter(debate.get_dt(side).debateteammotionpreference_set.all()), None)
+                if veto is not None:
+                    side_tag.set('motion-veto', MOTION_PREFIX + str(veto.motion_id))
                 if result.is_voting:
                     for (adj, scoresheet) in result.scoresheets.items():
                         self.add_team_ballots(side_tag, result, adj, scoresheet, side)
@@ -175,7 +219,7 @@ class Exporter:
             if speaker is not None:
                 speech_tag = SubElement(side_tag, 'speech', {
                     'speaker': SPEAKER_PREFIX + str(result.get_speaker(side, pos).id),
-                    'reply': str(pos > self.t.pref('substantive_speakers')),
+                    'reply': str(pos > self.t.pref('substantive_speakers')).lower(),
                 })
 
                 if result.is_voting:
@@ -191,11 +235,9 @@ class Exporter:
                     ballot_tag.text = str(result.scoresheet.get_score(side, pos))
 
     def add_participants(self):
-        participants_tag = SubElement(self.root, 'participants')
-
         speaker_category_prefetch = Prefetch('speaker_set', queryset=Speaker.objects.all().prefetch_related('categories'))
         for team in self.t.team_set.all().prefetch_related(speaker_category_prefetch, 'break_categories'):
-            team_tag = SubElement(participants_tag, 'team', {
+            team_tag = Element('team', {
                 'name': team.long_name,
                 'code': team.code_name,
                 'id': TEAM_PREFIX + str(team.id),
@@ -209,7 +251,7 @@ class Exporter:
                 })
                 speaker_tag.text = speaker.name
 
-                if team.institution is not None:
+                if team.institution_id is not None:
                     speaker_tag.set('institutions', INST_PREFIX + str(team.institution_id))
 
                 if speaker.gender != "":
@@ -217,8 +259,17 @@ class Exporter:
 
                 speaker_tag.set('categories', " ".join([SPEAKER_CATEGORY_PREFIX + str(sc.id) for sc in speaker.categories.all()]))
 
-        for adj in self.t.relevant_adjudicators.prefetch_related('adjudicatorfeedback_set'):
-            adj_tag = SubElement(participants_tag, 'adjudicator', {
+            yield team_tag
+
+        feedback_prefetch = Prefetch('adjudicatorfeedback_set', queryset=AdjudicatorFeedback.objects.filter(
+            confirmed=True).select_related('source_adjudicator', 'source_team'))
+        adjudicators = list(self.t.relevant_adjudicators.prefetch_related(feedback_prefetch))
+        questions = list(self.t.adjudicatorfeedbackquestion_set.all())
+        answers = self._get_feedback_answers(questions, [feedback.id for adj in adjudicators
+                                                         for feedback in adj.adjudicatorfeedback_set.all()])
+
+        for adj in adjudicators:
+            adj_tag = Element('adjudicator', {
                 'id': ADJ_PREFIX + str(adj.id),
                 'name': adj.name,
                 'core': str(adj.adj_core).lower(),
@@ -226,13 +277,13 @@ class Exporter:
                 'score': str(adj.base_score),
             })
 
-            if adj.institution is not None:
+            if adj.institution_id is not None:
                 adj_tag.set('institutions', INST_PREFIX + str(adj.institution_id))
 
             if adj.gender != "":
                 adj_tag.set('gender', adj.gender)
 
-            for feedback in adj.adjudicatorfeedback_set.filter(confirmed=True):
+            for feedback in adj.adjudicatorfeedback_set.all():
                 feedback_tag = SubElement(adj_tag, 'feedback', {
                     'score': str(feedback.score),
                 })
@@ -243,13 +294,9 @@ class Exporter:
                     feedback_tag.set('source-team', TEAM_PREFIX + str(feedback.source_team.team_id))
                     feedback_tag.set('debate', DEBATE_PREFIX + str(feedback.source_team.debate_id))
 
-                for question in self.t.adjudicatorfeedbackquestion_set.all():
-                    try:
-                        answer = AdjudicatorFeedbackQuestion.ANSWER_TYPE_CLASSES[question.answer_type].objects.get(
-                            feedback=feedback,
-                            question=question,
-                        )
-                    except ObjectDoesNotExist:
+                for question in questions:
+                    answer = answers.get((feedback.id, question.id))
+                    if answer is None:
                         continue
 
                     answer_tag = SubElement(feedback_tag, 'answer', {
@@ -257,22 +304,39 @@ class Exporter:
                     })
                     answer_tag.text = str(answer.answer)
 
+            yield adj_tag
+
+    def _get_feedback_answers(self, questions, feedback_ids):
+        """Returns a dict mapping `(feedback_id, question_id)` to answers, using
+        one query per answer model."""
+        questions_by_model = {}
+        for question in questions:
+            questions_by_model.setdefault(question.answer_type_class, []).append(question)
+
+        answers = {}
+        for model, model_questions in questions_by_model.items():
+            for answer in model.objects.filter(question__in=model_questions, feedback_id__in=feedback_ids):
+                answers[(answer.feedback_id, answer.question_id)] = answer
+        return answers
+
     def add_break_categories(self):
         speaker_categories = self.t.speakercategory_set.all().order_by('seq')
 
         for category in speaker_categories:
-            sc_tag = SubElement(self.root, 'speaker-category', {
+            sc_tag = Element('speaker-category', {
                 'id': SPEAKER_CATEGORY_PREFIX + str(category.id),
             })
             sc_tag.text = category.name
+            yield sc_tag
 
         break_categories = self.t.breakcategory_set.all().order_by('seq')
 
         for category in break_categories:
-            bc_tag = SubElement(self.root, 'break-category', {
+            bc_tag = Element('break-category', {
                 'id': BREAK_CATEGORY_PREFIX + str(category.id),
             })
             bc_tag.text = category.name
+            yield bc_tag
 
     def add_institutions(self):
         institution_query = Institution.objects.filter(
@@ -280,7 +344,7 @@ class Exporter:
             Q(id__in=self.t.team_set.all().values_list('institution_id')),
         ).select_related('region')
         for institution in institution_query:
-            institution_tag = SubElement(self.root, 'institution', {
+            institution_tag = Element('institution', {
                 'id': INST_PREFIX + str(institution.id),
                 'reference': institution.code,
             })
@@ -289,9 +353,11 @@ class Exporter:
             if institution.region is not None:
                 institution_tag.set('region', institution.region.name)
 
+            yield institution_tag
+
     def add_motions(self):
         for motion in Motion.objects.filter(tournament=self.t):
-            motion_tag = SubElement(self.root, 'motion', {
+            motion_tag = Element('motion', {
                 'id': MOTION_PREFIX + str(motion.id),
                 'reference': motion.reference,
             })
@@ -301,17 +367,19 @@ class Exporter:
                 info_slide.text = motion.info_slide
 
             motion_tag.text = motion.text
+            yield motion_tag
 
     def add_venues(self):
         for venue in self.t.relevant_venues:
-            venue_tag = SubElement(self.root, 'venue', {
+            venue_tag = Element('venue', {
                 'id': VENUE_PREFIX + str(venue.id),
             })
             venue_tag.text = venue.name
+            yield venue_tag
 
     def add_questions(self):
         for question in self.t.adjudicatorfeedbackquestion_set.all():
-            question_tag = SubElement(self.root, 'question', {
+            question_tag = Element('question', {
                 'id': QUESTION_PREFIX + str(question.id),
                 'name': question.name,
                 'from-teams': str(question.from_team).lower(),
@@ -319,10 +387,13 @@ class Exporter:
                 'type': question.answer_type,
             })
             question_tag.text = question.text
+            yield question_tag
 
 
 class Importer:
 
+    feedback_batch_size = 500
+
     def __init__(self, tournament):
         self.root = tournament
 
@@ -353,6 +424,12 @@ class Importer:
         self.import_results()
         self.import_feedback()
 
+        # Debates, results and feedback are created in bulk, which doesn't send
+        # the signals that would otherwise keep these up to date
+        invalidate_public_pages(self.tournament.id)
+        if store_enabled(self.tournament):
+            rebuild_store(self.tournament)
+
     def _is_consensus_ballot(self, elimination):
         xpath = "round[@elimination='" + elimination + "']/debate/side"
         return len(self.root.findall(xpath + "/ballot")) == len(self.root.findall(xpath))
@@ -542,11 +619,12 @@ class Importer:
         return voting_adjs
 
     def import_debates(self):
+        """Creates the rounds, and then each round's debates, debate-teams and
+        debate-adjudicators with one query per model."""
         self.debates = {}
         self.debateteams = {}
         self.debateadjudicators = {}
 
-        rounds = []
         for i, round in enumerate(self.root.findall('round'), 1):
             round_stage = Round.Stage.ELIMINATION if round.get('elimination', 'false') == 'true' else Round.Stage.PRELIMINARY
             draw_type = Round.DrawType.ELIMINATION if round_stage == Round.Stage.ELIMINATION else Round.DrawType.MANUAL
@@ -556,7 +634,6 @@ class Importer:
                 abbreviation=round.get('abbreviation', round.get('name')[:10]), stage=round_stage, draw_type=draw_type,
                 draw_status=Round.Status.RELEASED, feedback_weight=round.get('feedback-weight', 0),
                 starts_at=round.get('start'))
-            rounds.append(round_obj)
 
             if round.find('debate') is None:
                 round_obj.completed = False
@@ -567,30 +644,39 @@ class Importer:
                 round_obj.break_category = self.team_breaks.get(round.get('break-category'))
             round_obj.save()
 
+            debates = round.findall('debate')
+            for debate in debates:
+                self.debates[debate.get('id')] = Debate(
+                    round=round_obj, venue=self.venues.get(debate.get('venue')), result_status=Debate.STATUS_CONFIRMED)
+            Debate.objects.bulk_create([self.debates[debate.get('id')] for debate in debates])
+
             side_start = 2 if self.is_bp else 0
+            debateteams = []
+            debateadjudicators = []
 
-            for debate in round.findall('debate'):
-                debate_obj = Debate(round=round_obj, venue=self.venues.get(debate.get('venue')), result_status=Debate.STATUS_CONFIRMED)
-                debate_obj.save()
-                self.debates[debate.get('id')] = debate_obj
+            for debate in debates:
+                debate_obj = self.debates[debate.get('id')]
 
                 # Debate-teams
                 for j, side in enumerate(debate.findall('side'), side_start):
                     position = list(DebateTeam.Side)[j]
                     debateteam_obj = DebateTeam(debate=debate_obj, team=self.teams[side.get('team')], side=position)
-                    debateteam_obj.save()
+                    debateteams.append(debateteam_obj)
                     self.debateteams[(debate.get('id'), side.get('team'))] = debateteam_obj
 
                 # Debate-adjudicators
                 voting_adjs = self._get_voting_adjs(debate)
-                for adj in debate.get('adjudicators').split():
+                for adj in debate.get('adjudicators', "").split():
                     adj_type = DebateAdjudicator.TYPE_PANEL if adj in voting_adjs else DebateAdjudicator.TYPE_TRAINEE
                     if debate.get('chair') == adj:
                         adj_type = DebateAdjudicator.TYPE_CHAIR
                     adj_obj = DebateAdjudicator(debate=debate_obj, adjudicator=self.adjudicators[adj], type=adj_type)
-                    adj_obj.save()
+                    debateadjudicators.append(adj_obj)
                     self.debateadjudicators[(debate.get('id'), adj)] = adj_obj
 
+            DebateTeam.objects.bulk_create(debateteams)
+            DebateAdjudicator.objects.bulk_create(debateadjudicators)
+
     def import_motions(self):
         # Can cause data consistency problems if motions are re-used between rounds: See #645
         self.motions = {}
@@ -603,6 +689,7 @@ class Importer:
             for debate in round.findall('debate'):
                 motions_by_round[r_obj.id].add(debate.get('motion'))
 
+        round_motions = []
         for motion in self.root.findall('motion'):
             motion_obj = Motion(
                 text=motion.text, reference=motion.get('reference'),
@@ -612,54 +699,101 @@ class Importer:
 
             for r, m_set in motions_by_round.items():
                 if motion.get('id') in m_set:
-                    rmotion_obj = RoundMotion(motion=motion_obj, seq=seq_by_round[r], round_id=r)
-                    rmotion_obj.save()
+                    round_motions.append(RoundMotion(motion=motion_obj, seq=seq_by_round[r], round_id=r))
+                    seq_by_round[r] += 1
+
+        RoundMotion.objects.bulk_create(round_motions)
+
+    def _create_result(self, bs_obj, debate):
+        """Returns a blank DebateResult for `bs_obj`, using the debate-teams and
+        debate-adjudicators created by `import_debates()` rather than loading
+        them from the database."""
+        debate_obj = bs_obj.debate
+        dr = DebateResult(bs_obj, load=False, round=debate_obj.round, tournament=self.tournament)
+        dr.init_blank_buffer()
+
+        for side, side_code in zip(debate.findall('side'), self.tournament.sides):
+            dr.debateteams[side_code] = self.debateteams[(debate.get('id'), side.get('team'))]
+
+        debateadjs = [self.debateadjudicators[(debate.get('id'), adj)] for adj in debate.get('adjudicators', "").split()]
+        debate_obj._adjudicators = AdjudicatorAllocation.from_debateadjudicators(debate_obj, debateadjs)
+        if dr.is_voting:
+            dr.debateadjs = {da.adjudicator: da for da in debateadjs if da.type != DebateAdjudicator.TYPE_TRAINEE}
+            dr.scoresheets = {adj: dr.scoresheet_class(positions=getattr(dr, 'positions', None)) for adj in dr.debateadjs}
+
+        return dr
 
     def import_results(self):
+        """Creates the ballot submissions of each round with one query, and
+        saves the round's results in a single transaction."""
         for round in self.root.findall('round'):
             consensus = self.preliminary_consensus if round.get('elimination') == 'false' else self.elimination_consensus
 
-            for debate in round.findall('debate'):
-                bs_obj = BallotSubmission(
-                    version=1, submitter_type=Submission.Submitter.TABROOM, confirmed=True,
-                    debate=self.debates[debate.get('id')], motion=self.motions.get(debate.get('motion')))
-                bs_obj.save()
-                dr = DebateResult(bs_obj)
-
-                numeric_scores = True
-                try:
-                    float(debate.find("side/ballot").text)
-                except ValueError:
-                    numeric_scores = False
-
-                for side, side_code in zip(debate.findall('side'), self.tournament.sides):
-
-                    if side.get('motion-veto') is not None:
-                        bs_obj.debateteammotionpreference_set.add(
-                            debate_team=self.debateteams.get((debate.get('id'), side.get('team'))),
-                            motion=self.motions.get(side.get('motion-veto')), preference=3)
-
-                    for speech, pos in zip(side.findall('speech'), self.tournament.positions):
-                        if numeric_scores:
-                            dr.set_speaker(side_code, pos, self.speakers.get(speech.get('speaker')))
-                            if consensus:
-                                dr.set_score(side_code, pos, float(speech.find('ballot').text))
-                            else:
-                                for ballot in speech.findall('ballot'):
-                                    for adj in [self.adjudicators[a] for a in ballot.get('adjudicators', "").split(" ")]:
-                                        dr.set_score(adj, side_code, pos, float(ballot.text))
-                    # Note: Dependent on #1180
-                    if consensus:
-                        if int(side.find('ballot').get('rank')) == 1:
-                            dr.add_winner(side_code)
-                    else:
-                        for ballot in side.findall('ballot'):
-                            for adj in [self.adjudicators.get(a) for a in ballot.get('adjudicators', "").split(" ")]:
-                                if int(ballot.get('rank')) == 1:
-                                    dr.add_winner(adj, side_code)
-                dr.save()
+            debates = round.findall('debate')
+            ballotsubs = [BallotSubmission(
+                version=1, submitter_type=Submission.Submitter.TABROOM, confirmed=True,
+                debate=self.debates[debate.get('id')], motion=self.motions.get(debate.get('motion')))
+                for debate in debates]
+            vetoes = []
+
+            with transaction.atomic():
+                BallotSubmission.objects.bulk_create(ballotsubs)
+
+                for debate, bs_obj in zip(debates, ballotsubs):
+                    dr = self._create_result(bs_obj, debate)
+
+                    numeric_scores = True
+                    try:
+                        float(debate.find("side/ballot").text)
+                    except ValueError:
+                        numeric_scores = False
+
+                    for side, side_code in zip(debate.findall('side'), self.tournament.sides):
+
+                        if side.get('motion-veto') is not None:
+                            vetoes.append(DebateTeamMotionPreference(
+                                ballot_submission=bs_obj, debate_team=dr.debateteams[side_code],
+                                motion=self.motions.get(side.get('motion-veto')), preference=3))
+
+                        for speech, pos in zip(side.findall('speech'), self.tournament.positions):
+                            if numeric_scores:
+                                dr.set_speaker(side_code, pos, self.speakers.get(speech.get('speaker')))
+                                if consensus:
+                                    dr.set_score(side_code, pos, float(speech.find('ballot').text))
+                                else:
+                                    for ballot in speech.findall('ballot'):
+                                        for adj in [self.adjudicators[a] for a in ballot.get('adjudicators', "").split(" ")]:
+                                            dr.set_score(adj, side_code, pos, float(ballot.text))
+                        # Note: Dependent on #1180
+                        if consensus:
+                            if int(side.find('ballot').get('rank')) == 1:
+                                dr.add_winner(side_code)
+                        else:
+                            for ballot in side.findall('ballot'):
+                                for adj in [self.adjudicators.get(a) for a in ballot.get('adjudicators', "").split(" ")]:
+                                    if int(ballot.get('rank')) == 1:
+                                        dr.add_winner(adj, side_code)
+                    dr.save()
+
+                DebateTeamMotionPreference.objects.bulk_create(vetoes)
 
     def import_feedback(self):
+        """Creates feedback and answers in batches of `feedback_batch_size`
+        feedback submissions."""
+        feedbacks = []
+        answers = []
+
+        def create_batch():
+            answers_by_model = {}
+            for answer in answers:
+                answers_by_model.setdefault(type(answer), []).append(answer)
+            with transaction.atomic():
+                AdjudicatorFeedback.objects.bulk_create(feedbacks)
+                for model, model_answers in answers_by_model.items():
+                    model.objects.bulk_create(model_answers)
+            feedbacks.clear()
+            answers.clear()
+
         for adj in self.root.findall('participants/adjudicator'):
             adj_obj = self.adjudicators[adj.get('id')]
 
@@ -669,14 +803,20 @@ class Importer:
                 feedback_obj = AdjudicatorFeedback(adjudicator=adj_obj, score=feedback.get('score'), version=1,
                     source_adjudicator=d_adj, source_team=d_team,
                     submitter_type=Submission.Submitter.TABROOM, confirmed=True)
-                feedback_obj.save()
+                feedbacks.append(feedback_obj)
 
                 for answer in feedback.findall('answer'):
                     question = self.questions[answer.get('question')]
+                    answer_model = question.answer_type_class
+
+                    if answer_model.ANSWER_TYPE is list:
+                        cast_answer = literal_eval(answer.text)
+                    else:
+                        cast_answer = answer_model._meta.get_field('answer').to_python(answer.text)
+
+                    answers.append(answer_model(question=question, answer=cast_answer, feedback=feedback_obj))
 
-                    cast_answer = answer.text
-                    # if question.answer_type in AdjudicatorFeedbackQuestion.NUMERICAL_ANSWER_TYPES:
-                    #     cast_answer = float(cast_answer)
+                if len(feedbacks) >= self.feedback_batch_size:
+                    create_batch()
 
-                    answer = AdjudicatorFeedbackQuestion.ANSWER_TYPE_CLASSES[question.answer_type](
-                        question=question, answer=cast_answer, feedback=feedback_obj)
+        create_batch()
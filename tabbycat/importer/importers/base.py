@@ -6,7 +6,11 @@ import re
 from collections import Counter
 from types import GeneratorType
 
-from django.core.exceptions import FieldError, MultipleObjectsReturned, ObjectDoesNotExist, ValidationError
+from django.core.exceptions import FieldDoesNotExist, FieldError, MultipleObjectsReturned, ObjectDoesNotExist, ValidationError
+from django.db import models, transaction
+from django.db.models.query import MAX_GET_RESULTS
+
+from utils.misc import sending_save_signals
 
 NON_FIELD_ERRORS = '__all__'
 DUPLICATE_INFO = 19  # Logging level just below INFO
@@ -153,6 +157,8 @@ class BaseTournamentDataImporter(object):
     See the documentation for _import for more details.
     """
 
+    bulk_create_batch_size = 500
+
     def __init__(self, tournament, **kwargs):
         self.tournament = tournament
         self.strict = kwargs.get('strict', True)
@@ -202,11 +208,18 @@ class BaseTournamentDataImporter(object):
         duplicate objects before saving any of the objects it creates. If
         `expect_unique` is False, it will just skip objects that would be
         duplicates and log a DUPLICATE_INFO message to say so.
+
+        Existing objects are looked up, and uniqueness is validated, in bulk
+        rather than line by line. New objects are saved in a single transaction,
+        using `bulk_create()` unless the model overrides `save()` or uses
+        multi-table inheritance.
         """
         if hasattr(csvfile, 'seek') and callable(csvfile.seek):
             csvfile.seek(0)
         reader = csv.DictReader(csvfile)
-        kwargs_seen = list()
+        kwargs_seen = set()
+        unhashable_kwargs_seen = list()
+        pending = list()
         instances = dict()
         errors = TournamentDataImporterError()
         if expect_unique is None:
@@ -242,7 +255,6 @@ class BaseTournamentDataImporter(object):
             else:
                 list_provided = True
 
-            # Create the instances
             for itemno, kwargs in enumerate(kwargs_list, start=1):
 
                 # Extra conversion for booleans (Django's BooleanField.to_python() is too restrictive)
@@ -260,21 +272,38 @@ class BaseTournamentDataImporter(object):
                 description = model.__name__ + "(" + ", ".join(["%s=%r" % args for args in kwargs.items()]) + ")"
 
                 # Check if it's a duplicate
-                kwargs_expect_unique = kwargs.copy()
-                if kwargs_expect_unique in kwargs_seen:
+                try:
+                    kwargs_key = frozenset(kwargs.items())
+                    duplicate = kwargs_key in kwargs_seen
+                except TypeError:  # unhashable values, fall back to a list
+                    kwargs_key = None
+                    duplicate = kwargs in unhashable_kwargs_seen
+                if duplicate:
                     if expect_unique:
                         message = "Duplicate " + description
                         errors.add(lineno, model, message)
                     else:
                         self.logger.log(DUPLICATE_INFO, "Skipping duplicate " + description)
                     continue
-                kwargs_seen.append(kwargs_expect_unique)
+                if kwargs_key is not None:
+                    kwargs_seen.add(kwargs_key)
+                else:
+                    unhashable_kwargs_seen.append(kwargs.copy())
 
-                # Create (but don't save) an instance (or handle an error)
+                key = (lineno, itemno) if list_provided else lineno
+                pending.append((lineno, key, kwargs, description))
+
+        # Create (but don't save) instances, checking for existing objects in bulk
+        to_clean = list()
+        existing_counts = self._count_existing(model, [kwargs for lineno, key, kwargs, description in pending])
+
+        for (lineno, key, kwargs, description), count in zip(pending, existing_counts):
+
+            if count is None:  # couldn't check in bulk, so check individually
                 try:
-                    inst = model.objects.get(**kwargs)
+                    model.objects.get(**kwargs)
                 except ObjectDoesNotExist:
-                    inst = model(**kwargs)  # normal case (create object)
+                    count = 0
                 except MultipleObjectsReturned as e:
                     if expect_unique:
                         errors.add(lineno, model, str(e))
@@ -299,26 +328,46 @@ class BaseTournamentDataImporter(object):
                     errors.update_with_validation_error(lineno, model, e)
                     continue
                 else:
-                    skipped_because_existing += 1
-                    if expect_unique:
-                        message = description + " already exists"
-                        errors.add(lineno, model, message)
-                    else:
-                        self.logger.log(DUPLICATE_INFO, "Skipping %s, already exists", description)
-                    continue
+                    count = 1
 
-                try:
-                    inst.full_clean()
-                except ValidationError as e:
-                    errors.update_with_validation_error(lineno, model, e)
-                    continue
+            if count == 1:
+                skipped_because_existing += 1
+                if expect_unique:
+                    message = description + " already exists"
+                    errors.add(lineno, model, message)
+                else:
+                    self.logger.log(DUPLICATE_INFO, "Skipping %s, already exists", description)
+                continue
+            elif count > 1:
+                if expect_unique:
+                    errors.add(lineno, model, "get() returned more than one %s -- it returned %s!" % (
+                        model._meta.object_name, count if count < MAX_GET_RESULTS else "more than %d" % (MAX_GET_RESULTS - 1)))
+                continue
 
-                key = (lineno, itemno) if list_provided else lineno
-                self.logger.debug("To create from line %s: %s", key, description)
-                instances[key] = inst
+            inst = model(**kwargs)  # normal case (create object)
+            to_clean.append((lineno, key, inst, description))
+
+        # Validate the instances, checking uniqueness in bulk
+        error_dicts = []
+        for lineno, key, inst, description in to_clean:
+            try:
+                inst.full_clean(exclude=self._saved_foreign_keys(inst), validate_unique=False)
+            except ValidationError as e:
+                error_dicts.append(e.update_error_dict({}))
+            else:
+                error_dicts.append({})
+        self._validate_unique([inst for lineno, key, inst, description in to_clean], error_dicts)
+
+        for (lineno, key, inst, description), error_dict in zip(to_clean, error_dicts):
+            if error_dict:
+                errors.update_with_validation_error(lineno, model, ValidationError(error_dict))
+                continue
+            self.logger.debug("To create from line %s: %s", key, description)
+            instances[key] = inst
 
         # Report errors, if any
         if errors:
+            errors.entries.sort(key=lambda entry: entry.lineno)
             if self.strict:
                 for message in errors.itermessages():
                     self.logger.error(message)
@@ -329,8 +378,14 @@ class BaseTournamentDataImporter(object):
                 self.errors.update(errors)
 
         # Create the instances
+        with transaction.atomic():
+            if self._can_bulk_create(model):
+                with sending_save_signals(model, instances.values(), created=True):
+                    model.objects.bulk_create(instances.values(), batch_size=self.bulk_create_batch_size)
+            else:
+                for inst in instances.values():
+                    inst.save()
         for lineno, inst in instances.items():
-            inst.save()
             self.logger.debug("Made %s from line %s: %r", model._meta.verbose_name, lineno, inst)
 
         self.logger.info("Imported %d %s", len(instances), model._meta.verbose_name_plural)
@@ -340,3 +395,123 @@ class BaseTournamentDataImporter(object):
         self.counts.update({model: len(instances)})
 
         return instances
+
+    @staticmethod
+    def _lookup_value(model, name, value):
+        """Returns a 2-tuple `(attname, value)` of the column and Python value
+        that `model.objects.get(name=value)` would look up, or None if `name`
+        isn't a concrete field or `value` can't be converted."""
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        if not field.concrete or field.many_to_many:
+            return None
+        try:
+            if isinstance(value, models.Model):
+                value = value.pk
+            elif value is not None:
+                value = (field.target_field if field.is_relation else field).to_python(value)
+        except (ValidationError, ValueError, TypeError):
+            return None
+        return field.attname, value
+
+    def _count_existing(self, model, kwargs_list):
+        """Returns a list with an element for each dict in `kwargs_list`, being
+        the number of existing instances of `model` that
+        `model.objects.get(**kwargs)` would find, or None if that can't be
+        worked out without calling it. Uses one query for each distinct set of
+        fields in `kwargs_list`."""
+        counts = [None] * len(kwargs_list)
+
+        groups = {}
+        for i, kwargs in enumerate(kwargs_list):
+            lookups = [self._lookup_value(model, name, value) for name, value in kwargs.items()]
+            if not lookups or None in lookups:
+                continue
+            attnames, values = zip(*sorted(lookups, key=lambda lookup: lookup[0]))
+            if len(set(attnames)) < len(attnames):
+                continue
+            groups.setdefault(attnames, []).append((i, values))
+
+        for attnames, entries in groups.items():
+            queryset = model.objects.all()
+            try:
+                for attname, values in zip(attnames, zip(*[values for i, values in entries])):
+                    if None not in values:
+                        queryset = queryset.filter(**{attname + '__in': set(values)})
+                existing = Counter(queryset.values_list(*attnames))
+                for i, values in entries:
+                    counts[i] = existing[values]
+            except TypeError:  # unhashable values, leave these to be checked individually
+                continue
+
+        return counts
+
+    @staticmethod
+    def _saved_foreign_keys(inst):
+        """Returns the names of foreign keys of `inst` set to saved instances,
+        for which the query that validation would make to check that the
+        related instance exists is unnecessary."""
+        return {field.name for field in inst._meta.concrete_fields
+                if field.many_to_one and not field.get_limit_choices_to() and field.is_cached(inst) and
+                getattr(field.get_cached_value(inst), 'pk', None) is not None}
+
+    @staticmethod
+    def _unique_checks(model):
+        """Returns a list of `(model_class, field_names)` for each uniqueness
+        constraint that `Model.validate_unique()` checks for `model`: unique
+        fields, `unique_together` and unconditional `UniqueConstraint`s, on the
+        model and its parents."""
+        checks = []
+        for model_class in [model, *model._meta.get_parent_list()]:
+            opts = model_class._meta
+            checks.extend((model_class, tuple(names)) for names in opts.unique_together)
+            checks.extend((model_class, tuple(constraint.fields)) for constraint in opts.constraints
+                          if isinstance(constraint, models.UniqueConstraint) and constraint.fields and
+                          constraint.condition is None)
+            checks.extend((model_class, (field.name,)) for field in opts.local_fields if field.unique)
+        return checks
+
+    def _validate_unique(self, instances, error_dicts):
+        """Checks that each instance in `instances` doesn't clash with an
+        existing instance, as `Model.validate_unique()` would, but with one
+        query per uniqueness constraint, rather than per instance. (Models here
+        don't use `unique_for_date` and the like, so those aren't checked.)
+        `error_dicts` should be a list of dicts of errors found so far, one for
+        each instance; fields with errors are excluded from checks, and
+        uniqueness errors are added to them."""
+        if not instances:
+            return
+        model = type(instances[0])
+
+        for model_class, unique_check in self._unique_checks(model):
+            fields = [model_class._meta.get_field(name) for name in unique_check]
+            entries = []
+            for i, (inst, error_dict) in enumerate(zip(instances, error_dicts)):
+                if any(name in error_dict for name in unique_check):
+                    continue
+                values = tuple(getattr(inst, field.attname) for field in fields)
+                if None in values:
+                    continue  # validate_unique() doesn't check these either
+                entries.append((i, values))
+            if not entries:
+                continue
+
+            attnames = [field.attname for field in fields]
+            queryset = model_class._default_manager.all()
+            for attname, values in zip(attnames, zip(*[values for i, values in entries])):
+                queryset = queryset.filter(**{attname + '__in': set(values)})
+            existing = set(queryset.values_list(*attnames))
+
+            for i, values in entries:
+                if values in existing:
+                    key = unique_check[0] if len(unique_check) == 1 else NON_FIELD_ERRORS
+                    message = instances[i].unique_error_message(model_class, unique_check)
+                    error_dicts[i].setdefault(key, []).append(message)
+
+    @staticmethod
+    def _can_bulk_create(model):
+        """bulk_create() doesn't call save() and doesn't work with multi-table
+        inheritance, so it's only used for models that don't need either."""
+        return not model._meta.parents and model.save is models.Model.save
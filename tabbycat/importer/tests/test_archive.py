@@ -0,0 +1,84 @@
+"""Unit tests for the XML archive exporter and importer."""
+
+from xml.etree.ElementTree import fromstring, tostring
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from adjallocation.models import DebateAdjudicator
+from adjfeedback.models import AdjudicatorFeedback, AdjudicatorFeedbackQuestion
+from results.models import BallotSubmission, SpeakerScoreByAdj, TeamScore
+from utils.tests import CompletedTournamentTestMixin
+
+from ..archive import Exporter, Importer
+
+
+class TestArchive(CompletedTournamentTestMixin, TestCase):
+
+    ANSWERS = {'bc': True, 'bs': False, 'f': 2.5, 'is': 4, 'ms': ['a', 'b'], 'ss': 'x', 't': 'text', 'tl': 'long text'}
+
+    def setUp(self):
+        super().setUp()
+        # The importer only handles rounds with results
+        self.tournament.round_set.filter(completed=False).delete()
+
+        das = DebateAdjudicator.objects.filter(debate__round__tournament=self.tournament).order_by('id')
+        for i, da in enumerate(das[:6]):
+            feedback = AdjudicatorFeedback.objects.create(adjudicator=da.adjudicator, score=3 + i % 2,
+                source_team=da.debate.debateteam_set.first(), confirmed=True,
+                submitter_type=AdjudicatorFeedback.Submitter.TABROOM)
+            for question in self.tournament.adjudicatorfeedbackquestion_set.all():
+                if question.answer_type in self.ANSWERS:
+                    question.answer_type_class.objects.create(feedback=feedback, question=question,
+                        answer=self.ANSWERS[question.answer_type])
+
+    def canonical(self, element):
+        """Returns a comparable representation of the element without ID
+        references, ignoring the order of children."""
+        attrs = tuple(sorted((key, value) for key, value in element.items()
+                             if key in {'name', 'short', 'style', 'score', 'rank', 'minority', 'ignored', 'reply'}))
+        children = tuple(sorted(self.canonical(child) for child in element))
+        return (element.tag, attrs, (element.text or "").strip(), children)
+
+    def test_stream_matches_tree(self):
+        tree = tostring(Exporter(self.tournament).create_all(), encoding='unicode')
+        stream = "".join(Exporter(self.tournament).stream_all())
+        self.assertEqual(self.canonical(fromstring(stream)), self.canonical(fromstring(tree)))
+
+    def test_export_query_count_independent_of_feedback(self):
+        query_counts = []
+        for _ in range(2):
+            with CaptureQueriesContext(connection) as context:
+                for _ in Exporter(self.tournament).stream_all():
+                    pass
+            query_counts.append(len(context.captured_queries))
+            for da in DebateAdjudicator.objects.filter(debate__round__tournament=self.tournament)[6:20]:
+                AdjudicatorFeedback.objects.create(adjudicator=da.adjudicator, score=3,
+                    source_team=da.debate.debateteam_set.first(), confirmed=True,
+                    submitter_type=AdjudicatorFeedback.Submitter.TABROOM)
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_round_trip(self):
+        archive = tostring(Exporter(self.tournament).create_all(), encoding='unicode')
+        self.tournament.slug = self.tournament.short_name = "original"
+        self.tournament.save()
+
+        importer = Importer(fromstring(archive))
+        importer.import_tournament()
+        imported = importer.tournament
+
+        reexported = tostring(Exporter(imported).create_all(), encoding='unicode')
+        self.assertEqual(self.canonical(fromstring(reexported)), self.canonical(fromstring(archive)))
+
+        for model, lookup in [(BallotSubmission, 'debate__round__tournament'),
+                              (TeamScore, 'ballot_submission__debate__round__tournament'),
+                              (SpeakerScoreByAdj, 'ballot_submission__debate__round__tournament'),
+                              (AdjudicatorFeedback, 'adjudicator__tournament')]:
+            self.assertEqual(model.objects.filter(**{lookup: imported}).count(),
+                             model.objects.filter(**{lookup: self.tournament}).count())
+
+        for question in AdjudicatorFeedbackQuestion.objects.filter(tournament=imported):
+            answers = question.answer_type_class.objects.filter(question=question)
+            self.assertEqual(answers.count(), 6)
+            self.assertEqual(answers.first().answer, self.ANSWERS[question.answer_type])
@@ -0,0 +1,78 @@
+"""Unit tests for the base importer."""
+
+import logging
+from unittest.mock import Mock
+
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+import tournaments.models as tm
+import venues.models as vm
+
+from ..importers import TournamentDataImporterError
+from ..importers.base import BaseTournamentDataImporter, make_interpreter
+
+
+class TestBaseImporter(TestCase):
+
+    def setUp(self):
+        self.tournament = tm.Tournament.objects.create(slug="import-test", name="Import test")
+        self.logger = logging.getLogger(__name__)
+        self.logger.propagate = False  # keep logs contained for tests
+        self.importer = BaseTournamentDataImporter(self.tournament, logger=self.logger)
+
+    def import_venues(self, lines, **kwargs):
+        interpreter = make_interpreter(tournament=self.tournament)
+        return self.importer._import(["name,priority"] + lines, vm.Venue, interpreter, **kwargs)
+
+    def test_query_count_independent_of_lines(self):
+        query_counts = []
+        for n in [5, 50]:
+            lines = ["Room %d-%d,%d" % (n, i, i) for i in range(n)]
+            with CaptureQueriesContext(connection) as context:
+                self.import_venues(lines)
+            query_counts.append(len(context.captured_queries))
+        self.assertEqual(query_counts[0], query_counts[1])
+        self.assertEqual(vm.Venue.objects.count(), 55)
+
+    def test_existing_and_duplicate(self):
+        self.import_venues(["Room A,10", "Room B,20"])
+        with self.assertRaises(TournamentDataImporterError) as raisescm:
+            self.import_venues(["Room C,30", "Room A,10", "Room C,30", "Room B,21"])
+        self.assertEqual([str(e) for e in raisescm.exception.entries], [
+            "line 3, creating room: Venue(name='Room A', priority='10', tournament=<Tournament: Import test>) already exists",
+            "line 4, creating room: Duplicate Venue(name='Room C', priority='30', tournament=<Tournament: Import test>)",
+        ])
+        self.assertFalse(vm.Venue.objects.filter(name="Room C").exists())
+
+        instances = self.import_venues(["Room C,30", "Room A,10", "Room C,30", "Room B,21"], expect_unique=False)
+        self.assertEqual(sorted(instances.keys()), [2, 5])
+        self.assertEqual(vm.Venue.objects.count(), 4)
+
+    def test_unique_error_matches_full_clean(self):
+        tm.Round.objects.create(tournament=self.tournament, seq=1, abbreviation="R1", name="Round 1")
+        expected = tm.Round(tournament=self.tournament, seq=1, abbreviation="X", name="X")
+        with self.assertRaises(Exception) as cm:
+            expected.full_clean()
+
+        interpreter = make_interpreter(tournament=self.tournament)
+        with self.assertRaises(TournamentDataImporterError) as raisescm:
+            self.importer._import(["seq,abbreviation,name,draw_type", "1,X,X,R", "2,R2,Round 2,R"], tm.Round, interpreter)
+        self.assertEqual(len(raisescm.exception), 1)
+        entry = raisescm.exception.entries[0]
+        self.assertEqual(entry.lineno, 2)
+        self.assertEqual(entry.message, "; ".join(cm.exception.message_dict[entry.field]))
+
+    def test_save_signals_sent(self):
+        receiver = Mock()
+        post_save.connect(receiver, sender=vm.Venue)
+        self.addCleanup(post_save.disconnect, receiver, sender=vm.Venue)
+        instances = self.import_venues(["Room A,10", "Room B,20"])
+
+        self.assertEqual(receiver.call_count, 2)
+        for inst, call in zip(instances.values(), receiver.call_args_list):
+            self.assertIs(call.kwargs['instance'], inst)
+            self.assertIsNotNone(inst.pk)
+            self.assertTrue(call.kwargs['created'])
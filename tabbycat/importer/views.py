@@ -1,11 +1,10 @@
 import logging
-from xml.etree import ElementTree
 
 from defusedxml.ElementTree import fromstring
 from django.contrib import messages
 from django.core import management
 from django.forms import modelformset_factory
-from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseRedirect
+from django.http import HttpResponseBadRequest, HttpResponseRedirect, StreamingHttpResponse
 from django.shortcuts import redirect
 from django.urls import reverse_lazy
 from django.utils.safestring import mark_safe
@@ -276,10 +275,7 @@ class ExportArchiveIndexView(AdministratorMixin, TournamentMixin, TemplateView):
 class ExportArchiveAllView(AdministratorMixin, TournamentMixin, View):
 
     def get(self, request, *args, **kwargs):
-        response = HttpResponse(self.get_xml(), content_type='text/xml; charset=utf-8')
+        response = StreamingHttpResponse(Exporter(self.tournament).stream_all(), content_type='text/xml; charset=utf-8')
         response['Content-Disposition'] = 'attachment; filename="' + self.tournament.short_name + '.xml"'
 
         return response
-
-    def get_xml(self):
-        return ElementTree.tostring(Exporter(self.tournament).create_all())
@@ -0,0 +1,17 @@
+from django.contrib import admin
+
+from utils.admin import ModelAdmin
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(ModelAdmin):
+    list_display = ('type', 'tournament', 'round', 'user', 'status', 'stage', 'created', 'finished')
+    list_filter = ('tournament', 'status', 'type')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('tournament', 'round__tournament', 'user')
+
+    def has_add_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,163 @@
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from threading import Lock
+
+from asgiref.sync import async_to_sync
+from channels.consumer import get_handler_name, SyncConsumer
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from .models import Job
+from .utils import JobCancelled
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(max_workers=settings.JOB_WORKER_THREADS, thread_name_prefix="job")
+
+# Jobs waiting for an earlier job for the same round to finish, keyed by round
+# ID. A round has an entry (possibly an empty queue) while one of its jobs is
+# running or waiting for a thread.
+round_queues = {}
+round_queues_lock = Lock()
+
+# First key of the PostgreSQL advisory locks taken while saving; the second is
+# the round ID
+SAVE_LOCK_NAMESPACE = 0x6a6f62  # "job"
+
+
+class JobWorkerConsumer(SyncConsumer):
+    """Base class for worker consumers whose handlers run jobs.
+
+    Messages carrying a job ID are run on a pool of threads, rather than on the
+    worker's single synchronous thread, so that a slow job doesn't hold up other
+    jobs or other channels on the same worker. Jobs for different rounds run
+    concurrently; jobs for the same round are submitted to the pool one at a
+    time, so that waiting jobs don't occupy threads.
+
+    Handlers receive the `Job` as `event['job']`, and should call
+    `report_progress()` between stages, then write their changes inside
+    `saving()`, so that a cancelled or failed job leaves no partial changes.
+    Progress, and the final outcome, are sent to the job's group as messages of
+    type `group_message_type`."""
+
+    group_message_type = None
+
+    async def dispatch(self, message):
+        if 'job_id' not in message.get('extra', {}):
+            return await super().dispatch(message)
+        handler = getattr(self, get_handler_name(message), None)
+        if handler is None:
+            raise ValueError("No handler for message type %s" % message["type"])
+        self.submit_job(handler, message)
+
+    def submit_job(self, handler, event):
+        """Submits the job to the pool, or if a job for the same round is
+        already running, queues it to be submitted when that job finishes."""
+        round_id = event['extra'].get('round_id')
+        if round_id is not None:
+            with round_queues_lock:
+                if round_id in round_queues:
+                    round_queues[round_id].append((self, handler, event))
+                    return
+                round_queues[round_id] = deque()
+        executor.submit(self.run_job, handler, event)
+
+    def run_job(self, handler, event):
+        close_old_connections()
+        try:
+            self._run_job(handler, event)
+        finally:
+            close_old_connections()
+            self._submit_next_job(event['extra'].get('round_id'))
+
+    @staticmethod
+    def _submit_next_job(round_id):
+        if round_id is None:
+            return
+        with round_queues_lock:
+            queue = round_queues[round_id]
+            if not queue:
+                del round_queues[round_id]
+                return
+            consumer, handler, event = queue.popleft()
+        executor.submit(consumer.run_job, handler, event)
+
+    def _run_job(self, handler, event):
+        job_id = event['extra']['job_id']
+
+        # Claim the job, unless it was cancelled while it was queued
+        if not Job.objects.filter(id=job_id, status=Job.Status.QUEUED).update(
+                status=Job.Status.RUNNING, started=timezone.now()):
+            logger.info("Skipping job %d, which is no longer queued", job_id)
+            return
+        job = event['job'] = Job.objects.get(id=job_id)
+        self.send_to_group(event, {})
+
+        try:
+            handler(event)
+        except JobCancelled:
+            logger.info("Job %d was cancelled", job_id)
+            job.status = Job.Status.CANCELLED
+            job.message = _("The action was cancelled.")
+            self.send_to_group(event, {'message': {'text': job.message, 'type': 'warning'}})
+        except Exception:
+            logger.exception("Error running job %d (%s)", job_id, job.type)
+            job.status = Job.Status.FAILED
+            job.message = _("There was an unexpected error. The action was not completed.")
+            self.send_to_group(event, {'message': {'text': job.message, 'type': 'danger'}})
+        else:
+            if job.status == Job.Status.RUNNING:  # handler didn't report an outcome
+                job.status = Job.Status.DONE
+
+        job.finished = timezone.now()
+        job.save(update_fields=['status', 'stage', 'message', 'finished'])
+
+    def report_progress(self, event, stage):
+        """Reports that the job has reached `stage`, raising `JobCancelled` if
+        it has been cancelled. This does nothing if the event isn't a job."""
+        job = event.get('job')
+        if job is None:
+            return
+        if Job.objects.filter(id=job.id, status=Job.Status.CANCELLED).exists():
+            raise JobCancelled
+        if stage != job.stage:
+            job.stage = stage
+            self.send_to_group(event, {})
+
+    @contextmanager
+    def saving(self, event):
+        """Reports that the job has reached the saving stage, then runs the
+        block in a transaction. Jobs for the same round in other workers save
+        one at a time, each under an advisory lock on the round. Earlier stages
+        run outside any transaction, so they don't hold up other writes."""
+        self.report_progress(event, Job.Stage.SAVING)
+        with transaction.atomic():
+            round_id = event['extra'].get('round_id')
+            if round_id is not None:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT pg_advisory_xact_lock(%s, %s)", [SAVE_LOCK_NAMESPACE, round_id])
+            yield
+
+    def finish_job(self, event, status, message):
+        """Records the outcome of the job, if the event is a job."""
+        job = event.get('job')
+        if job is not None:
+            job.status = status
+            job.message = message
+
+    def send_to_group(self, event, content):
+        """Sends `content` to the event's group, with the job's status if the
+        event is a job."""
+        if 'job' in event:
+            content['job'] = event['job'].serialize()
+        async_to_sync(get_channel_layer().group_send)(
+            event['extra']['group_name'], {
+                'type': self.group_message_type,
+                'content': content,
+            },
+        )
@@ -0,0 +1,41 @@
+# Generated by Django 4.1.7 on 2026-10-17 10:08
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tournaments', '0010_alter_round_draw_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(max_length=50, verbose_name='type')),
+                ('group_name', models.CharField(blank=True, max_length=100, verbose_name='group name')),
+                ('settings', models.JSONField(blank=True, default=dict, verbose_name='settings')),
+                ('status', models.CharField(choices=[('Q', 'Queued'), ('R', 'Running'), ('D', 'Done'), ('F', 'Failed'), ('C', 'Cancelled')], default='Q', max_length=1, verbose_name='status')),
+                ('stage', models.CharField(blank=True, choices=[('costing', 'Calculating costs'), ('solving', 'Solving'), ('saving', 'Saving')], max_length=10, verbose_name='stage')),
+                ('message', models.TextField(blank=True, verbose_name='message')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='created')),
+                ('started', models.DateTimeField(blank=True, null=True, verbose_name='started')),
+                ('finished', models.DateTimeField(blank=True, null=True, verbose_name='finished')),
+                ('round', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='tournaments.round', verbose_name='round')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tournaments.tournament', verbose_name='tournament')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='user')),
+            ],
+            options={
+                'verbose_name': 'job',
+                'verbose_name_plural': 'jobs',
+                'ordering': ['-created'],
+            },
+        ),
+    ]
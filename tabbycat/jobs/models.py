@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class Job(models.Model):
+    """A long-running action, like an auto-allocation, that is run by a worker
+    rather than in the web process. Jobs are created by `enqueue_job()` and run
+    by `JobWorkerConsumer`, which streams progress to `group_name`."""
+
+    class Status(models.TextChoices):
+        QUEUED = 'Q', _("Queued")
+        RUNNING = 'R', _("Running")
+        DONE = 'D', _("Done")
+        FAILED = 'F', _("Failed")
+        CANCELLED = 'C', _("Cancelled")
+
+    class Stage(models.TextChoices):
+        COSTING = 'costing', _("Calculating costs")
+        SOLVING = 'solving', _("Solving")
+        SAVING = 'saving', _("Saving")
+
+    type = models.CharField(max_length=50,
+        verbose_name=_("type"))
+    tournament = models.ForeignKey('tournaments.Tournament', models.CASCADE,
+        verbose_name=_("tournament"))
+    round = models.ForeignKey('tournaments.Round', models.CASCADE, blank=True, null=True,
+        verbose_name=_("round"))
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, models.SET_NULL, blank=True, null=True,
+        verbose_name=_("user"))
+    group_name = models.CharField(max_length=100, blank=True,
+        verbose_name=_("group name"))
+    settings = models.JSONField(default=dict, blank=True,
+        verbose_name=_("settings"))
+
+    status = models.CharField(max_length=1, choices=Status.choices, default=Status.QUEUED,
+        verbose_name=_("status"))
+    stage = models.CharField(max_length=10, choices=Stage.choices, blank=True,
+        verbose_name=_("stage"))
+    message = models.TextField(blank=True,
+        verbose_name=_("message"))
+
+    created = models.DateTimeField(auto_now_add=True,
+        verbose_name=_("created"))
+    started = models.DateTimeField(blank=True, null=True,
+        verbose_name=_("started"))
+    finished = models.DateTimeField(blank=True, null=True,
+        verbose_name=_("finished"))
+
+    class Meta:
+        ordering = ['-created']
+        verbose_name = _("job")
+        verbose_name_plural = _("jobs")
+
+    def __str__(self):
+        return "%s [%s]" % (self.type, self.get_status_display())
+
+    def serialize(self):
+        return {
+            'id': self.id,
+            'type': self.type,
+            'status': self.status,
+            'stage': self.stage,
+            'stage_display': self.get_stage_display() if self.stage else self.get_status_display(),
+        }
@@ -0,0 +1,167 @@
+from unittest.mock import AsyncMock, Mock, patch
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from adjallocation.consumers import AdjudicatorAllocationWorkerConsumer
+from adjallocation.models import DebateAdjudicator
+from availability.utils import activate_all
+from jobs.consumers import round_queues
+from jobs.models import Job
+from jobs.utils import cancel_job, enqueue_job
+from utils.tests import CompletedTournamentTestMixin
+
+
+class TestJobs(CompletedTournamentTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.round = self.tournament.round_set.get(seq=4)
+        self.round.draw_status = self.round.Status.CONFIRMED
+        self.round.save()
+        activate_all(self.round)
+        DebateAdjudicator.objects.filter(debate__round=self.round).delete()
+        self.user = get_user_model().objects.create_user(username="allocator", is_superuser=True)
+
+        self.group_send = AsyncMock()
+        patcher = patch('jobs.consumers.get_channel_layer', return_value=Mock(group_send=self.group_send))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_job(self, **kwargs):
+        job = Job.objects.create(type='allocate_debate_adjs', tournament=self.tournament, round=self.round,
+            user=self.user, group_name="debates_1", settings={'usePreformedPanels': False, 'allocationMethod': 'hungarian'},
+            **kwargs)
+        event = {'type': job.type, 'extra': {'job_id': job.id, 'user_id': self.user.id, 'round_id': self.round.id,
+                 'tournament_id': self.tournament.id, 'settings': job.settings, 'group_name': job.group_name}}
+        return job, event
+
+    def sent_contents(self):
+        return [call.args[1]['content'] for call in self.group_send.call_args_list]
+
+    def test_enqueue_job(self):
+        send = AsyncMock()
+        with patch('jobs.utils.get_channel_layer', return_value=Mock(send=send)):
+            job = enqueue_job('adjallocation', 'allocate_debate_adjs', self.tournament, round=self.round,
+                group_name="debates_1", settings={'usePreformedPanels': False})
+        self.assertEqual(job.status, Job.Status.QUEUED)
+        channel, message = send.call_args.args
+        self.assertEqual(channel, 'adjallocation')
+        self.assertEqual(message['type'], 'allocate_debate_adjs')
+        self.assertEqual(message['extra']['job_id'], job.id)
+        self.assertEqual(message['extra']['round_id'], self.round.id)
+
+    def test_dispatch_runs_job_in_pool(self):
+        consumer = AdjudicatorAllocationWorkerConsumer()
+        job, event = self.create_job()
+        with patch('jobs.consumers.executor') as executor:
+            async_to_sync(consumer.dispatch)(event)
+        self.addCleanup(round_queues.clear)
+        executor.submit.assert_called_once_with(consumer.run_job, consumer.allocate_debate_adjs, event)
+
+    def test_same_round_jobs_wait_outside_pool(self):
+        consumer = AdjudicatorAllocationWorkerConsumer()
+        job1, event1 = self.create_job()
+        job2, event2 = self.create_job()
+        self.addCleanup(round_queues.clear)
+
+        with patch('jobs.consumers.executor') as executor, \
+                patch('jobs.consumers.close_old_connections'), \
+                patch.object(consumer, '_run_job') as run_job:
+            async_to_sync(consumer.dispatch)(event1)
+            async_to_sync(consumer.dispatch)(event2)
+            executor.submit.assert_called_once_with(consumer.run_job, consumer.allocate_debate_adjs, event1)
+
+            # the second job is submitted only when the first finishes
+            executor.submit.reset_mock()
+            consumer.run_job(consumer.allocate_debate_adjs, event1)
+            run_job.assert_called_once_with(consumer.allocate_debate_adjs, event1)
+            executor.submit.assert_called_once_with(consumer.run_job, consumer.allocate_debate_adjs, event2)
+
+            executor.submit.reset_mock()
+            consumer.run_job(consumer.allocate_debate_adjs, event2)
+            executor.submit.assert_not_called()
+        self.assertNotIn(self.round.id, round_queues)
+
+    def test_run_job(self):
+        consumer = AdjudicatorAllocationWorkerConsumer()
+        job, event = self.create_job()
+        consumer._run_job(consumer.allocate_debate_adjs, event)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.DONE)
+        self.assertIsNotNone(job.finished)
+        self.assertTrue(DebateAdjudicator.objects.filter(debate__round=self.round).exists())
+
+        contents = self.sent_contents()
+        stages = [content['job']['stage'] for content in contents]
+        self.assertEqual(stages[:2], ['', 'costing'])
+        self.assertIn('solving', stages)
+        self.assertEqual(stages[-1], 'saving')
+        self.assertIn('debatesOrPanels', contents[-1])
+        self.assertEqual(contents[-1]['job']['status'], Job.Status.DONE)
+
+    def test_preformed_panel_jobs_save_once(self):
+        consumer = AdjudicatorAllocationWorkerConsumer()
+        for handler, settings in [(consumer.create_preformed_panels, {}),
+                                  (consumer.create_preformed_panels, {}),
+                                  (consumer.prioritise_panels, {'type': 'bracket'})]:
+            job, event = self.create_job()
+            event['extra']['settings'] = settings
+            with patch.object(consumer, 'saving', wraps=consumer.saving) as saving:
+                consumer._run_job(handler, event)
+            job.refresh_from_db()
+            self.assertEqual(job.status, Job.Status.DONE)
+            saving.assert_called_once_with(event)
+
+        panels = self.round.preformedpanel_set.all()
+        self.assertEqual(panels.count(), self.round.debate_set.count())
+        self.assertIn(1, panels.values_list('importance', flat=True))
+
+    def test_user_error(self):
+        self.round.draw_status = self.round.Status.DRAFT
+        self.round.save()
+        consumer = AdjudicatorAllocationWorkerConsumer()
+        job, event = self.create_job()
+        consumer._run_job(consumer.allocate_debate_adjs, event)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertEqual(self.sent_contents()[-1]['message']['type'], 'danger')
+
+    def test_unexpected_error(self):
+        consumer = AdjudicatorAllocationWorkerConsumer()
+        job, event = self.create_job()
+        with self.assertLogs('jobs.consumers', 'ERROR'):
+            consumer._run_job(Mock(side_effect=ValueError), event)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertEqual(self.sent_contents()[-1]['message']['type'], 'danger')
+
+    def test_cancelled_while_queued(self):
+        consumer = AdjudicatorAllocationWorkerConsumer()
+        job, event = self.create_job()
+        self.assertEqual(cancel_job(job.id, self.tournament), job)
+        handler = Mock()
+        consumer._run_job(handler, event)
+        handler.assert_not_called()
+        self.group_send.assert_not_called()
+
+    def test_cancelled_while_running(self):
+        consumer = AdjudicatorAllocationWorkerConsumer()
+        job, event = self.create_job()
+
+        send_to_group = consumer.send_to_group
+
+        def cancel_when_costing(event, content):
+            send_to_group(event, content)
+            if event['job'].stage == 'costing':
+                self.assertIsNone(cancel_job(job.id, self.tournament))
+        consumer.send_to_group = cancel_when_costing
+
+        consumer._run_job(consumer.allocate_debate_adjs, event)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.CANCELLED)
+        self.assertFalse(DebateAdjudicator.objects.filter(debate__round=self.round).exists())
+        self.assertEqual(self.sent_contents()[-1]['message']['type'], 'warning')
@@ -0,0 +1,42 @@
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.utils import timezone
+
+from .models import Job
+
+
+class JobCancelled(Exception):
+    """Raised in a running job when it reaches a checkpoint after having been
+    cancelled."""
+    pass
+
+
+def enqueue_job(channel, type, tournament, round=None, user=None, group_name="", settings=None):
+    """Creates a job record and sends it to the worker listening on `channel`,
+    where it will be run by the handler called `type`. The message's `extra`
+    dict has the same keys that worker handlers have always received."""
+    job = Job.objects.create(type=type, tournament=tournament, round=round, user=user,
+        group_name=group_name, settings=settings or {})
+    async_to_sync(get_channel_layer().send)(channel, {
+        'type': type,
+        'extra': {
+            'job_id': job.id,
+            'user_id': user.id if user else None,
+            'round_id': round.id if round else None,
+            'tournament_id': tournament.id,
+            'settings': job.settings,
+            'group_name': group_name,
+        },
+    })
+    return job
+
+
+def cancel_job(job_id, tournament):
+    """Cancels the job, if it hasn't finished. Returns the job if it was still
+    queued, in which case it will never run; if it was already running, it
+    stops at its next checkpoint and reports the cancellation itself."""
+    jobs = Job.objects.filter(id=job_id, tournament=tournament)
+    if jobs.filter(status=Job.Status.QUEUED).update(status=Job.Status.CANCELLED, finished=timezone.now()):
+        return jobs.get()
+    jobs.filter(status=Job.Status.RUNNING).update(status=Job.Status.CANCELLED)
+    return None
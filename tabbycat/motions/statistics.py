@@ -1,17 +1,150 @@
+"""Motion statistics, for the admin and public motion statistics pages and the
+API.
+
+The counts behind the statistics (ballots, results and vetoes for each motion
+in each round) come from `MotionCounts`, which is built with a single query for
+the whole tournament. Since they don't change until ballots do,
+`get_motion_counts()` keeps them in the cache, along with a stamp summarising
+the confirmed ballots they were built from. The calculators then just fetch the
+motions, and attach the relevant counts to them.
+"""
+
 import itertools
+import logging
 
-from django.db.models import Avg, CharField, Count, F, Q, Value
+from django.core.cache import cache
+from django.db.models import BooleanField, CharField, Count, F, Max, PositiveSmallIntegerField, Sum, Value
 from django.utils.translation import gettext as _
 from django.utils.translation import gettext_lazy
 
-from motions.models import Motion, RoundMotion
+from motions.models import DebateTeamMotionPreference, Motion, RoundMotion
+from results.models import BallotSubmission, TeamScore
 from tournaments.models import Round
 
+logger = logging.getLogger(__name__)
+
+
+class MotionCounts:
+    """Counts from the confirmed ballots of a tournament, for each motion in
+    each round.
+
+    - `ballots` maps `(motion_id, round_id)` to the number of confirmed ballots
+       with the motion in the round.
+    - `results` maps `(motion_id, round_id, side)` to a dict mapping each
+       `(points, win)` to the number of teams on that side with those points
+       and that result.
+    - `vetoes` maps `(motion_id, round_id, side)` to the number of teams on
+       that side that vetoed the motion.
 
-def _annotate_annotations(dict_motions, queryset, fields):
-    for item in queryset:
-        for field in fields:
-            setattr(dict_motions[item.pk], field, getattr(item, field))
+    Each also has the totals across all rounds, with a `round_id` of None.
+    """
+
+    BALLOTS = 'b'
+    RESULTS = 'r'
+    VETOES = 'v'
+
+    def __init__(self, tournament):
+        self.ballots = {}
+        self.results = {}
+        self.vetoes = {}
+
+        # All columns are annotations, so that they're in the same order in
+        # all three parts of the union
+        columns = ('stat_kind', 'stat_motion', 'stat_round', 'stat_side', 'stat_points', 'stat_win')
+        no_side = Value(None, output_field=CharField())
+        no_points = Value(None, output_field=PositiveSmallIntegerField())
+        no_win = Value(None, output_field=BooleanField())
+
+        results = TeamScore.objects.filter(
+            ballot_submission__confirmed=True,
+            debate_team__debate__round__tournament=tournament,
+        ).annotate(
+            stat_kind=Value(self.RESULTS),
+            stat_motion=F('ballot_submission__motion_id'),
+            stat_round=F('debate_team__debate__round_id'),
+            stat_side=F('debate_team__side'),
+            stat_points=F('points'),
+            stat_win=F('win'),
+        ).values_list(*columns).annotate(count=Count('id'))
+
+        ballots = BallotSubmission.objects.filter(
+            confirmed=True,
+            debate__round__tournament=tournament,
+        ).annotate(
+            stat_kind=Value(self.BALLOTS),
+            stat_motion=F('motion_id'),
+            stat_round=F('debate__round_id'),
+            stat_side=no_side,
+            stat_points=no_points,
+            stat_win=no_win,
+        ).values_list(*columns).annotate(count=Count('id'))
+
+        vetoes = DebateTeamMotionPreference.objects.filter(
+            preference=3,
+            ballot_submission__confirmed=True,
+            debate_team__debate__round__tournament=tournament,
+        ).annotate(
+            stat_kind=Value(self.VETOES),
+            stat_motion=F('motion_id'),
+            stat_round=F('debate_team__debate__round_id'),
+            stat_side=F('debate_team__side'),
+            stat_points=no_points,
+            stat_win=no_win,
+        ).values_list(*columns).annotate(count=Count('id'))
+
+        for kind, motion_id, round_id, side, points, win, count in results.union(ballots, vetoes, all=True):
+            for key_round_id in (round_id, None):
+                if kind == self.BALLOTS:
+                    self._add(self.ballots, (motion_id, key_round_id), count)
+                elif kind == self.VETOES:
+                    self._add(self.vetoes, (motion_id, key_round_id, side), count)
+                else:
+                    self._add(self.results.setdefault((motion_id, key_round_id, side), {}), (points, win), count)
+
+    @staticmethod
+    def _add(totals, key, value):
+        totals[key] = totals.get(key, 0) + value
+
+    def teams(self, motion_id, round_id, side, points=None, win=None):
+        """Returns the number of teams on `side` in confirmed ballots with the
+        motion, counting only those with `points` points and with the given
+        `win` result, if they're not None."""
+        results = self.results.get((motion_id, round_id, side), {})
+        return sum(count for (p, w), count in results.items()
+                   if (points is None or p == points) and (win is None or w == win))
+
+    def average_points(self, motion_id, round_id, side):
+        """Returns the average points of teams on `side` in confirmed ballots
+        with the motion, or None if there are none with points."""
+        results = self.results.get((motion_id, round_id, side), {})
+        total = sum(points * count for (points, win), count in results.items() if points is not None)
+        nteams = sum(count for (points, win), count in results.items() if points is not None)
+        return total / nteams if nteams > 0 else None
+
+
+def _get_stamp(tournament):
+    """Returns a value that changes whenever a ballot is confirmed or
+    unconfirmed in `tournament`."""
+    return BallotSubmission.objects.filter(
+        debate__round__tournament=tournament, confirmed=True,
+    ).aggregate(last_timestamp=Max('timestamp'), last_confirmed=Max('confirm_timestamp'),
+                count=Count('id'), ids=Sum('id'))
+
+
+def get_motion_counts(tournament):
+    """Returns the `MotionCounts` for the tournament, from the cache if no
+    ballots have been confirmed or unconfirmed since it was built."""
+    key = "%s_motion_counts" % tournament.slug
+    stamp = _get_stamp(tournament)
+    cached = cache.get(key)
+    if cached is not None and cached[0] == stamp:
+        logger.debug("Using cached motion counts %s", key)
+        return cached[1]
+
+    logger.debug("Building motion counts %s", key)
+    counts = MotionCounts(tournament)
+    cache.set(key, (stamp, counts))
+    return counts
 
 
 class MotionTwoTeamStatsCalculator:
@@ -20,6 +153,7 @@ class MotionTwoTeamStatsCalculator:
         self.tournament = tournament
         self.by_motion = tournament.pref('enable_motions')
         self.include_vetoes = tournament.pref('motion_vetoes_enabled')
+        self.counts = get_motion_counts(tournament)
 
         self._prefetch_motions()
 
@@ -41,34 +175,18 @@ class MotionTwoTeamStatsCalculator:
         ).order_by('text')
 
         self.dict_motions = {m.id: m for m in motions}
-
-        # This if-else block could be simplified using **kwargs notation, but it'd be miserable to read
-        motions = Motion.objects.filter(
-            pk__in=self.dict_motions.keys(),
-        ).annotate(nrounds=Count('rounds'), ndebates=Count('ballotsubmission', filter=Q(ballotsubmission__confirmed=True)))
-        _annotate_annotations(self.dict_motions, motions, ('nrounds', 'ndebates'))
-
-        motions = Motion.objects.filter(
-            pk__in=self.dict_motions.keys(),
-        ).annotate(**{'%s_wins' % side: Count(
-            'ballotsubmission__teamscore',
-            filter=Q(
-                ballotsubmission__confirmed=True,
-                ballotsubmission__teamscore__debate_team__side=side,
-                ballotsubmission__teamscore__win=True,
-            )) for side in self.tournament.sides},
-        )
-        _annotate_annotations(self.dict_motions, motions, ['%s_wins' % side for side in self.tournament.sides])
-
-        if self.include_vetoes:
-            motions = Motion.objects.filter(pk__in=self.dict_motions.keys()).annotate(**{'%s_vetoes' % side: Count(
-                'debateteammotionpreference',
-                filter=Q(
-                    debateteammotionpreference__debate_team__side=side,
-                    debateteammotionpreference__preference=3,
-                    debateteammotionpreference__ballot_submission__confirmed=True,
-                )) for side in self.tournament.sides})
-            _annotate_annotations(self.dict_motions, motions, ['%s_vetoes' % side for side in self.tournament.sides])
+        for motion in self.dict_motions.values():
+            motion.nrounds = len(motion.rounds.all())
+            self._annotate_counts(motion, motion.id, None)
+
+    def _annotate_counts(self, obj, motion_id, round_id):
+        """Annotates `obj` (a Motion or RoundMotion) with the counts for the
+        motion in the round, or in all rounds if `round_id` is None."""
+        obj.ndebates = self.counts.ballots.get((motion_id, round_id), 0)
+        for side in self.tournament.sides:
+            setattr(obj, '%s_wins' % side, self.counts.teams(motion_id, round_id, side, win=True))
+            if self.include_vetoes:
+                setattr(obj, '%s_vetoes' % side, self.counts.vetoes.get((motion_id, round_id, side), 0))
 
     def _annotate_percentages(self, motion):
         if motion.tdebates == 0:  # Avoid division by 0
@@ -138,48 +256,21 @@ class RoundMotionTwoTeamStatsCalculator(MotionTwoTeamStatsCalculator):
     def _prefetch_motions(self):
         motions = RoundMotion.objects.filter(
             round__tournament=self.tournament,
-            motion__ballotsubmission__confirmed=True,
         ).annotate(
-            nrounds=Count('round'),
-            ndebates=Count('motion__ballotsubmission', filter=Q(
-                motion__ballotsubmission__debate__round=F('round'),
-                motion__ballotsubmission__confirmed=True),
-            ),
-        ).prefetch_related('round', 'motion').order_by('round__seq', 'seq')
-        self.dict_motions = {m.id: m for m in motions}
+            tdebates=Count('round__debate'),
+        ).select_related('round', 'motion').order_by('round__seq', 'seq')
 
-        motions = RoundMotion.objects.filter(pk__in=self.dict_motions.keys()).annotate(tdebates=Count('round__debate'))
-        _annotate_annotations(self.dict_motions, motions, ('tdebates',))
-
-        motions = RoundMotion.objects.filter(
-            pk__in=self.dict_motions.keys(),
-        ).annotate(**{'%s_wins' % side: Count(
-            'motion__ballotsubmission__teamscore',
-            filter=Q(
-                motion__ballotsubmission__confirmed=True,
-                motion__ballotsubmission__teamscore__debate_team__side=side,
-                motion__ballotsubmission__teamscore__win=True,
-                motion__ballotsubmission__debate__round=F('round'),
-            )) for side in self.tournament.sides})
-        _annotate_annotations(self.dict_motions, motions, ['%s_wins' % side for side in self.tournament.sides])
-
-        if self.include_vetoes:
-            motions = RoundMotion.objects.filter(
-                pk__in=self.dict_motions.keys(),
-            ).annotate(**{'%s_vetoes' % side: Count(
-                'motion__debateteammotionpreference',
-                filter=Q(
-                    motion__debateteammotionpreference__debate_team__side=side,
-                    motion__debateteammotionpreference__preference=3,
-                    motion__debateteammotionpreference__ballot_submission__confirmed=True,
-                )) for side in self.tournament.sides})
-            _annotate_annotations(self.dict_motions, motions, ['%s_vetoes' % side for side in self.tournament.sides])
+        # Only motions that have been used in a confirmed ballot
+        self.dict_motions = {m.id: m for m in motions if self.counts.ballots.get((m.motion_id, None))}
+        for motion in self.dict_motions.values():
+            self._annotate_counts(motion, motion.motion_id, motion.round_id)
 
 
 class MotionBPStatsCalculator:
 
     def __init__(self, tournament):
         self.tournament = tournament
+        self.counts = get_motion_counts(tournament)
 
         self._prefetch_prelim_motions()
         self._collate_prelim_motion_annotations()
@@ -187,41 +278,31 @@ class MotionBPStatsCalculator:
         self._collate_elim_motion_annotations()
         self.motions = itertools.chain(self.prelim_motions_dict.values(), self.elim_motions_dict.values())
 
-    def _prefetch_prelim_motions(self):
-        """Constructs the database query for preliminary round motions.
+    def _get_motions(self, stage):
+        """Returns the motions used in rounds of the given stage, that have
+        been used in a confirmed ballot."""
+        motions = Motion.objects.filter(rounds__tournament=self.tournament, rounds__stage=stage).distinct()
+        return [m for m in motions if self.counts.ballots.get((m.id, None))]
 
-        The annotations are (1) the average team points by teams in each
-        position, and (2) the number of teams receiving n points from each
-        position for each n = 0, 1, 2, 3.
+    def _prefetch_prelim_motions(self):
+        """Fetches preliminary round motions and annotates them with (1) the
+        average team points by teams in each position, and (2) the number of
+        teams receiving n points from each position for each n = 0, 1, 2, 3.
 
         Assumes that motion selection is disabled, so there's only one motion
         per round. We'll implement motion selection if and when we discover that
         it's used by someone with BP."""
+        self.prelim_motions_dict = {m.id: m for m in self._get_motions(Round.Stage.PRELIMINARY)}
+        for motion in self.prelim_motions_dict.values():
+            motion.stage = 'prelim'
+            self._annotate_prelim_counts(motion, motion.id, None)
 
-        self.prelim_motions = Motion.objects.filter(
-            rounds__tournament=self.tournament,
-            rounds__stage=Round.Stage.PRELIMINARY,
-            ballotsubmission__confirmed=True,
-        ).annotate(ndebates=Count('ballotsubmission', filter=Q(ballotsubmission__confirmed=True)),
-            stage=Value('prelim', output_field=CharField()))
-        self.prelim_motions_dict = {m.id: m for m in self.prelim_motions.all()}
-
-        annotations = {}  # dict of keyword arguments to pass to .annotate()
-        annotations.update({'%s_average' % side: Avg(
-            'ballotsubmission__teamscore__points',
-            filter=Q(ballotsubmission__teamscore__debate_team__side=side, ballotsubmission__confirmed=True),
-        ) for side in self.tournament.sides})
-
-        annotations.update({'%s_%d_count' % (side, points): Count(
-            'ballotsubmission__teamscore',
-            filter=Q(
-                ballotsubmission__confirmed=True,
-                ballotsubmission__teamscore__debate_team__side=side,
-                ballotsubmission__teamscore__points=points,
-            )) for side in self.tournament.sides for points in range(4)})
-
-        motions = Motion.objects.filter(pk__in=self.prelim_motions_dict.keys()).annotate(**annotations)
-        _annotate_annotations(self.prelim_motions_dict, motions, annotations.keys())
+    def _annotate_prelim_counts(self, obj, motion_id, round_id):
+        obj.ndebates = self.counts.ballots.get((motion_id, round_id), 0)
+        for side in self.tournament.sides:
+            setattr(obj, '%s_average' % side, self.counts.average_points(motion_id, round_id, side))
+            for points in range(4):
+                setattr(obj, '%s_%d_count' % (side, points), self.counts.teams(motion_id, round_id, side, points=points))
 
     def _collate_prelim_motion_annotations(self):
         """Collect annotations (which will be attributes) and convert them to
@@ -256,7 +337,7 @@ class MotionBPStatsCalculator:
                     motion.counts_by_bench['opp'] += (average / 2)
 
     def _prefetch_elim_motions(self):
-        """Constructs the database query for elimination round motions.
+        """Fetches elimination round motions and annotates them with counts.
 
         Elimination rounds in BP are advancing/eliminated, so this just collates
         information on who advanced and who did not.
@@ -264,26 +345,16 @@ class MotionBPStatsCalculator:
         Assumes that motion selection is disabled, so there's only one motion
         per round. We'll implement motion selection if and when we discover that
         it's used by someone with BP."""
+        self.elim_motions_dict = {m.id: m for m in self._get_motions(Round.Stage.ELIMINATION)}
+        for motion in self.elim_motions_dict.values():
+            motion.stage = 'elim'
+            self._annotate_elim_counts(motion, motion.id, None)
 
-        self.elim_motions = Motion.objects.filter(
-            rounds__tournament=self.tournament,
-            rounds__stage=Round.Stage.ELIMINATION,
-            ballotsubmission__confirmed=True,
-        ).annotate(ndebates=Count('ballotsubmission', filter=Q(ballotsubmission__confirmed=True)),
-            stage=Value('elim', output_field=CharField()))
-        self.elim_motions_dict = {m.id: m for m in self.elim_motions.all()}
-
-        annotations = {}  # dict of keyword arguments to pass to .annotate()
-        annotations.update({'%s_%s' % (side, status): Count(
-            'ballotsubmission__teamscore',
-            filter=Q(
-                ballotsubmission__confirmed=True,
-                ballotsubmission__teamscore__debate_team__side=side,
-                ballotsubmission__teamscore__win=value,
-            )) for side in self.tournament.sides for (status, value) in [("advancing", True), ("eliminated", False)]
-        })
-        motions = Motion.objects.filter(pk__in=self.elim_motions_dict.keys()).annotate(**annotations)
-        _annotate_annotations(self.elim_motions_dict, motions, annotations.keys())
+    def _annotate_elim_counts(self, obj, motion_id, round_id):
+        obj.ndebates = self.counts.ballots.get((motion_id, round_id), 0)
+        for side in self.tournament.sides:
+            setattr(obj, '%s_advancing' % side, self.counts.teams(motion_id, round_id, side, win=True))
+            setattr(obj, '%s_eliminated' % side, self.counts.teams(motion_id, round_id, side, win=False))
 
     def _collate_elim_motion_annotations(self):
         """Collect annotations (which will be attributes) and convert them to
@@ -302,71 +373,29 @@ class MotionBPStatsCalculator:
 
 class RoundMotionBPStatsCalculator(MotionBPStatsCalculator):
 
-    def _prefetch_prelim_motions(self):
-        """Constructs the database query for preliminary round motions.
-
-        The annotations are (1) the average team points by teams in each
-        position, and (2) the number of teams receiving n points from each
-        position for each n = 0, 1, 2, 3."""
+    def _get_round_motions(self, stage):
+        """Returns the round motions in rounds of the given stage, whose
+        motions have been used in a confirmed ballot."""
+        motions = RoundMotion.objects.filter(
+            round__tournament=self.tournament, round__stage=stage,
+        ).order_by('round__seq', 'seq').select_related('motion', 'round')
+        return [m for m in motions if self.counts.ballots.get((m.motion_id, None))]
 
-        self.prelim_motions = RoundMotion.objects.filter(
-            round__tournament=self.tournament,
-            round__stage=Round.Stage.PRELIMINARY,
-            motion__ballotsubmission__confirmed=True,
-        ).order_by('round__seq', 'seq').select_related('motion', 'round').annotate(
-            ndebates=Count('motion__ballotsubmission', filter=Q(
-                motion__ballotsubmission__confirmed=True,
-                motion__ballotsubmission__debate__round=F('round'))),
-            stage=Value('prelim', output_field=CharField()))
-        self.prelim_motions_dict = {m.id: m for m in self.prelim_motions}
-
-        annotations = {}  # dict of keyword arguments to pass to .annotate()
-        annotations.update({'%s_average' % side: Avg(
-            'motion__ballotsubmission__teamscore__points',
-            filter=Q(
-                motion__ballotsubmission__confirmed=True,
-                motion__ballotsubmission__debate__round=F('round'),
-                motion__ballotsubmission__teamscore__debate_team__side=side,
-            )) for side in self.tournament.sides})
-
-        annotations.update({'%s_%d_count' % (side, points): Count(
-            'motion__ballotsubmission__teamscore',
-            filter=Q(
-                motion__ballotsubmission__confirmed=True,
-                motion__ballotsubmission__debate__round=F('round'),
-                motion__ballotsubmission__teamscore__debate_team__side=side,
-                motion__ballotsubmission__teamscore__points=points,
-            )) for side in self.tournament.sides for points in range(4)})
-
-        motions = RoundMotion.objects.filter(pk__in=self.prelim_motions_dict.keys()).annotate(**annotations)
-        _annotate_annotations(self.prelim_motions_dict, motions, annotations.keys())
+    def _prefetch_prelim_motions(self):
+        """Fetches preliminary round motions and annotates them with (1) the
+        average team points by teams in each position, and (2) the number of
+        teams receiving n points from each position for each n = 0, 1, 2, 3."""
+        self.prelim_motions_dict = {m.id: m for m in self._get_round_motions(Round.Stage.PRELIMINARY)}
+        for motion in self.prelim_motions_dict.values():
+            motion.stage = 'prelim'
+            self._annotate_prelim_counts(motion, motion.motion_id, motion.round_id)
 
     def _prefetch_elim_motions(self):
-        """Constructs the database query for elimination round motions.
+        """Fetches elimination round motions and annotates them with counts.
 
         Elimination rounds in BP are advancing/eliminated, so this just collates
         information on who advanced and who did not."""
-
-        self.elim_motions = RoundMotion.objects.filter(
-            round__tournament=self.tournament,
-            round__stage=Round.Stage.ELIMINATION,
-            motion__ballotsubmission__confirmed=True,
-        ).order_by('round__seq', 'seq').select_related('motion', 'round').annotate(
-            ndebates=Count('motion__ballotsubmission', filter=Q(
-                motion__ballotsubmission__confirmed=True,
-                motion__ballotsubmission__debate__round=F('round'))),
-            stage=Value('elim', output_field=CharField()))
-        self.elim_motions_dict = {m.id: m for m in self.elim_motions}
-
-        annotations = {}  # dict of keyword arguments to pass to .annotate()
-        annotations.update({'%s_%s' % (side, status): Count(
-            'motion__ballotsubmission__teamscore',
-            filter=Q(
-                motion__ballotsubmission__confirmed=True,
-                motion__ballotsubmission__debate__round=F('round'),
-                motion__ballotsubmission__teamscore__debate_team__side=side,
-                motion__ballotsubmission__teamscore__win=value,
-            )) for side in self.tournament.sides for (status, value) in [("advancing", True), ("eliminated", False)]
-        })
-        motions = RoundMotion.objects.filter(pk__in=self.elim_motions_dict.keys()).annotate(**annotations)
-        _annotate_annotations(self.elim_motions_dict, motions, annotations.keys())
+        self.elim_motions_dict = {m.id: m for m in self._get_round_motions(Round.Stage.ELIMINATION)}
+        for motion in self.elim_motions_dict.values():
+            motion.stage = 'elim'
+            self._annotate_elim_counts(motion, motion.motion_id, motion.round_id)
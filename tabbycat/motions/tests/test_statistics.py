@@ -2,10 +2,12 @@ from django.test import TestCase
 
 from draw.models import Debate, DebateTeam
 from motions.models import DebateTeamMotionPreference, Motion, RoundMotion
-from motions.statistics import MotionBPStatsCalculator, MotionTwoTeamStatsCalculator
+from motions.statistics import (get_motion_counts, MotionBPStatsCalculator, MotionCounts,
+                                MotionTwoTeamStatsCalculator, RoundMotionTwoTeamStatsCalculator)
 from participants.models import Team
 from results.models import BallotSubmission, TeamScore
 from tournaments.models import Round, Tournament
+from utils.tests import CompletedTournamentTestMixin
 
 
 class TestMotionStatisticsTwoTeam(TestCase):
@@ -145,3 +147,41 @@ class TestMotionStatisticsBP(TestCase):
         self.assertEqual(motion.oo_eliminated, 0)
         self.assertEqual(motion.cg_eliminated, 0)
         self.assertEqual(motion.co_eliminated, 1)
+
+
+class TestMotionCounts(CompletedTournamentTestMixin, TestCase):
+
+    def test_single_query(self):
+        with self.assertNumQueries(1):
+            MotionCounts(self.tournament)
+
+    def test_counts(self):
+        counts = MotionCounts(self.tournament)
+        for rm in RoundMotion.objects.filter(round__tournament=self.tournament):
+            ballots = BallotSubmission.objects.filter(motion=rm.motion, debate__round=rm.round, confirmed=True)
+            self.assertEqual(counts.ballots.get((rm.motion_id, rm.round_id), 0), ballots.count())
+            for side in self.tournament.sides:
+                wins = TeamScore.objects.filter(ballot_submission__in=ballots, debate_team__side=side, win=True)
+                self.assertEqual(counts.teams(rm.motion_id, rm.round_id, side, win=True), wins.count())
+
+    def test_cached_until_ballots_change(self):
+        get_motion_counts(self.tournament)
+        with self.assertNumQueries(1):  # just the stamp
+            counts = get_motion_counts(self.tournament)
+        total = sum(n for (motion_id, round_id), n in counts.ballots.items() if round_id is None)
+
+        BallotSubmission.objects.filter(debate__round__seq=1).update(confirmed=False)
+        counts = get_motion_counts(self.tournament)
+        self.assertEqual(sum(n for (motion_id, round_id), n in counts.ballots.items() if round_id is None),
+                         total - Debate.objects.filter(round__seq=1, round__tournament=self.tournament).count())
+
+    def test_calculators_query_count(self):
+        MotionTwoTeamStatsCalculator(self.tournament)  # loads preferences and counts
+        with self.assertNumQueries(3):  # stamp, motions, rounds
+            stats = MotionTwoTeamStatsCalculator(self.tournament)
+        self.assertEqual(sum(m.ndebates for m in stats.motions), BallotSubmission.objects.filter(
+            confirmed=True, motion__isnull=False, debate__round__tournament=self.tournament).count())
+        with self.assertNumQueries(2):  # stamp, round motions
+            stats = RoundMotionTwoTeamStatsCalculator(self.tournament)
+        for rm in stats.motions:
+            self.assertEqual(rm.aff_wins + rm.neg_wins, rm.ndebates)
@@ -695,6 +695,16 @@ class SpeakerStandingsExtraMetrics(MultiValueChoicePreference):
     default = ['stdev', 'count']
 
 
+@tournament_preferences_registry.register
+class StandingsStore(BooleanPreference):
+    help_text = _("Keeps running totals of team and speaker results, updated as ballots are confirmed, "
+                  "so that standings don't need to be recalculated from every ballot. Recommended for large tournaments.")
+    verbose_name = _("Maintain incremental standings")
+    section = standings
+    name = 'standings_store'
+    default = False
+
+
 # ==============================================================================
 tab_release = Section('tab_release', verbose_name=_("Tab Release"))
 # ==============================================================================
@@ -1,8 +1,20 @@
+from dynamic_preferences.managers import PreferencesManager
 from dynamic_preferences.registries import PerInstancePreferenceRegistry
 
 
+class TournamentPreferencesManager(PreferencesManager):
+
+    def update_db_pref(self, section, name, value):
+        # Make the tournament re-read the preference, even if it's already
+        # loaded its preferences (see `Tournament.pref()`)
+        self.instance._prefs.pop(name, None)
+        return super().update_db_pref(section, name, value)
+
+
 class TournamentPreferenceRegistry(PerInstancePreferenceRegistry):
-    pass
+
+    def manager(self, **kwargs):
+        return TournamentPreferencesManager(registry=self, model=self.preference_model, **kwargs)
 
 
 tournament_preferences_registry = TournamentPreferenceRegistry()
@@ -0,0 +1,19 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import TournamentPreferenceModel
+from .utils import invalidate_preferences_snapshot
+
+
+@receiver(pre_save, sender=TournamentPreferenceModel)
+@receiver(post_save, sender=TournamentPreferenceModel)
+@receiver(post_delete, sender=TournamentPreferenceModel)
+def invalidate_preferences_snapshot_for_preference(sender, instance, **kwargs):
+    """Also done before saving, so that other `post_save` receivers that read
+    preferences don't get the old snapshot, and for raw saves, since loading
+    fixtures changes preferences."""
+    invalidate_preferences_snapshot(instance.instance_id)
+
+    # Make the tournament re-read the preference, if it's already loaded it
+    if TournamentPreferenceModel.instance.is_cached(instance):
+        instance.instance._prefs.pop(instance.name, None)
@@ -1,3 +1,4 @@
+import pickle
 from itertools import product
 
 from django.forms import ValidationError
@@ -53,3 +54,33 @@ class DuplicatePreferencesTest(TestCase):
     def test_non_repeatable_metrics(self):
         with self.assertRaises(ValidationError):
             validate_metric_duplicates(TeamStandingsGenerator, ['wins', 'speaks_sum', 'wins'])
+
+
+class PreferencesSnapshotTests(TestCase):
+
+    def setUp(self):
+        self.tournament = Tournament.objects.create(slug="snapshot", name="Snapshot Testing")
+        self.tournament.pref('teams_in_debate')  # loads the snapshot into the cache
+
+    def test_no_queries(self):
+        names = ['teams_in_debate', 'team_code_names', 'draw_odd_bracket', 'substantive_speakers']
+        tournament = Tournament.objects.get(slug='snapshot')
+        with self.assertNumQueries(0):
+            values = [tournament.pref(name) for name in names]
+        self.assertEqual(values, [self.tournament.preferences.get_by_name(name) for name in names])
+
+    def test_preference_saved(self):
+        self.assertEqual(Tournament.objects.get(slug='snapshot').pref('substantive_speakers'), 3)
+        self.tournament.preferences['debate_rules__substantive_speakers'] = 2
+        self.assertEqual(Tournament.objects.get(slug='snapshot').pref('substantive_speakers'), 2)
+
+    def test_preference_saved_through_same_instance(self):
+        self.assertEqual(self.tournament.pref('substantive_speakers'), 3)
+        self.tournament.preferences['debate_rules__substantive_speakers'] = 2
+        self.assertEqual(self.tournament.pref('substantive_speakers'), 2)
+
+    def test_not_pickled(self):
+        self.assertTrue(self.tournament._prefs)
+        tournament = pickle.loads(pickle.dumps(self.tournament))
+        self.assertEqual(tournament._prefs, {})
+        self.assertEqual(tournament.pref('teams_in_debate'), self.tournament.pref('teams_in_debate'))
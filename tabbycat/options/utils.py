@@ -1,5 +1,8 @@
 import logging
+from uuid import uuid4
 
+from django.core.cache import cache
+from django.db import transaction
 from django.forms import ValidationError
 from django.utils.encoding import force_str
 from django.utils.translation import gettext_lazy as _
@@ -7,6 +10,50 @@ from django.utils.translation import gettext_lazy as _
 logger = logging.getLogger(__name__)
 
 
+def _preferences_version_key(tournament_id):
+    return "%s_preferences_version" % tournament_id
+
+
+def get_preferences_snapshot(tournament):
+    """Returns a dict mapping the names of all of the tournament's preferences
+    (without their sections) to their values. The dict is loaded in a single
+    query, and kept in the cache under a version that
+    `invalidate_preferences_snapshot()` changes whenever a preference is saved
+    (see `options.signals`), so old versions just expire.
+
+    Unlike `tournament.preferences.all()`, this doesn't create database rows
+    for preferences that don't have them; it just uses their defaults."""
+    from .models import TournamentPreferenceModel
+
+    version_key = _preferences_version_key(tournament.id)
+    cache.add(version_key, uuid4().hex, None)
+    key = "%s_preferences_snapshot_%s" % (tournament.id, cache.get(version_key))
+
+    snapshot = cache.get(key)
+    if snapshot is None:
+        logger.debug("Loading preferences snapshot %s", key)
+        db_prefs = {(pref.section, pref.name): pref for pref in
+                    TournamentPreferenceModel.objects.filter(instance_id=tournament.id)}
+        snapshot = {}
+        for preference in TournamentPreferenceModel.registry.preferences():
+            db_pref = db_prefs.get((preference.section.name, preference.name))
+            snapshot[preference.name] = db_pref.value if db_pref is not None else preference.get('default')
+        cache.set(key, snapshot)
+    return snapshot
+
+
+def invalidate_preferences_snapshot(tournament_id):
+    """Changes the version of the tournament's preferences snapshot, both
+    immediately and when the current transaction commits, so that a snapshot
+    loaded from uncommitted data in the meantime isn't used."""
+
+    def invalidate():
+        cache.set(_preferences_version_key(tournament_id), uuid4().hex, None)
+
+    invalidate()
+    transaction.on_commit(invalidate)
+
+
 def use_team_code_names(tournament, admin):
     """Returns True if team code names should be used, given the tournament
     preferences of `tournament` and whether the request is for an admin view.
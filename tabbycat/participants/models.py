@@ -294,6 +294,12 @@ class Team(models.Model):
         return self.speaker_set.all()
 
     def seen(self, other, before_round=None):
+        """Returns the number of debates this team has had against `other`.
+        If the `_seen_counts` attribute has been populated using
+        `populate_team_history()` in the `participants.prefetch` module, and
+        `before_round` isn't given, no database query is made."""
+        if before_round is None and hasattr(self, '_seen_counts'):
+            return self._seen_counts[other.id]
         queryset = self.debateteam_set.filter(debate__debateteam__team=other)
         if before_round:
             queryset = queryset.filter(debate__round__seq__lt=before_round)
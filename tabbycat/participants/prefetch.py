@@ -1,9 +1,12 @@
+from collections import Counter
+
 from django.db.models import Avg, Value
 from django.db.models.functions import Coalesce
 
 from adjallocation.models import DebateAdjudicator
 from adjfeedback.models import AdjudicatorFeedback
-from participants.models import Adjudicator, Team
+from draw.models import DebateTeam
+from participants.models import Team
 from standings.teams import PointsMetricAnnotator, WinsMetricAnnotator
 
 
@@ -23,27 +26,42 @@ def populate_win_counts(teams, round=None):
         teams_by_id[team.id]._points = team.points_annotation
 
 
+def populate_team_history(teams):
+    """Populates the `_seen_counts` attribute of the teams in `teams`, which
+    maps the IDs of other teams to the number of debates the team has had
+    against them, so that `Team.seen()` doesn't need a database query. Uses a
+    single query. Operates in-place."""
+
+    teams_by_id = {team.id: team for team in teams}
+    for team in teams:
+        team._seen_counts = Counter()
+
+    pairs = DebateTeam.objects.filter(team_id__in=teams_by_id.keys()).values_list(
+        'team_id', 'debate__debateteam__team_id')
+
+    for team_id, other_id in pairs:
+        if team_id != other_id:
+            teams_by_id[team_id]._seen_counts[other_id] += 1
+
+
 def populate_feedback_scores(adjudicators):
     """Populates the `_feedback_score_cache` attribute of the adjudicators
-    in `adjudicators`.
+    in `adjudicators`, which `Adjudicator.weighted_score()` and
+    `Adjudicator.feedback_score` use, with a single grouped query.
     Operates in-place."""
 
-    adjs_by_id = {adj.id: adj for adj in adjudicators}
+    adj_ids = {adj.id for adj in adjudicators}
+    if not adj_ids:
+        return
 
-    adjfeedbacks = AdjudicatorFeedback.objects.filter(
-        adjudicator_id__in=adjs_by_id.keys(),
+    scores = AdjudicatorFeedback.objects.filter(
+        adjudicator_id__in=adj_ids,
         confirmed=True,
         ignored=False,
-    ).exclude(source_adjudicator__type=DebateAdjudicator.TYPE_TRAINEE)
-
-    adjs_annotated = Adjudicator.objects.filter(
-        id__in=adjs_by_id.keys(),
-        adjudicatorfeedback__in=adjfeedbacks,
-    ).annotate(feedback_score_annotation=Avg('adjudicatorfeedback__score'))
-
-    for adj in adjs_annotated:
-        adjs_by_id[adj.id]._feedback_score_cache = adj.feedback_score_annotation
+    ).exclude(
+        source_adjudicator__type=DebateAdjudicator.TYPE_TRAINEE,
+    ).order_by().values('adjudicator_id').annotate(avg=Avg('score')).values_list('adjudicator_id', 'avg')
+    scores = dict(scores)
 
     for adj in adjudicators:
-        if not hasattr(adj, '_feedback_score_cache'):
-            adj._feedback_score_cache = None
+        adj._feedback_score_cache = scores.get(adj.id)
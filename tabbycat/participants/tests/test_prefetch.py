@@ -0,0 +1,55 @@
+from django.test import TestCase
+
+from adjallocation.models import DebateAdjudicator
+from adjfeedback.models import AdjudicatorFeedback
+from participants.prefetch import populate_feedback_scores, populate_team_history
+from utils.tests import CompletedTournamentTestMixin
+
+
+class TestPopulateTeamHistory(CompletedTournamentTestMixin, TestCase):
+
+    def test_matches_seen(self):
+        teams = list(self.tournament.team_set.all())
+        expected = {(t1.id, t2.id): t1.seen(t2) for t1 in teams for t2 in teams if t1 != t2}
+        self.assertTrue(any(expected.values()))
+
+        with self.assertNumQueries(1):
+            populate_team_history(teams)
+
+        with self.assertNumQueries(0):
+            seen = {(t1.id, t2.id): t1.seen(t2) for t1 in teams for t2 in teams if t1 != t2}
+        self.assertEqual(seen, expected)
+
+
+class TestPopulateFeedbackScores(CompletedTournamentTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        das = DebateAdjudicator.objects.filter(debate__round__tournament=self.tournament).order_by('id')
+        for i, da in enumerate(das[:30]):
+            for j, dt in enumerate(da.debate.debateteam_set.all()):
+                AdjudicatorFeedback.objects.create(adjudicator=da.adjudicator, source_team=dt, score=1 + (i + j) % 5,
+                    confirmed=i % 7 != 0, ignored=i % 11 == 0, submitter_type=AdjudicatorFeedback.Submitter.TABROOM)
+            for other in da.debate.debateadjudicator_set.exclude(id=da.id):
+                AdjudicatorFeedback.objects.create(adjudicator=da.adjudicator, source_adjudicator=other, score=2 + i % 3,
+                    confirmed=True, submitter_type=AdjudicatorFeedback.Submitter.TABROOM)
+
+    def test_matches_feedback_score(self):
+        adjs = list(self.tournament.adjudicator_set.all())
+        expected = {adj.id: adj._feedback_score() for adj in self.tournament.adjudicator_set.all()}
+        self.assertTrue(any(score is not None for score in expected.values()))
+        self.assertTrue(any(score is None for score in expected.values()))
+
+        with self.assertNumQueries(1):
+            populate_feedback_scores(adjs)
+
+        with self.assertNumQueries(0):
+            scores = {adj.id: adj._feedback_score() for adj in adjs}
+            for adj in adjs:
+                adj.weighted_score(0.5)
+        self.assertEqual(scores.keys(), expected.keys())
+        for adj_id, score in scores.items():
+            if expected[adj_id] is None:
+                self.assertIsNone(score)
+            else:
+                self.assertAlmostEqual(score, expected[adj_id])
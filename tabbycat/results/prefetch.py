@@ -1,9 +1,12 @@
 """Functions that prefetch data for efficiency."""
 
+from django.db.models import prefetch_related_objects
+
+from adjallocation.allocation import AdjudicatorAllocation
 from adjallocation.models import DebateAdjudicator
 from checkins.utils import get_checkins
-from draw.models import DebateTeam
-from tournaments.models import Tournament
+from draw.models import Debate, DebateTeam
+from tournaments.models import Round, Tournament
 
 from .models import BallotSubmission, SpeakerScore, SpeakerScoreByAdj, TeamScore, TeamScoreByAdj
 from .result import DebateResult
@@ -67,6 +70,7 @@ def populate_confirmed_ballots(debates, motions=False, results=False):
 
 
 def populate_checkins(debates, tournament):
+    prefetch_related_objects(list(debates), 'checkin_identifier')
     get_checkins(debates, tournament, None)
 
 
@@ -74,8 +78,11 @@ def populate_results(ballotsubs, tournament=None):
     """Populates the `_result` attribute of each BallotSubmission in
     `ballotsubs` with a populated DebateResult instance.
 
-    For best performance, the ballot submissions should already have their
-    debates prefetched (using select_related).
+    This should be used wherever results for more than one ballot submission
+    are needed. It uses the same number of queries however many ballot
+    submissions there are, though one or two are saved if the ballot
+    submissions already have their debates and rounds prefetched (using
+    select_related).
     """
 
     # If the database is correct, some checks like `result.is_voting`,
@@ -92,12 +99,31 @@ def populate_results(ballotsubs, tournament=None):
     sides = tournament.sides
     ballotsubs = list(ballotsubs)  # set ballotsubs in stone to avoid race conditions in later queries
 
+    # Load debates and rounds that weren't prefetched, which creating the
+    # DebateResults needs, in bulk
+    missing = [bs for bs in ballotsubs if not BallotSubmission.debate.is_cached(bs)]
+    if missing:
+        debates = Debate.objects.select_related('round').in_bulk({bs.debate_id for bs in missing})
+        for ballotsub in missing:
+            ballotsub.debate = debates[ballotsub.debate_id]
+
+    missing = [bs.debate for bs in ballotsubs if not Debate.round.is_cached(bs.debate)]
+    if missing:
+        rounds = Round.objects.in_bulk({debate.round_id for debate in missing})
+        for debate in missing:
+            debate.round = rounds[debate.round_id]
+
+    for ballotsub in ballotsubs:
+        round = ballotsub.debate.round
+        if round.tournament_id == tournament.id and not Round.tournament.is_cached(round):
+            round.tournament = tournament
+
     results_by_debate_id = {}
     results_by_ballotsub_id = {}
 
     # Create the DebateResults
     for ballotsub in ballotsubs:
-        result = DebateResult(ballotsub, load=False)
+        result = DebateResult(ballotsub, load=False, tournament=tournament)
         result.init_blank_buffer()
 
         ballotsub._result = result
@@ -135,11 +161,13 @@ def populate_results(ballotsubs, tournament=None):
 
     debateadjs = DebateAdjudicator.objects.filter(
         debate__ballotsubmission__in=ballotsubs,
-    ).exclude(
-        type=DebateAdjudicator.TYPE_TRAINEE,
     ).select_related('adjudicator__institution', 'adjudicator__tournament').distinct()
 
+    debateadjs_by_debate_id = {}
     for da in debateadjs:
+        debateadjs_by_debate_id.setdefault(da.debate_id, []).append(da)
+        if da.type == DebateAdjudicator.TYPE_TRAINEE:
+            continue
         for result in results_by_debate_id[da.debate_id]:
             if result.is_voting:
                 result.debateadjs[da.adjudicator] = da
@@ -172,13 +200,20 @@ def populate_results(ballotsubs, tournament=None):
     teamscoresbyadj = TeamScoreByAdj.objects.filter(
         ballot_submission__in=ballotsubs,
         debate_team__side__in=sides,
-    ).select_related('debate_team')
+    ).select_related('debate_adjudicator__adjudicator', 'debate_team')
 
     for tsba in teamscoresbyadj:
         result = results_by_ballotsub_id[tsba.ballot_submission_id]
         if result.uses_declared_winners and tsba.win:
             result.add_winner(tsba.debate_adjudicator.adjudicator, tsba.debate_team.side)
 
+    # Populate adjudicator allocations, which results check against
+    for ballotsub in ballotsubs:
+        debate = ballotsub.debate
+        if not hasattr(debate, '_adjudicators'):
+            debate._adjudicators = AdjudicatorAllocation.from_debateadjudicators(
+                debate, debateadjs_by_debate_id.get(debate.id, []))
+
     # Finally, check that everything is in order
 
     for ballotsub in ballotsubs:
@@ -44,8 +44,11 @@ from itertools import product
 from statistics import mean
 from typing import TYPE_CHECKING
 
+from django.db import transaction
+
 from adjallocation.allocation import AdjudicatorAllocation
 from adjallocation.models import DebateAdjudicator
+from utils.misc import sending_save_signals
 
 from .result_info import DebateResultInfo
 from .scoresheet import (BPEliminationScoresheet, BPScoresheet, HighPointWinsRequiredScoresheet, LowPointWinsAllowedScoresheet,
@@ -273,17 +276,66 @@ class BaseDebateResult:
         pass
 
     def save(self):
-        """Saves to the database.
+        """Saves to the database, in a single transaction.
         Raises ResultError if the ballot set is incomplete or invalid."""
 
         if not self.is_valid():
             raise ResultError("Tried to save an invalid result.")
 
-        for side in self.sides:
-            dt = self.debateteams[side]
-
-            self.ballotsub.teamscore_set.update_or_create(debate_team=dt,
-                    defaults=self.get_defaults_fields('teamscore', side))
+        with transaction.atomic():
+            self.save_to_db()
+            # The scores are written in bulk, which doesn't send post_save, so
+            # the standings store must be refreshed here. (The ballot might
+            # have been confirmed before its scores were saved.)
+            if self.ballotsub.confirmed:
+                from standings.store import refresh_debate_records  # circular import via results.models
+                refresh_debate_records(self.debate)
+
+    def save_to_db(self):
+        """Writes the result to the database. Subclasses should extend this
+        method as necessary."""
+        self.bulk_update_or_create(self.ballotsub.teamscore_set, ['debate_team_id'], {
+            (self.debateteams[side].id,): self.get_defaults_fields('teamscore', side)
+            for side in self.sides
+        })
+
+    def bulk_update_or_create(self, manager, keys, rows):
+        """Saves instances related to the ballot submission through `manager`.
+        `rows` is a dict mapping tuples of values for the fields in `keys` to
+        dicts of other field values. Existing instances are updated only if a
+        field has changed, and missing instances are created, so this uses at
+        most three queries, however many rows there are. Save signals are sent
+        for created and updated instances, as `save()` would."""
+        model = manager.model
+        existing = {tuple(getattr(obj, key) for key in keys): obj for obj in manager.all()}
+
+        to_create = []
+        to_update = []
+        updated_fields = set()
+        for values, defaults in rows.items():
+            obj = existing.get(values)
+            if obj is None:
+                to_create.append(model(ballot_submission=self.ballotsub, **dict(zip(keys, values)), **defaults))
+                continue
+
+            changed = False
+            for name, value in defaults.items():
+                attname = model._meta.get_field(name).attname
+                if attname != name:  # foreign key: compare IDs to avoid fetching the related object
+                    value = getattr(value, 'pk', value)
+                if getattr(obj, attname) != value:
+                    setattr(obj, attname, value)
+                    updated_fields.add(name)
+                    changed = True
+            if changed:
+                to_update.append(obj)
+
+        if to_create:
+            with sending_save_signals(model, to_create, created=True):
+                model.objects.bulk_create(to_create)
+        if to_update:
+            with sending_save_signals(model, to_update, created=False, update_fields=updated_fields):
+                model.objects.bulk_update(to_update, updated_fields)
 
     def get_defaults_fields(self, model, *args):
         """Collects fields defined in subclasses"""
@@ -471,16 +523,13 @@ class DebateResultByAdjudicator(BaseDebateResult):
     def merge_speaker_result(self, result, adj) -> list[ResultError]:
         return []
 
-    def save(self):
-        super().save()
+    def save_to_db(self):
+        super().save_to_db()
 
-        for adj, sheet in self.scoresheets.items():
-            da = self.debateadjs[adj]
-            for side in self.sides:
-                dt = self.debateteams[side]
-                self.ballotsub.teamscorebyadj_set.update_or_create(
-                    debate_team=dt, debate_adjudicator=da,
-                    defaults=self.get_defaults_fields('teamscorebyadj', adj, side))
+        self.bulk_update_or_create(self.ballotsub.teamscorebyadj_set, ['debate_team_id', 'debate_adjudicator_id'], {
+            (self.debateteams[side].id, self.debateadjs[adj].id): self.get_defaults_fields('teamscorebyadj', adj, side)
+            for adj, side in product(self.scoresheets, self.sides)
+        })
 
     # --------------------------------------------------------------------------
     # Data setting and retrieval
@@ -732,14 +781,13 @@ class DebateResultWithScoresMixin:
             self.speakers[ss.debate_team.side][ss.position] = ss.speaker
             self.ghosts[ss.debate_team.side][ss.position] = ss.ghost
 
-    def save(self):
-        super().save()
+    def save_to_db(self):
+        super().save_to_db()
 
-        for side in self.sides:
-            dt = self.debateteams[side]
-            for pos in self.positions:
-                self.ballotsub.speakerscore_set.update_or_create(debate_team=dt,
-                    position=pos, defaults=self.get_defaults_fields('speakerscore', side, pos))
+        self.bulk_update_or_create(self.ballotsub.speakerscore_set, ['debate_team_id', 'position'], {
+            (self.debateteams[side].id, pos): self.get_defaults_fields('speakerscore', side, pos)
+            for side, pos in product(self.sides, self.positions)
+        })
 
     # --------------------------------------------------------------------------
     # Data setting and retrieval
@@ -1050,17 +1098,15 @@ class DebateResultByAdjudicatorWithScores(DebateResultWithScoresMixin, DebateRes
             self.set_score(adj, side, pos, result.get_score(side, pos))
         return errors
 
-    def save(self):
-        super().save()
+    def save_to_db(self):
+        super().save_to_db()
 
-        for adj, sheet in self.scoresheets.items():
-            da = self.debateadjs[adj]
-            for side in self.sides:
-                dt = self.debateteams[side]
-                for pos in self.positions:
-                    self.ballotsub.speakerscorebyadj_set.update_or_create(
-                        debate_team=dt, debate_adjudicator=da, position=pos,
-                        defaults=self.get_defaults_fields('speakerscorebyadj', adj, side, pos))
+        keys = ['debate_team_id', 'debate_adjudicator_id', 'position']
+        self.bulk_update_or_create(self.ballotsub.speakerscorebyadj_set, keys, {
+            (self.debateteams[side].id, self.debateadjs[adj].id, pos):
+                self.get_defaults_fields('speakerscorebyadj', adj, side, pos)
+            for adj, side, pos in product(self.scoresheets, self.sides, self.positions)
+        })
 
     def set_score(self, adjudicator, side, position, score):
         try:
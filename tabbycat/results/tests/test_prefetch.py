@@ -0,0 +1,38 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from results.models import BallotSubmission
+from results.prefetch import populate_results
+from results.result import DebateResult
+from utils.tests import CompletedTournamentTestMixin
+
+
+class TestPopulateResults(CompletedTournamentTestMixin, TestCase):
+
+    def get_ballotsubs(self):
+        return list(BallotSubmission.objects.filter(debate__round__tournament=self.tournament, confirmed=True))
+
+    def count_queries(self, ballotsubs):
+        with CaptureQueriesContext(connection) as context:
+            populate_results(ballotsubs, self.tournament)
+        return len(context.captured_queries)
+
+    def _test_populate_results(self):
+        ballotsubs = self.get_ballotsubs()
+        self.assertGreater(len(ballotsubs), 1)
+
+        populate_results(ballotsubs, self.tournament)
+        for ballotsub in ballotsubs:
+            expected = DebateResult(BallotSubmission.objects.get(id=ballotsub.id))
+            self.assertIsNot(ballotsub.result, expected)
+            self.assertTrue(ballotsub.result.identical(expected))
+
+        self.assertEqual(self.count_queries(self.get_ballotsubs()[:1]), self.count_queries(self.get_ballotsubs()))
+
+    def test_consensus(self):
+        self._test_populate_results()
+
+    def test_voting(self):
+        self.tournament.preferences['debate_rules__ballots_per_debate_prelim'] = 'per-adj'
+        self._test_populate_results()
@@ -6,6 +6,7 @@ from draw.models import Debate, DebateTeam
 from participants.models import Adjudicator, Institution, Speaker, Team
 from results.models import BallotSubmission, SpeakerScore, SpeakerScoreByAdj, TeamScore
 from results.result import ConsensusDebateResultWithScores, DebateResultByAdjudicatorWithScores, ResultError    # absolute import to keep logger's name consistent
+from standings.models import TeamStandingRecord
 from tournaments.models import Round, Tournament
 from utils.tests import suppress_logs
 from venues.models import Venue
@@ -192,6 +193,15 @@ class GeneralSpeakerTestsMixin:
         # Run self.save_complete_result and check completeness
         self.assertTrue(result.is_complete())
 
+    def test_refreshes_standings_store(self):
+        # The ballot is confirmed before its scores are saved, as in the API
+        self.set_tournament_preference('standings', 'standings_store', True)
+        self.save_complete_result(self.testdata['high'])
+        for side, team in zip(self.SIDES, self.teams):
+            record = TeamStandingRecord.objects.get(team=team, round=self.debate.round)
+            self.assertEqual(record.points, self._get_teamscore_in_db(side).points)
+            self.assertEqual(record.speaks_count, 1)
+
     def test_unknown_speaker(self):
         self.save_complete_result(self.testdata['high'])
         result = self.get_result()
@@ -627,6 +637,28 @@ class TestVotingDebateResultWithScores(GeneralSpeakerTestsMixin, BaseTestDebateR
     def test_extraneous_scoresheet(self, result):
         result.scoresheets["not-an-adj"] = None
 
+    # ==========================================================================
+    # Saving
+    # ==========================================================================
+
+    def test_save_query_count(self):
+        self.save_complete_result(self.testdata['high'])
+        result = self.get_result()
+        result.set_score(self.adjs[0], 'aff', 1, 70.0)
+        self.assertTrue(result.is_valid())
+
+        # savepoint, then a select and an update for each of the four models
+        with self.assertNumQueries(10):
+            result.save()
+
+        self.assertEqual(SpeakerScoreByAdj.objects.filter(ballot_submission=result.ballotsub).count(), 3 * 2 * 4)
+        self.assertEqual(SpeakerScoreByAdj.objects.get(ballot_submission=result.ballotsub,
+            debate_adjudicator__adjudicator=self.adjs[0], debate_team__side='aff', position=1).score, 70.0)
+        self.assertEqual(self.get_result().get_score(self.adjs[0], 'aff', 1), 70.0)
+
+        with self.assertNumQueries(6):  # nothing changed, so no updates
+            result.save()
+
 
 class TestConsensusDebateResultWithScores(GeneralSpeakerTestsMixin, BaseTestDebateResult):
 
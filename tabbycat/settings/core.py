@@ -134,6 +134,7 @@ TABBYCAT_APPS = (
     'standings',
     'notifications',
     'importer',
+    'jobs',
 )
 
 INSTALLED_APPS = (
@@ -207,6 +208,7 @@ TEMPLATES = [
 PUBLIC_FAST_CACHE_TIMEOUT = int(os.environ.get('PUBLIC_FAST_CACHE_TIMEOUT', 60 * 1))
 PUBLIC_SLOW_CACHE_TIMEOUT = int(os.environ.get('PUBLIC_SLOW_CACHE_TIMEOUT', 60 * 3.5))
 TAB_PAGES_CACHE_TIMEOUT = int(os.environ.get('TAB_PAGES_CACHE_TIMEOUT', 60 * 120))
+PUBLIC_STALE_CACHE_TIMEOUT = int(os.environ.get('PUBLIC_STALE_CACHE_TIMEOUT', 60 * 30))
 
 # Default non-heroku cache is to use local memory
 CACHES = {
@@ -323,6 +325,9 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Number of threads each worker uses to run jobs (e.g. auto-allocations)
+JOB_WORKER_THREADS = int(os.environ.get('JOB_WORKER_THREADS', 4))
+
 # ==============================================================================
 # Dynamic preferences
 # ==============================================================================
@@ -5,7 +5,8 @@ import random
 
 from django.utils.translation import gettext as _
 
-from .metrics import metricgetter, QuerySetMetricAnnotator, RepeatedMetricAnnotator
+from .metrics import metriccolumn, metricgetter, QuerySetMetricAnnotator, RepeatedMetricAnnotator
+from .store import store_enabled
 
 logger = logging.getLogger(__name__)
 
@@ -136,6 +137,7 @@ class Standings:
         self.infos = {instance: StandingInfo(self, instance) for instance in instances}
         self.ranked = False
         self.rank_filter = rank_filter
+        self.pairwise_results = None  # shared by annotators that compare teams, see standings.pairwise
         self._rank_limit = None
 
         self.metric_keys = list()
@@ -235,21 +237,28 @@ class Standings:
         self.ranked = True
 
     def sort(self, precedence, tiebreak_func=None):
-        self._standings = list(self.infos.values())
+        infos = list(self.infos.values())
 
         if tiebreak_func:
-            tiebreak_func(self._standings)
-
-        ascending = [self.metric_ascending[key] for key in precedence]
-        metrics_for_ranking = metricgetter(precedence, ascending)
+            tiebreak_func(infos)
 
+        # Sort an index by one metric column at a time, from the least to the
+        # most significant metric. Since sorts are stable (including when
+        # reversed), this is equivalent to sorting by a tuple of all metrics,
+        # but avoids building and comparing a tuple for every instance.
+        order = list(range(len(infos)))
         try:
-            self._standings.sort(key=metrics_for_ranking, reverse=True)
+            for key in reversed(precedence):
+                column = metriccolumn(infos, key)
+                order.sort(key=column.__getitem__, reverse=not self.metric_ascending[key])
         except TypeError:
-            for info in self.infos.values():
+            metrics_for_ranking = metricgetter(precedence, [self.metric_ascending[key] for key in precedence])
+            for info in infos:
                 logger.info("%30s %s", info.instance, metrics_for_ranking(info))
             raise
 
+        self._standings = [infos[i] for i in order]
+
         if self.rank_filter:
             self._standings.sort(key=self.rank_filter, reverse=True)
 
@@ -330,6 +339,10 @@ class BaseStandingsGenerator:
         rank_filter = self.get_rank_filter() if self.options["rank_filter"][0] is not None else None
         standings = Standings(queryset, rank_filter=rank_filter)
 
+        use_store = self._uses_store(queryset, round)
+        for annotator in self.metric_annotators:
+            annotator.use_store = use_store
+
         # The original queryset might have filtered out information relevant to
         # calculating the metrics (e.g., if it filters teams by participation in
         # a round), so make a new queryset to pass to the metric annotators that
@@ -386,6 +399,17 @@ class BaseStandingsGenerator:
         standings.sort_from_rankings(tiebreak_func)
         return standings
 
+    @staticmethod
+    def _uses_store(queryset, round):
+        """Returns True if metrics should be read from the standings store, i.e.
+        if the tournament maintains one (see `standings.store`)."""
+        if round is not None:
+            tournament = round.tournament
+        else:
+            instance = queryset.first()
+            tournament = instance.tournament if instance is not None else None
+        return store_enabled(tournament)
+
     @staticmethod
     def _check_annotators(annotators, error_str):
         """Checks the given list of annotators to ensure there are no conflicts.
@@ -40,6 +40,21 @@ def metricgetter(items, negate=None):
     return metricitemgetter
 
 
+def metriccolumn(infos, item):
+    """Returns a list of the metric `item` for each of `infos`, in order. As in
+    `metricgetter()`, None is replaced by 0."""
+    return [info.metrics[item] or 0 for info in infos]
+
+
+def metrickeys(infos, items):
+    """Returns a list of tuples, equal to `[metricgetter(items)(x) for x in
+    infos]`, but built one metric at a time, which is considerably faster for
+    large standings."""
+    if not items:
+        return [()] * len(infos)
+    return list(zip(*[metriccolumn(infos, item) for item in items]))
+
+
 class BaseMetricAnnotator:
     """Base class for all metric annotators.
 
@@ -61,6 +76,7 @@ class BaseMetricAnnotator:
     listed = True
     ascending = False  # if True, this metric is sorted in ascending order, not descending
     combinable = False  # if True, use single query with all combinable metrics
+    use_store = False  # if True, read from the standings store where possible
 
     def run(self, queryset, standings, round=None):
         standings.record_added_metric(self.key, self.name, self.abbr, self.icon, self.ascending)
@@ -97,15 +113,26 @@ class RepeatedMetricAnnotator(BaseMetricAnnotator):
 
 
 class QuerySetMetricAnnotator(BaseMetricAnnotator):
-    """Base class for annotators that metrics based on conditional aggregations."""
+    """Base class for annotators that metrics based on conditional aggregations.
+
+    Subclasses that can also be read from the standings store (see
+    `standings.store`) implement `get_store_annotation()`; the generator sets
+    `use_store` if the tournament maintains a store."""
     combinable = True
 
     def get_annotation(self, round):
         raise NotImplementedError("Subclasses of QuerySetMetricAnnotator must implement get_annotation().")
 
+    def get_store_annotation(self, round):
+        """Returns an annotation reading the metric from the standings store, or
+        None if this metric isn't kept in the store."""
+        return None
+
     def get_annotated_queryset(self, queryset, round=None):
         """Returns a QuerySet annotated with the metric given."""
-        annotation = self.get_annotation(round=round)
+        annotation = self.get_store_annotation(round) if self.use_store else None
+        if annotation is None:
+            annotation = self.get_annotation(round=round)
         logger.info("Annotation in %s: %s", self.__class__.__name__, str(annotation))
         self.queryset_annotated = True
         return queryset.annotate(**{self.key: annotation})
@@ -0,0 +1,58 @@
+# Generated by Django 4.1.7 on 2026-10-17 06:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('participants', '0021_team_seed'),
+        ('tournaments', '0010_alter_round_draw_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeamStandingRecord',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.IntegerField(blank=True, null=True, verbose_name='points')),
+                ('wins', models.PositiveIntegerField(default=0, verbose_name='wins')),
+                ('speaks_sum', models.FloatField(blank=True, null=True, verbose_name='total speaker score')),
+                ('speaks_count', models.PositiveIntegerField(default=0, verbose_name='number of team scores')),
+                ('margin_sum', models.FloatField(blank=True, null=True, verbose_name='sum of margins')),
+                ('margin_count', models.PositiveIntegerField(default=0, verbose_name='number of margins')),
+                ('firsts', models.PositiveIntegerField(default=0, verbose_name='firsts')),
+                ('seconds', models.PositiveIntegerField(default=0, verbose_name='seconds')),
+                ('thirds', models.PositiveIntegerField(default=0, verbose_name='thirds')),
+                ('num_iron', models.PositiveIntegerField(default=0, verbose_name='number of times ironed')),
+                ('round', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tournaments.round', verbose_name='round')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='participants.team', verbose_name='team')),
+            ],
+            options={
+                'verbose_name': 'team standing record',
+                'verbose_name_plural': 'team standing records',
+                'unique_together': {('team', 'round')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SpeakerStandingRecord',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.FloatField(blank=True, null=True, verbose_name='total')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='number of speeches given')),
+                ('srank', models.IntegerField(blank=True, null=True, verbose_name='speech ranks')),
+                ('replies_sum', models.FloatField(blank=True, null=True, verbose_name='total reply score')),
+                ('replies_count', models.PositiveIntegerField(default=0, verbose_name='replies given')),
+                ('round', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tournaments.round', verbose_name='round')),
+                ('speaker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='participants.speaker', verbose_name='speaker')),
+            ],
+            options={
+                'verbose_name': 'speaker standing record',
+                'verbose_name_plural': 'speaker standing records',
+                'unique_together': {('speaker', 'round')},
+            },
+        ),
+    ]
@@ -0,0 +1,76 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class TeamStandingRecord(models.Model):
+    """Running totals of a team's confirmed preliminary results, up to and
+    including `round`. There is at most one record per team per round, and
+    only for rounds in which the team has a confirmed result, so the standings
+    as at round N are read from the latest record at or before round N.
+
+    Records are maintained by `standings.store` when a tournament has the
+    `standings_store` preference enabled. Null sums mean that there were no
+    non-null values to add, mirroring SQL `SUM()`."""
+
+    team = models.ForeignKey('participants.Team', models.CASCADE,
+        verbose_name=_("team"))
+    round = models.ForeignKey('tournaments.Round', models.CASCADE,
+        verbose_name=_("round"))
+
+    points = models.IntegerField(null=True, blank=True,
+        verbose_name=_("points"))
+    wins = models.PositiveIntegerField(default=0,
+        verbose_name=_("wins"))
+    speaks_sum = models.FloatField(null=True, blank=True,
+        verbose_name=_("total speaker score"))
+    speaks_count = models.PositiveIntegerField(default=0,
+        verbose_name=_("number of team scores"))
+    margin_sum = models.FloatField(null=True, blank=True,
+        verbose_name=_("sum of margins"))
+    margin_count = models.PositiveIntegerField(default=0,
+        verbose_name=_("number of margins"))
+    firsts = models.PositiveIntegerField(default=0,
+        verbose_name=_("firsts"))
+    seconds = models.PositiveIntegerField(default=0,
+        verbose_name=_("seconds"))
+    thirds = models.PositiveIntegerField(default=0,
+        verbose_name=_("thirds"))
+    num_iron = models.PositiveIntegerField(default=0,
+        verbose_name=_("number of times ironed"))
+
+    class Meta:
+        unique_together = [('team', 'round')]
+        verbose_name = _("team standing record")
+        verbose_name_plural = _("team standing records")
+
+    def __str__(self):
+        return "[{0.round_id}] {0.team_id}: {0.points} points".format(self)
+
+
+class SpeakerStandingRecord(models.Model):
+    """Running totals of a speaker's confirmed, non-ghost preliminary speeches,
+    up to and including `round`. See `TeamStandingRecord`."""
+
+    speaker = models.ForeignKey('participants.Speaker', models.CASCADE,
+        verbose_name=_("speaker"))
+    round = models.ForeignKey('tournaments.Round', models.CASCADE,
+        verbose_name=_("round"))
+
+    total = models.FloatField(null=True, blank=True,
+        verbose_name=_("total"))
+    count = models.PositiveIntegerField(default=0,
+        verbose_name=_("number of speeches given"))
+    srank = models.IntegerField(null=True, blank=True,
+        verbose_name=_("speech ranks"))
+    replies_sum = models.FloatField(null=True, blank=True,
+        verbose_name=_("total reply score"))
+    replies_count = models.PositiveIntegerField(default=0,
+        verbose_name=_("replies given"))
+
+    class Meta:
+        unique_together = [('speaker', 'round')]
+        verbose_name = _("speaker standing record")
+        verbose_name_plural = _("speaker standing records")
+
+    def __str__(self):
+        return "[{0.round_id}] {0.speaker_id}: {0.total}".format(self)
@@ -0,0 +1,108 @@
+"""Pairwise results between teams, for metrics that compare teams against
+their opponents (who-beat-whom and draw strength).
+
+`PairwiseResults` is built with two queries for the whole tournament, rather
+than a query per team or per pair of teams. Since it's the same for every
+metric in a `generate()` call, and doesn't change until results or the draw
+change, `get_pairwise_results()` keeps it in the cache, along with a stamp
+summarising the confirmed ballots and debate teams it was built from.
+"""
+
+import logging
+from itertools import groupby
+from operator import itemgetter
+
+from django.core.cache import cache
+from django.db.models import Count, F, Max, Sum
+
+from draw.models import DebateTeam
+from results.models import BallotSubmission, TeamScore
+from tournaments.models import Round
+
+logger = logging.getLogger(__name__)
+
+
+class PairwiseResults:
+    """Results of every team against every other team in a tournament, up to
+    and including a round (or all rounds, if the round is None).
+
+    - `opponents` maps each team ID to a list of its opponents' IDs, one for
+       each preliminary debate the team was in, confirmed or not.
+    - `points` maps each pair `(team_id, opponent_id)` to the (unweighted)
+       points the team got in confirmed debates against that opponent.
+    - `totals` maps metric keys "points" and "speaks_sum" to dicts mapping each
+       team ID to that metric, as the respective metric annotators would
+       compute it. Teams without any non-null value are omitted.
+    """
+
+    def __init__(self, tournament, round=None):
+        self.opponents = {}
+        self.points = {}
+        self.totals = {'points': {}, 'speaks_sum': {}}
+
+        debateteams = DebateTeam.objects.filter(
+            debate__round__tournament=tournament,
+            debate__round__stage=Round.Stage.PRELIMINARY,
+        )
+        teamscores = TeamScore.objects.filter(
+            ballot_submission__confirmed=True,
+            debate_team__debate__round__tournament=tournament,
+            debate_team__debate__round__stage=Round.Stage.PRELIMINARY,
+        )
+        if round is not None:
+            debateteams = debateteams.filter(debate__round__seq__lte=round.seq)
+            teamscores = teamscores.filter(debate_team__debate__round__seq__lte=round.seq)
+
+        teams_by_debate = {}
+        debateteams = debateteams.order_by('debate_id').values_list('debate_id', 'team_id')
+        for debate_id, group in groupby(debateteams, key=itemgetter(0)):
+            team_ids = [team_id for _, team_id in group]
+            teams_by_debate[debate_id] = team_ids
+            for team_id in team_ids:
+                self.opponents.setdefault(team_id, []).extend(t for t in team_ids if t != team_id)
+
+        teamscores = teamscores.values_list('debate_team__debate_id', 'debate_team__team_id',
+            'points', 'score', 'debate_team__debate__round__weight')
+        for debate_id, team_id, points, score, weight in teamscores:
+            if points is not None:
+                self._add(self.totals['points'], team_id, points * weight)
+            if score is not None:
+                self._add(self.totals['speaks_sum'], team_id, score)
+            for opponent_id in teams_by_debate.get(debate_id, []):
+                if opponent_id == team_id:
+                    continue
+                self._add(self.points, (team_id, opponent_id), points or 0)
+
+    @staticmethod
+    def _add(totals, key, value):
+        totals[key] = totals.get(key, 0) + value
+
+
+def _get_stamp(tournament):
+    """Returns a value that changes whenever a ballot is confirmed or
+    unconfirmed, or the preliminary draw changes, in `tournament`."""
+    ballots = BallotSubmission.objects.filter(
+        debate__round__tournament=tournament, confirmed=True,
+    ).aggregate(last_timestamp=Max('timestamp'), last_confirmed=Max('confirm_timestamp'),
+                count=Count('id'), ids=Sum('id'))
+    debateteams = DebateTeam.objects.filter(
+        debate__round__tournament=tournament, debate__round__stage=Round.Stage.PRELIMINARY,
+    ).aggregate(count=Count('id'), last_id=Max('id'), teams=Sum(F('id') * F('team_id')),
+                weights=Sum('debate__round__weight'))
+    return ballots, debateteams
+
+
+def get_pairwise_results(tournament, round=None):
+    """Returns a `PairwiseResults` for the tournament as at `round`, from the
+    cache if results and the draw haven't changed since it was built."""
+    key = "%s_%s_pairwise_results" % (tournament.slug, round.seq if round is not None else "all")
+    stamp = _get_stamp(tournament)
+    cached = cache.get(key)
+    if cached is not None and cached[0] == stamp:
+        logger.debug("Using cached pairwise results %s", key)
+        return cached[1]
+
+    logger.debug("Building pairwise results %s", key)
+    results = PairwiseResults(tournament, round)
+    cache.set(key, (stamp, results))
+    return results
@@ -9,15 +9,30 @@ but there are other "types" of ranks, for example, ranks within brackets
 
 import logging
 from itertools import groupby
+from operator import itemgetter
 
 from django.db.models import Count, F, Window
 from django.db.models.functions import Rank
 
-from .metrics import metricgetter
+from .metrics import metricgetter, metrickeys
 
 logger = logging.getLogger(__name__)
 
 
+def tied_ranks(keys):
+    """Returns a list of `(rank, tied)` tuples, one for each key in `keys`,
+    which must already be in ranked order. Equal adjacent keys share a rank,
+    and the rank after a tie skips accordingly (i.e., "1224" ranking)."""
+    ranks = []
+    start = 0
+    for i in range(1, len(keys) + 1):
+        if i == len(keys) or keys[i] != keys[start]:
+            size = i - start
+            ranks.extend([(start + 1, size > 1)] * size)
+            start = i
+    return ranks
+
+
 class BaseRankAnnotator:
     """Base class for all rank annotators.
 
@@ -105,15 +120,12 @@ class BasicRankAnnotator(BaseRankAnnotator):
 
     def __init__(self, metrics):
         self.metrics = metrics
-        self.rank_key = metricgetter(metrics)
 
     def annotate(self, standings):
-        rank = 1
-        for key, group in groupby(standings, key=self.rank_key):
-            group = list(group)
-            for info in group:
-                info.add_ranking("rank", (rank, len(group) > 1))
-            rank += len(group)
+        standings = list(standings)
+        keys = metrickeys(standings, self.metrics)
+        for info, ranking in zip(standings, tied_ranks(keys)):
+            info.add_ranking("rank", ranking)
 
     def get_annotation(self, annotators, min_field, min_rounds):
         return Window(
@@ -125,18 +137,17 @@ class BasicRankAnnotator(BaseRankAnnotator):
 class BaseRankWithinGroupAnnotator(BaseRankAnnotator):
     """Base class for ranking annotators that rank within groups.
 
-    Subclasses must define `self.group_key` and `self.rank_key`."""
+    Subclasses must define `self.group_key`, a function returning the group of
+    an info, and `self.rank_metrics`, the metrics to rank by within groups."""
 
     def annotate(self, standings):
-        filtered = [tsi for tsi in standings if self.group_key(tsi) is not None]
-        by_group = sorted(filtered, key=self.group_key)
-        for key, group in groupby(by_group, key=self.group_key):
-            rank_in_group = 1
-            for _, subgroup in groupby(group, self.rank_key):
-                subgroup = list(subgroup)
-                for tsi in subgroup:
-                    tsi.add_ranking(self.key, (rank_in_group, len(subgroup) > 1))
-                rank_in_group += len(subgroup)
+        keyed = [(self.group_key(tsi), tsi) for tsi in standings]
+        keyed = sorted((item for item in keyed if item[0] is not None), key=itemgetter(0))
+        for _, group in groupby(keyed, key=itemgetter(0)):
+            group = [tsi for _, tsi in group]
+            keys = metrickeys(group, self.rank_metrics)
+            for tsi, ranking in zip(group, tied_ranks(keys)):
+                tsi.add_ranking(self.key, ranking)
 
 
 class SubrankAnnotator(BaseRankWithinGroupAnnotator):
@@ -148,7 +159,7 @@ class SubrankAnnotator(BaseRankWithinGroupAnnotator):
     def __init__(self, metrics):
         self.metrics = metrics
         self.group_key = metricgetter(metrics[:1])  # don't crash if there are no metrics
-        self.rank_key = metricgetter(metrics[1:])
+        self.rank_metrics = metrics[1:]
 
     def get_annotation(self, annotators, min_field, min_rounds):
         annotations = {a.key: a for a in annotators}
@@ -167,7 +178,7 @@ class RankFromInstitutionAnnotator(BaseRankWithinGroupAnnotator):
 
     def __init__(self, metrics):
         self.metrics = metrics
-        self.rank_key = metricgetter(metrics)
+        self.rank_metrics = metrics
 
     @staticmethod
     def group_key(tsi):
@@ -0,0 +1,87 @@
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from options.models import TournamentPreferenceModel
+from results.models import BallotSubmission
+from tournaments.models import Round, Tournament
+
+from .store import rebuild_store, refresh_debate_records, store_enabled
+
+logger = logging.getLogger(__name__)
+
+# Preferences that change which scores are included in the standings store
+STORE_PREFERENCES = ('standings_store', 'substantive_speakers', 'reply_scores_enabled')
+
+# Round fields that are folded into the records in the standings store
+STORE_ROUND_FIELDS = ('weight', 'stage', 'seq')
+
+
+def rebuild_store_on_commit(tournament_id):
+    """Deletions can be part of a cascade that deletes the whole tournament, so
+    wait until the deletion is committed, and only rebuild if the tournament
+    still exists."""
+
+    def rebuild():
+        tournament = Tournament.objects.filter(id=tournament_id).first()
+        if tournament is not None and store_enabled(tournament):
+            rebuild_store(tournament)
+
+    transaction.on_commit(rebuild)
+
+
+@receiver(post_save, sender=BallotSubmission)
+def update_standings_store_for_ballot(sender, instance, raw=False, **kwargs):
+    """Confirming or unconfirming a ballot changes the results of every team in
+    the debate. Scores aren't covered by signals, since they're saved in bulk;
+    `BaseDebateResult.save()` refreshes the records after saving them."""
+    if raw:
+        return
+    refresh_debate_records(instance.debate)
+
+
+@receiver(post_delete, sender=BallotSubmission)
+def update_standings_store_for_deleted_ballot(sender, instance, **kwargs):
+    if instance.confirmed:
+        rebuild_store_on_commit(instance.debate.round.tournament_id)
+
+
+@receiver(pre_save, sender=Round)
+def record_round_store_fields(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Records the round's fields that are folded into the store, as they are
+    in the database, so that `rebuild_standings_store_for_round()` can tell
+    whether they're changing."""
+    instance._store_fields_before = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(STORE_ROUND_FIELDS):
+        return
+    if not store_enabled(instance.tournament):
+        return
+    instance._store_fields_before = Round.objects.filter(pk=instance.pk).values_list(*STORE_ROUND_FIELDS).first()
+
+
+@receiver(post_save, sender=Round)
+def rebuild_standings_store_for_round(sender, instance, raw=False, **kwargs):
+    """Round weights, stages and sequence numbers are folded into the running
+    totals, so the whole store is rebuilt if any of them changed. Other changes
+    to rounds (e.g. draw status) don't affect the store."""
+    before = getattr(instance, '_store_fields_before', None)
+    if raw or before is None:
+        return
+    if before != tuple(getattr(instance, field) for field in STORE_ROUND_FIELDS):
+        rebuild_store(instance.tournament)
+
+
+@receiver(post_delete, sender=Round)
+def rebuild_standings_store_for_deleted_round(sender, instance, **kwargs):
+    rebuild_store_on_commit(instance.tournament_id)
+
+
+@receiver(post_save, sender=TournamentPreferenceModel)
+def rebuild_standings_store_for_preference(sender, instance, raw=False, **kwargs):
+    if raw or instance.name not in STORE_PREFERENCES:
+        return
+    rebuild_store(instance.instance)
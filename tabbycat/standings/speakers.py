@@ -5,11 +5,13 @@ import logging
 from django.db.models import Avg, Case, Count, F, FloatField, Max, Min, Q, StdDev, Sum, When
 from django.utils.translation import gettext_lazy as _
 
+from standings.models import SpeakerStandingRecord
 from tournaments.models import Round
 
 from .base import BaseStandingsGenerator
 from .metrics import QuerySetMetricAnnotator
 from .ranking import BasicRankAnnotator
+from .store import record_annotation
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +27,7 @@ class SpeakerScoreQuerySetMetricAnnotator(QuerySetMetricAnnotator):
     function = None  # Must be set by subclasses
     replies = False
     field = 'speakerscore__score'
+    store_field = None  # field of SpeakerStandingRecord, if this metric is in the standings store
 
     def get_annotation(self, round):
         """Returns a QuerySet annotated with the metric given. All positional
@@ -44,6 +47,11 @@ class SpeakerScoreQuerySetMetricAnnotator(QuerySetMetricAnnotator):
 
         return self.function(self.field, filter=annotation_filter)
 
+    def get_store_annotation(self, round):
+        if self.store_field is None:
+            return None
+        return record_annotation(SpeakerStandingRecord, 'speaker', self.store_field, round)
+
 
 class TotalSpeakerScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
     """Metric annotator for total speaker score."""
@@ -51,6 +59,7 @@ class TotalSpeakerScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
     name = _("total")
     abbr = _("Total")
     function = Sum
+    store_field = 'total'
 
 
 class AverageSpeakerScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
@@ -59,6 +68,7 @@ class AverageSpeakerScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
     name = _("average")
     abbr = _("Avg")
     function = Avg
+    store_field = ('total', 'count')
 
 
 class SpeakerTeamPointsMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
@@ -99,6 +109,7 @@ class NumberOfSpeechesMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
     name = _("number of speeches given")
     abbr = _("Num")
     function = Count
+    store_field = 'count'
 
 
 class TotalReplyScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
@@ -109,6 +120,7 @@ class TotalReplyScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
     function = Sum
     replies = True
     listed = False
+    store_field = 'replies_sum'
 
 
 class AverageReplyScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
@@ -119,6 +131,7 @@ class AverageReplyScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
     function = Avg
     replies = True
     listed = False
+    store_field = ('replies_sum', 'replies_count')
 
 
 class StandardDeviationReplyScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
@@ -140,6 +153,7 @@ class NumberOfRepliesMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
     function = Count
     replies = True
     listed = False
+    store_field = 'replies_count'
 
 
 class TrimmedMeanSpeakerScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
@@ -185,6 +199,7 @@ class SpeakerScoreRankingsMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
     function = Sum
     ascending = True
     field = 'speakerscore__rank'
+    store_field = 'srank'
 
 
 # ==============================================================================
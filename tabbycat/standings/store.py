@@ -0,0 +1,207 @@
+"""Incrementally maintained standings store.
+
+When a tournament has the `standings_store` preference enabled, running totals
+of every team's and speaker's confirmed preliminary results are kept in
+`TeamStandingRecord` and `SpeakerStandingRecord`. The records are refreshed
+only for the teams and speakers affected whenever a ballot is confirmed,
+unconfirmed or changed (see `standings.signals`), so that the standings
+generators can read metrics with one indexed lookup per team or speaker,
+rather than aggregating over every TeamScore and SpeakerScore in the
+tournament.
+"""
+
+import logging
+from itertools import groupby
+from operator import itemgetter
+
+from django.db import transaction
+from django.db.models import F, FloatField, OuterRef, Subquery
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+from draw.models import DebateTeam
+from results.models import SpeakerScore, TeamScore
+from standings.models import SpeakerStandingRecord, TeamStandingRecord
+from tournaments.models import Round
+
+
+logger = logging.getLogger(__name__)
+
+
+def store_enabled(tournament):
+    return tournament is not None and tournament.pref('standings_store')
+
+
+def record_annotation(model, owner_field, store_field, round=None):
+    """Returns an expression, for use in an annotation on a Team or Speaker
+    queryset, that reads a metric from the latest record of `model` at or
+    before `round` (or the latest record at all, if `round` is None).
+
+    `store_field` is either the name of a field of `model`, or a 2-tuple
+    `(sum_field, count_field)`, in which case the metric is the average.
+    Counts are zero, rather than null, if there is no record."""
+    records = model.objects.filter(**{owner_field: OuterRef('pk')})
+    if round is not None:
+        records = records.filter(round__seq__lte=round.seq)
+    records = records.order_by('-round__seq')
+
+    if isinstance(store_field, tuple):
+        sum_field, count_field = store_field
+        records = records.annotate(average=Cast(sum_field, FloatField()) /
+            NullIf(count_field, 0, output_field=FloatField()))
+        return Subquery(records.values('average')[:1], output_field=FloatField())
+
+    field = model._meta.get_field(store_field)
+    annotation = Subquery(records.values(store_field)[:1], output_field=field)
+    if not field.null:
+        annotation = Coalesce(annotation, 0, output_field=field)
+    return annotation
+
+
+class _RunningTotals:
+    """Accumulates running totals for a single team or speaker."""
+
+    # Fields that are null until a non-null value is added, like SQL SUM()
+    sum_fields = ()
+
+    def __init__(self):
+        self.values = dict.fromkeys(self.sum_fields)
+
+    def increment(self, field, value):
+        self.values[field] = self.values.get(field, 0) + value
+
+    def add_to_sum(self, field, value):
+        if value is None:
+            return
+        if self.values[field] is None:
+            self.values[field] = value
+        else:
+            self.values[field] += value
+
+
+class _TeamTotals(_RunningTotals):
+
+    sum_fields = ('points', 'speaks_sum', 'margin_sum')
+
+    def add(self, teamscore):
+        if teamscore['points'] is not None:
+            self.add_to_sum('points', teamscore['points'] * teamscore['debate_team__debate__round__weight'])
+        if teamscore['win']:
+            self.increment('wins', 1)
+        if teamscore['score'] is not None:
+            self.add_to_sum('speaks_sum', teamscore['score'])
+            self.increment('speaks_count', 1)
+        if teamscore['margin'] is not None:
+            self.add_to_sum('margin_sum', teamscore['margin'])
+            self.increment('margin_count', 1)
+        if teamscore['has_ghost']:
+            self.increment('num_iron', 1)
+        field = {3: 'firsts', 2: 'seconds', 1: 'thirds'}.get(teamscore['points'])
+        if field is not None:
+            self.increment(field, 1)
+
+
+class _SpeakerTotals(_RunningTotals):
+
+    sum_fields = ('total', 'srank', 'replies_sum')
+
+    def __init__(self, last_substantive_position, reply_position):
+        super().__init__()
+        self.last_substantive_position = last_substantive_position
+        self.reply_position = reply_position
+
+    def add(self, speakerscore):
+        if speakerscore['position'] <= self.last_substantive_position:
+            self.add_to_sum('total', speakerscore['score'])
+            self.add_to_sum('srank', speakerscore['rank'])
+            self.increment('count', 1)
+        elif speakerscore['position'] == self.reply_position:
+            self.add_to_sum('replies_sum', speakerscore['score'])
+            self.increment('replies_count', 1)
+
+
+def _build_records(model, owner_field, rows, totals_factory):
+    """Builds unsaved records of `model` from `rows`, which must be sorted by
+    owner and then by round sequence number."""
+    records = []
+    for owner_id, owner_rows in groupby(rows, key=itemgetter(owner_field)):
+        totals = totals_factory()
+        for round_id, round_rows in groupby(owner_rows, key=itemgetter('debate_team__debate__round_id')):
+            for row in round_rows:
+                totals.add(row)
+            records.append(model(round_id=round_id, **{owner_field: owner_id}, **totals.values))
+    return records
+
+
+def refresh_team_records(tournament, team_ids=None):
+    """Recomputes the team standing records for the given teams, or for all
+    teams in the tournament if `team_ids` is None."""
+    scores = TeamScore.objects.filter(
+        ballot_submission__confirmed=True,
+        debate_team__debate__round__tournament=tournament,
+        debate_team__debate__round__stage=Round.Stage.PRELIMINARY,
+    )
+    records = TeamStandingRecord.objects.filter(team__tournament=tournament)
+    if team_ids is not None:
+        scores = scores.filter(debate_team__team_id__in=team_ids)
+        records = records.filter(team_id__in=team_ids)
+
+    scores = scores.order_by('debate_team__team_id', 'debate_team__debate__round__seq').values(
+        'debate_team__debate__round_id', 'debate_team__debate__round__weight',
+        'points', 'win', 'score', 'margin', 'has_ghost', team_id=F('debate_team__team_id'))
+    new_records = _build_records(TeamStandingRecord, 'team_id', scores, _TeamTotals)
+
+    with transaction.atomic():
+        records.delete()
+        TeamStandingRecord.objects.bulk_create(new_records)
+    logger.debug("Refreshed %d team standing records in %s", len(new_records), tournament)
+
+
+def refresh_speaker_records(tournament, team_ids=None):
+    """Recomputes the speaker standing records for the speakers in the given
+    teams, or for all speakers in the tournament if `team_ids` is None."""
+    scores = SpeakerScore.objects.filter(
+        ballot_submission__confirmed=True,
+        ghost=False,
+        debate_team__debate__round__tournament=tournament,
+        debate_team__debate__round__stage=Round.Stage.PRELIMINARY,
+    )
+    records = SpeakerStandingRecord.objects.filter(speaker__team__tournament=tournament)
+    if team_ids is not None:
+        scores = scores.filter(speaker__team_id__in=team_ids)
+        records = records.filter(speaker__team_id__in=team_ids)
+
+    scores = scores.order_by('speaker_id', 'debate_team__debate__round__seq').values(
+        'speaker_id', 'debate_team__debate__round_id', 'score', 'rank', 'position')
+
+    last_substantive_position = tournament.last_substantive_position
+    reply_position = tournament.reply_position
+    new_records = _build_records(SpeakerStandingRecord, 'speaker_id', scores,
+        lambda: _SpeakerTotals(last_substantive_position, reply_position))
+
+    with transaction.atomic():
+        records.delete()
+        SpeakerStandingRecord.objects.bulk_create(new_records)
+    logger.debug("Refreshed %d speaker standing records in %s", len(new_records), tournament)
+
+
+def refresh_debate_records(debate):
+    """Refreshes the records of the teams and speakers in the given debate,
+    if the tournament maintains a standings store."""
+    tournament = debate.round.tournament
+    if not store_enabled(tournament) or debate.round.stage != Round.Stage.PRELIMINARY:
+        return
+    team_ids = list(DebateTeam.objects.filter(debate=debate).values_list('team_id', flat=True))
+    refresh_team_records(tournament, team_ids)
+    refresh_speaker_records(tournament, team_ids)
+
+
+def rebuild_store(tournament):
+    """Rebuilds all records for the tournament from scratch, or removes them if
+    the tournament doesn't maintain a standings store."""
+    if not store_enabled(tournament):
+        TeamStandingRecord.objects.filter(team__tournament=tournament).delete()
+        SpeakerStandingRecord.objects.filter(speaker__team__tournament=tournament).delete()
+        return
+    logger.info("Rebuilding standings store for %s", tournament)
+    refresh_team_records(tournament)
+    refresh_speaker_records(tournament)
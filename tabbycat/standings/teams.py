@@ -2,17 +2,18 @@
 
 import logging
 
-from django.contrib.postgres.aggregates import ArrayAgg
 from django.db.models import Avg, Count, F, FloatField, PositiveIntegerField, Q, StdDev, Sum
 from django.db.models.functions import Cast, NullIf
 from django.utils.translation import gettext_lazy as _
 
-from results.models import TeamScore
+from standings.models import TeamStandingRecord
 from tournaments.models import Round
 
 from .base import BaseStandingsGenerator
 from .metrics import BaseMetricAnnotator, metricgetter, QuerySetMetricAnnotator, RepeatedMetricAnnotator
+from .pairwise import get_pairwise_results
 from .ranking import BasicRankAnnotator, RankFromInstitutionAnnotator, SubrankAnnotator
+from .store import record_annotation
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +34,8 @@ class TeamScoreQuerySetMetricAnnotator(QuerySetMetricAnnotator):
 
     exclude_unconfirmed = True
 
+    store_field = None  # field of TeamStandingRecord, if this metric is in the standings store
+
     def get_field(self):
         """Subclasses with complicated fields override this method."""
         return 'debateteam__teamscore__' + self.field
@@ -55,6 +58,11 @@ class TeamScoreQuerySetMetricAnnotator(QuerySetMetricAnnotator):
     def get_annotation(self, round=None):
         return self.function(self.get_field(), filter=self.get_annotation_filter(round), output_field=self.output_field)
 
+    def get_store_annotation(self, round=None):
+        if self.store_field is None:
+            return None
+        return record_annotation(TeamStandingRecord, 'team', self.store_field, round)
+
 
 class PointsMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
     """Metric annotator for total number of points."""
@@ -65,6 +73,7 @@ class PointsMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
     function = Sum
     field = "points"
     output_field = PositiveIntegerField()
+    store_field = 'points'
 
     def get_field(self):
         return F(super().get_field()) * F('debateteam__debate__round__weight')
@@ -79,6 +88,7 @@ class WinsMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
     function = Count
     field = "win"
     where_value = True
+    store_field = 'wins'
 
 
 class TotalSpeakerScoreMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
@@ -89,6 +99,7 @@ class TotalSpeakerScoreMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
 
     function = Sum
     field = "score"
+    store_field = 'speaks_sum'
 
 
 class AverageSpeakerScoreMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
@@ -99,6 +110,7 @@ class AverageSpeakerScoreMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
 
     function = Avg
     field = "score"
+    store_field = ('speaks_sum', 'speaks_count')
 
 
 class SpeakerScoreStandardDeviationMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
@@ -120,6 +132,7 @@ class SumMarginMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
 
     function = Sum
     field = "margin"
+    store_field = 'margin_sum'
 
 
 class AverageMarginMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
@@ -130,6 +143,7 @@ class AverageMarginMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
 
     function = Avg
     field = "margin"
+    store_field = ('margin_sum', 'margin_count')
 
 
 class AverageIndividualScoreMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
@@ -171,6 +185,15 @@ class AverageIndividualScoreMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
         return super().get_annotated_queryset(queryset, round)
 
 
+def get_standings_pairwise_results(queryset, standings, round):
+    """Returns the pairwise results for these standings, building them (or
+    fetching them from the cache) on first use in a `generate()` call."""
+    if standings.pairwise_results is None:
+        tournament = round.tournament if round is not None else queryset.first().tournament
+        standings.pairwise_results = get_pairwise_results(tournament, round)
+    return standings.pairwise_results
+
+
 class BaseDrawStrengthMetricAnnotator(BaseMetricAnnotator):
 
     opponent_annotator = None
@@ -179,29 +202,14 @@ class BaseDrawStrengthMetricAnnotator(BaseMetricAnnotator):
         if not queryset.exists():
             return
 
-        logger.info("Running opponents query for draw strength:")
-
-        # Make a copy of teams queryset and annotate with opponents
-        opponents_filter = ~Q(debateteam__debate__debateteam__team_id=F('id'))
-        opponents_filter &= Q(debateteam__debate__round__stage=Round.Stage.PRELIMINARY)
-        if round is not None:
-            opponents_filter &= Q(debateteam__debate__round__seq__lte=round.seq)
-        opponents_annotation = ArrayAgg('debateteam__debate__debateteam__team_id',
-                filter=opponents_filter)
-        logger.info("Opponents annotation: %s", str(opponents_annotation))
-        teams_with_opponents = queryset.model.objects.annotate(opponent_ids=opponents_annotation)
-        opponents_by_team = {team.id: team.opponent_ids for team in teams_with_opponents}
-
-        opp_metric_queryset = self.opponent_annotator().get_annotated_queryset(
-                queryset[0].tournament.team_set.all(), round)
-        opp_metric_queryset_teams = {team.id: team for team in opp_metric_queryset}
+        pairwise = get_standings_pairwise_results(queryset, standings, round)
+        opp_metrics = pairwise.totals[self.opponent_annotator.key]
 
         for team in queryset:
             draw_strength = 0
-            for opponent_id in opponents_by_team[team.id]:
-                opp_metric = getattr(opp_metric_queryset_teams[opponent_id], self.opponent_annotator.key)
-                if opp_metric is not None: # opp_metric is None when no debates have happened
-                    draw_strength += opp_metric
+            for opponent_id in pairwise.opponents.get(team.id, []):
+                # opponent is missing when no debates have happened
+                draw_strength += opp_metrics.get(opponent_id, 0)
             standings.add_metric(team, self.key, draw_strength)
 
 
@@ -297,6 +305,7 @@ class NumberOfFirstsMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
     function = Count
     field = "points"
     where_value = 3
+    store_field = 'firsts'
 
 
 class NumberOfSecondsMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
@@ -307,6 +316,7 @@ class NumberOfSecondsMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
     function = Count
     field = "points"
     where_value = 2
+    store_field = 'seconds'
 
 
 class NumberOfThirdsMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
@@ -317,6 +327,7 @@ class NumberOfThirdsMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
     function = Count
     field = "points"
     where_value = 1
+    store_field = 'thirds'
 
 
 class IronsMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
@@ -329,6 +340,7 @@ class IronsMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
     function = Count
     field = "has_ghost"
     where_value = True
+    store_field = 'num_iron'
 
 
 class WhoBeatWhomMetricAnnotator(RepeatedMetricAnnotator):
@@ -340,38 +352,26 @@ class WhoBeatWhomMetricAnnotator(RepeatedMetricAnnotator):
     abbr_prefix = _("WBW")
     choice_name = _("who-beat-whom")
 
-    def get_team_scores(self, key, equal_teams, tsi, round):
-        equal_teams.remove(tsi)
-        other = equal_teams[0]
-        ts = TeamScore.objects.filter(
-            ballot_submission__confirmed=True,
-            debate_team__team=tsi.team,
-            debate_team__debate__debateteam__team=other.team,
-            debate_team__debate__round__stage=Round.Stage.PRELIMINARY,
-        )
-
-        if round is not None:
-            ts = ts.filter(debate_team__debate__round__seq__lte=round.seq)
-
-        ts = ts.aggregate(Sum('points'))
-        logger.info("who beat whom, %s %s vs %s %s: %s",
-            tsi.team.short_name, key(tsi), other.team.short_name, key(other),
-            ts["points__sum"])
-        return ts
-
     def annotate(self, queryset, standings, round=None):
         key = metricgetter(self.keys)
 
-        def who_beat_whom(tsi):
-            equal_teams = [x for x in standings.infoview() if key(x) == key(tsi)]
-            if len(equal_teams) != 2:
-                return "n/a"  # fail fast if attempt to compare with an int
-
-            ts = self.get_team_scores(key, equal_teams, tsi, round)
-            return ts["points__sum"] or 0
+        equal_teams = {}
+        for tsi in standings.infoview():
+            equal_teams.setdefault(key(tsi), []).append(tsi)
 
+        pairwise = None
         for tsi in standings.infoview():
-            wbw = who_beat_whom(tsi)
+            group = equal_teams[key(tsi)]
+            if len(group) != 2:
+                tsi.add_metric(self.key, "n/a")  # fail fast if attempt to compare with an int
+                continue
+
+            if pairwise is None:
+                pairwise = get_standings_pairwise_results(queryset, standings, round)
+            other = group[1] if group[0] is tsi else group[0]
+            wbw = pairwise.points.get((tsi.team.id, other.team.id), 0)
+            logger.info("who beat whom, %s %s vs %s %s: %s",
+                tsi.team.short_name, key(tsi), other.team.short_name, key(other), wbw)
             tsi.add_metric(self.key, wbw)
 
 
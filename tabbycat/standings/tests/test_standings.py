@@ -1,16 +1,22 @@
 import logging
+from unittest.mock import patch
 
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 
 from adjallocation.models import DebateAdjudicator
 from draw.models import Debate, DebateTeam
 from participants.models import Adjudicator, Institution, Speaker, Team
 from results.models import BallotSubmission, SpeakerScore, TeamScore
+from standings.models import SpeakerStandingRecord, TeamStandingRecord
+from standings.store import rebuild_store
+from tournaments.forms import RoundWeightForm
 from tournaments.models import Round, Tournament
 from utils.tests import suppress_logs
 from venues.models import Venue
 
 from ..base import StandingsError
+from ..ranking import tied_ranks
+from ..speakers import SpeakerStandingsGenerator
 from ..teams import TeamStandingsGenerator
 
 
@@ -119,6 +125,12 @@ class TestTrivialStandings(TestCase):
         # teams have faced each other twice, so draw strength is twice opponent's score
         self._base_metric_test({'draw_strength_speaks': [394, 406]})
 
+    def test_draw_strength_after_unconfirm(self):
+        # pairwise results are cached between calls, but must not be stale
+        self._base_metric_test({'draw_strength': [0, 4]})
+        BallotSubmission.objects.filter(debate__round__seq=2).update(confirmed=False)
+        self._base_metric_test({'draw_strength': [0, 2]})
+
     def test_margin_sum(self):
         self._base_metric_test({'margin_sum': [6, -6]})
 
@@ -262,6 +274,95 @@ class TestStandingsWithUnconfirmedBallotSubmission(IgnorableDebateMixin, TestTri
     def test_draw_strength_speaks(self):
         self._base_metric_test({'draw_strength_speaks': [591, 609]})
 
+    def test_draw_strength_after_unconfirm(self):
+        self._base_metric_test({'draw_strength': [0, 6]})
+        BallotSubmission.objects.filter(debate__round__seq=2).update(confirmed=False)
+        self._base_metric_test({'draw_strength': [0, 3]})
+
+
+class StandingsStoreMixin:
+    """Runs the same tests with metrics read from the standings store, which is
+    built when the preference is turned on."""
+
+    def setUp(self):
+        super().setUp()
+        self.tournament.preferences['standings__standings_store'] = True
+
+    def set_up_speaker_scores(self, position):
+        super().set_up_speaker_scores(position)
+        # Scores written directly, rather than through a debate result, don't
+        # refresh the store
+        rebuild_store(self.tournament)
+
+
+class TestTrivialStandingsWithStore(StandingsStoreMixin, TestTrivialStandings):
+
+    def test_store_built(self):
+        # one record per team per round
+        self.assertEqual(TeamStandingRecord.objects.filter(team__tournament=self.tournament).count(), 4)
+
+    def test_store_removed(self):
+        self.tournament.preferences['standings__standings_store'] = False
+        self.assertFalse(TeamStandingRecord.objects.filter(team__tournament=self.tournament).exists())
+        self._base_metric_test({'points': [2, 0], 'speaks_avg': [101.5, 98.5]})
+
+    def test_unconfirm_ballot(self):
+        ballotsub = BallotSubmission.objects.get(debate__round__seq=2)
+        ballotsub.confirmed = False
+        ballotsub.save()
+        self._base_metric_test({'points': [1, 0], 'wins': [1, 0], 'speaks_avg': [101, 99]})
+
+    def test_round_weight(self):
+        rd = Round.objects.get(tournament=self.tournament, seq=2)
+        rd.weight = 3
+        rd.save()
+        self._base_metric_test({'points': [4, 0]})
+
+    def test_round_weight_form(self):
+        rd = Round.objects.get(tournament=self.tournament, seq=2)
+        form = RoundWeightForm(self.tournament, data={
+            'round_weight_%d' % r.id: 3 if r == rd else 1 for r in self.tournament.round_set.all()})
+        self.assertTrue(form.is_valid())
+        form.save()
+        self._base_metric_test({'points': [4, 0]})
+
+    def test_round_save_without_store_fields(self):
+        rd = Round.objects.get(tournament=self.tournament, seq=2)
+        rd.draw_status = Round.Status.RELEASED
+        with patch('standings.signals.rebuild_store') as mock_rebuild:
+            rd.save()
+        mock_rebuild.assert_not_called()
+
+    def test_as_at_round(self):
+        generator = TeamStandingsGenerator(('points', 'speaks_sum'), ('rank',))
+        rd = Round.objects.get(tournament=self.tournament, seq=1)
+        with suppress_logs('standings.metrics', logging.INFO):
+            standings = generator.generate(self.tournament.team_set.all(), round=rd)
+        self.assertEqual(standings.get_standing(self.team1).metrics['points'], 1)
+        self.assertEqual(standings.get_standing(self.team2).metrics['speaks_sum'], 99)
+
+    def test_speaker_metrics(self):
+        self.set_up_speaker_scores(1)
+        self.assertEqual(SpeakerStandingRecord.objects.filter(speaker__team__tournament=self.tournament).count(), 4)
+
+        rd = Round.objects.get(tournament=self.tournament, seq=2)
+        speakers = Speaker.objects.filter(team__tournament=self.tournament)
+        generator = SpeakerStandingsGenerator(('total', 'average'), ('rank',), ('count',))
+        with suppress_logs('standings.metrics', logging.INFO):
+            standings = generator.generate(speakers, round=rd)
+
+        for speaker, expected in zip(speakers.order_by('name'), [(203, 101.5, 2), (197, 98.5, 2)]):
+            metrics = standings.get_standing(speaker).metrics
+            self.assertEqual((metrics['total'], metrics['average'], metrics['count']), expected)
+
+
+class TestStandingsWithEliminationRoundWithStore(StandingsStoreMixin, TestStandingsWithEliminationRound):
+    pass
+
+
+class TestStandingsWithUnconfirmedBallotSubmissionWithStore(StandingsStoreMixin, TestStandingsWithUnconfirmedBallotSubmission):
+    pass
+
 
 class TestBasicStandings(TestCase):
 
@@ -385,3 +486,17 @@ class TestMissingStandings(TestCase):
         standings = self.get_standings(generator)
         self.assertEqual(standings.get_standing(self.team1).metrics['num_adjs'], 0)
         self.assertEqual(standings.get_standing(self.team2).metrics['num_adjs'], 0)
+
+
+class TestTiedRanks(SimpleTestCase):
+
+    def test_no_ties(self):
+        self.assertEqual(tied_ranks([(3,), (2,), (1,)]), [(1, False), (2, False), (3, False)])
+
+    def test_ties(self):
+        keys = [(3, 5), (3, 5), (3, 4), (2, 4), (2, 4), (2, 4), (1, 0)]
+        self.assertEqual(tied_ranks(keys), [(1, True), (1, True), (3, False), (4, True), (4, True), (4, True), (7, False)])
+
+    def test_empty(self):
+        self.assertEqual(tied_ranks([]), [])
+        self.assertEqual(tied_ranks([(), ()]), [(1, True), (1, True)])
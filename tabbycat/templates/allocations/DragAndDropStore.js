@@ -17,6 +17,7 @@ export default new Vuex.Store({
     institutions: {},
     regions: {},
     loading: false, // Used by modal windows when waiting for an allocation etc
+    job: null, // The status of the last action sent to the worker
     draggingPanel: false, // Needed to switch UI affordances for whole-panel drops
     round: null,
     tournament: null,
@@ -177,6 +178,9 @@ export default new Vuex.Store({
     setLoadingState (state, isLoading) {
       state.loading = isLoading
     },
+    setJob (state, job) {
+      state.job = job
+    },
     setPanelDraggingTracker (state, status) {
       state.draggingPanel = status;
     },
@@ -237,6 +241,9 @@ export default new Vuex.Store({
     loadingState: state => {
       return state.loading
     },
+    currentJob: state => {
+      return state.job
+    },
     teamClashesForItem: (state) => (id) => {
       return state.extra.clashes?.teams?.[id] ?? false
     },
@@ -318,6 +325,9 @@ export default new Vuex.Store({
     receiveUpdatedupdateDebatesOrPanelsAttribute ({ commit }, payload) {
       // Commit changes from websockets i.e.
       // { "componentID": 5711, "debatesOrPanels": [{ "id": 72, "importance": "0" }] }
+      if ('job' in payload) {
+        commit('setJob', payload.job)
+      }
       if ('message' in payload) {
         $.fn.showAlert(payload.message.type, payload.message.text, 0)
         commit('setLoadingState', false) // Hide and re-enable modals
@@ -12,9 +12,10 @@ from breakqual.models import BreakCategory
 from breakqual.utils import auto_make_break_rounds
 from options.preferences import TournamentStaff
 from options.presets import all_presets, data_entry_presets_for_form, presets_for_form, PrivateURLs, public_presets_for_form, PublicForms, PublicInformation
+from standings.store import rebuild_store, store_enabled
 
 from .models import Round, Tournament
-from .signals import update_tournament_cache
+from .signals import invalidate_public_pages_for_rounds, update_tournament_cache
 from .utils import auto_make_rounds
 
 
@@ -176,6 +177,7 @@ class RoundWithCompleteOptionField(RoundField):
 def clear_all_round_caches(tournament):
     cache.delete_many(["%s_%s_%s" % (tournament.slug, r.seq, 'object') for r in tournament.round_set.all()])
     update_tournament_cache(Tournament, tournament)
+    invalidate_public_pages_for_rounds(tournament)
 
 
 class SetCurrentRoundSingleBreakCategoryForm(Form):
@@ -282,4 +284,9 @@ class RoundWeightForm(Form):
             round.weight = self.cleaned_data['round_weight_%d' % round.id]
         Round.objects.bulk_update(rounds, ['weight'])
 
+        # Weights are folded into the standings store, and bulk updates don't
+        # send signals
+        if store_enabled(self.tournament):
+            rebuild_store(self.tournament)
+
         return rounds
@@ -50,8 +50,16 @@ class Tournament(models.Model):
 
     def __init__(self, *args, **kwargs):
         self._prefs = {}
+        self._prefs_loaded = False
         return super().__init__(*args, **kwargs)
 
+    def __getstate__(self):
+        # Don't carry preferences into the cache with the tournament
+        state = super().__getstate__()
+        state['_prefs'] = {}
+        state['_prefs_loaded'] = False
+        return state
+
     def __str__(self):
         if self.short_name:
             return str(self.short_name)
@@ -63,15 +71,26 @@ class Tournament(models.Model):
     # --------------------------------------------------------------------------
 
     def pref(self, name):
-        """Keep a record in this instance, to avoid hitting the cache
-        unnecessarily. Note that this means that, if a tournament preference is
-        changed, an instance of the Tournament (Python) object that has already
-        queries that preference value won't pick up on the change."""
+        """Loads all preferences at once, from a snapshot in the cache (see
+        `options.utils.get_preferences_snapshot()`), and keeps a record in this
+        instance, to avoid hitting the cache unnecessarily. Note that this
+        means that, if a tournament preference is changed, an instance of the
+        Tournament (Python) object that has already queried any preference
+        value won't pick up on the change."""
         try:
             return self._prefs[name]
         except KeyError:
-            self._prefs[name] = self.preferences.get_by_name(name)
-            return self._prefs[name]
+            pass
+
+        if not getattr(self, '_prefs_loaded', False):
+            from options.utils import get_preferences_snapshot
+            self._prefs = {**get_preferences_snapshot(self), **self._prefs}
+            self._prefs_loaded = True
+            if name in self._prefs:
+                return self._prefs[name]
+
+        self._prefs[name] = self.preferences.get_by_name(name)
+        return self._prefs[name]
 
     @property
     def sides(self):
@@ -1,10 +1,17 @@
 import logging
 
 from django.core.cache import cache
-from django.db.models.signals import post_delete, post_save
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save
 from django.dispatch import receiver
 
+from adjallocation.models import DebateAdjudicator
+from draw.models import Debate, DebateTeam
+from motions.models import Motion, RoundMotion
+from options.models import TournamentPreferenceModel
+from results.models import BallotSubmission
 from tournaments.models import Round, Tournament
+from utils.cache import invalidate_public_pages
 
 logger = logging.getLogger(__name__)
 
@@ -28,3 +35,173 @@ def update_round_cache(sender, instance, **kwargs):
         logger.debug("Cleared %s tournament cache because the current round is %s" %
                 (instance.tournament.slug, instance if current_round_id == instance.id else current_round_id))
         update_tournament_cache(sender, instance.tournament, **kwargs)
+
+
+# ==============================================================================
+# Public pages cache
+# ==============================================================================
+# Public pages are only invalidated by changes that they can show, so that
+# editing a draft draw or unconfirmed ballots doesn't regenerate them.
+
+# Round fields that public pages show
+PUBLIC_ROUND_FIELDS = ('seq', 'name', 'abbreviation', 'stage', 'draw_status', 'motions_released',
+                       'completed', 'silent', 'starts_at')
+
+# Preference sections that affect what public pages show
+PUBLIC_PREFERENCE_SECTIONS = ('public_features', 'tab_release', 'ui_options', 'debate_rules',
+                              'draw_rules', 'data_entry', 'standings', 'motions')
+
+ROUND_STATE_CACHE_KEY = "round_%d_state"
+DEBATE_ROUND_CACHE_KEY = "debate_%d_round"
+
+
+def _clear_round_state(round_id):
+    # Again on commit, in case the old state was cached again before then
+    key = ROUND_STATE_CACHE_KEY % round_id
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def _round_state(round_id, round=None):
+    """Returns `(tournament_id, draw_public, motions_public, completed)` for
+    the round.
+    This uses `round` if it's given, and otherwise the cache, so that saving
+    many objects in a round doesn't query the round for each one. Results are
+    shown for completed rounds, so their draws and motions count as public."""
+    if round is None:
+        key = ROUND_STATE_CACHE_KEY % round_id
+        state = cache.get(key)
+        if state is None:
+            round = Round.objects.filter(id=round_id).only(
+                'tournament_id', 'draw_status', 'motions_released', 'completed').first()
+            if round is None:
+                return None, False, False, False
+            state = _round_state(round_id, round)
+            cache.set(key, state)
+        return state
+    return (round.tournament_id, round.draw_status == Round.Status.RELEASED or round.completed,
+            round.motions_released or round.completed, round.completed)
+
+
+def _debate_round_state(debate_id, debate=None):
+    """Returns `_round_state()` for the debate's round, using relations
+    already loaded on `debate` where possible. Debates never move
+    between rounds, so their round IDs don't need to be invalidated."""
+    if debate is not None:
+        return _round_state(debate.round_id, debate.round if Debate.round.is_cached(debate) else None)
+    key = DEBATE_ROUND_CACHE_KEY % debate_id
+    round_id = cache.get(key)
+    if round_id is None:
+        round_id = Debate.objects.filter(id=debate_id).values_list('round_id', flat=True).first()
+        if round_id is None:
+            return None, False, False, False
+        cache.set(key, round_id)
+    return _round_state(round_id)
+
+
+def is_debate_round_completed(debate_id, debate=None):
+    """Returns whether the debate's round is completed, from the same cache
+    as the public pages receivers, so that it usually doesn't query."""
+    return _debate_round_state(debate_id, debate)[3]
+
+
+@receiver(post_save, sender=Tournament)
+@receiver(post_delete, sender=Tournament)
+def invalidate_public_pages_for_tournament(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_public_pages(instance.id)
+
+
+@receiver(post_init, sender=Round)
+def record_round_public_fields(sender, instance, **kwargs):
+    # Read from __dict__, since accessing a deferred field would query it
+    instance._public_fields_loaded = {field: instance.__dict__.get(field) for field in PUBLIC_ROUND_FIELDS}
+
+
+@receiver(post_save, sender=Round)
+def invalidate_public_pages_for_round(sender, instance, created=False, raw=False, **kwargs):
+    """Covers draws, motions and results being released, and rounds being
+    completed or renamed."""
+    _clear_round_state(instance.id)
+    if raw:
+        return
+    current = {field: instance.__dict__.get(field) for field in PUBLIC_ROUND_FIELDS}
+    if created or current != instance._public_fields_loaded:
+        invalidate_public_pages(instance.tournament_id)
+    instance._public_fields_loaded = current
+
+
+@receiver(post_delete, sender=Round)
+def invalidate_public_pages_for_deleted_round(sender, instance, **kwargs):
+    _clear_round_state(instance.id)
+    invalidate_public_pages(instance.tournament_id)
+
+
+def invalidate_public_pages_for_rounds(tournament):
+    """For use after updating rounds in bulk, which doesn't send signals."""
+    keys = [ROUND_STATE_CACHE_KEY % round_id for round_id in tournament.round_set.values_list('id', flat=True)]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+    invalidate_public_pages(tournament.id)
+
+
+@receiver(post_save, sender=Motion)
+@receiver(post_delete, sender=Motion)
+def invalidate_public_pages_for_motion(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_public_pages(instance.tournament_id)
+
+
+@receiver(post_save, sender=TournamentPreferenceModel)
+def invalidate_public_pages_for_preference(sender, instance, raw=False, **kwargs):
+    if not raw and instance.section in PUBLIC_PREFERENCE_SECTIONS:
+        invalidate_public_pages(instance.instance_id)
+
+
+@receiver(post_save, sender=RoundMotion)
+@receiver(post_delete, sender=RoundMotion)
+@receiver(post_save, sender=Debate)
+@receiver(post_delete, sender=Debate)
+def invalidate_public_pages_for_round_object(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    round = instance.round if type(instance).round.is_cached(instance) else None
+    tournament_id, draw_public, motions_public, _ = _round_state(instance.round_id, round)
+    if motions_public if sender is RoundMotion else draw_public:
+        invalidate_public_pages(tournament_id)
+
+
+@receiver(m2m_changed, sender=RoundMotion)
+def invalidate_public_pages_for_round_motions(sender, instance, **kwargs):
+    invalidate_public_pages(instance.tournament_id)
+
+
+@receiver(post_save, sender=DebateTeam)
+@receiver(post_delete, sender=DebateTeam)
+@receiver(post_save, sender=DebateAdjudicator)
+@receiver(post_delete, sender=DebateAdjudicator)
+def invalidate_public_pages_for_debate_object(sender, instance, raw=False, **kwargs):
+    # `batched` instances are from `save_adjudicator_positions()`, which does this itself
+    if raw or getattr(instance, 'batched', False):
+        return
+    debate = instance.debate if type(instance).debate.is_cached(instance) else None
+    tournament_id, draw_public, _, _ = _debate_round_state(instance.debate_id, debate)
+    if draw_public:
+        invalidate_public_pages(tournament_id)
+
+
+@receiver(post_init, sender=BallotSubmission)
+def record_ballot_confirmed(sender, instance, **kwargs):
+    instance._confirmed_loaded = instance.__dict__.get('confirmed', False)
+
+
+@receiver(post_save, sender=BallotSubmission)
+@receiver(post_delete, sender=BallotSubmission)
+def invalidate_public_pages_for_ballot(sender, instance, raw=False, **kwargs):
+    """Only confirmed ballots count towards results, so only confirming or
+    unconfirming a ballot, or changing a confirmed one, changes public pages."""
+    if raw or not (instance.confirmed or instance._confirmed_loaded):
+        return
+    instance._confirmed_loaded = instance.confirmed
+    debate = instance.debate if BallotSubmission.debate.is_cached(instance) else None
+    invalidate_public_pages(_debate_round_state(instance.debate_id, debate)[0])
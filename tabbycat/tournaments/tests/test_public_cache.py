@@ -0,0 +1,98 @@
+from hashlib import md5
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from draw.models import Debate, DebateTeam
+from participants.models import Team
+from results.models import BallotSubmission
+from tournaments.models import Round, Tournament
+from tournaments.views import TournamentPublicHomeView
+from utils.cache import get_public_pages_version, invalidate_public_pages
+from utils.misc import reverse_tournament
+
+
+class TestPublicPagesCache(TestCase):
+
+    def setUp(self):
+        self.tournament = Tournament.objects.create(slug="cachetest", name="Cache test")
+        self.round = Round.objects.create(tournament=self.tournament, seq=1)
+        self.url = reverse_tournament('tournament-public-index', self.tournament)
+        self.tournament.preferences.all()  # saving preferences also invalidates pages
+
+    def tearDown(self):
+        cache.clear()
+        super().tearDown()
+
+    def get_render_count(self, n_requests=1):
+        original = TournamentPublicHomeView.get_context_data
+        with patch.object(TournamentPublicHomeView, 'get_context_data', autospec=True, side_effect=original) as mocked:
+            for _ in range(n_requests):
+                response = self.client.get(self.url)
+                self.assertEqual(response.status_code, 200)
+        return mocked.call_count
+
+    def test_page_cached(self):
+        self.assertEqual(self.get_render_count(3), 1)
+
+    def test_round_change_invalidates(self):
+        self.assertEqual(self.get_render_count(), 1)
+        self.round.draw_status = Round.Status.RELEASED
+        self.round.save()
+        self.assertEqual(self.get_render_count(2), 1)
+
+    def test_private_round_change_does_not_invalidate(self):
+        self.assertEqual(self.get_render_count(), 1)
+        self.round.feedback_weight = 0.5
+        self.round.save()
+        self.assertEqual(self.get_render_count(), 0)
+
+    def test_draft_draw_change_does_not_invalidate(self):
+        self.assertEqual(self.get_render_count(), 1)
+        team = Team.objects.create(tournament=self.tournament, reference="A")
+        debate = Debate.objects.create(round=self.round)
+        DebateTeam.objects.create(debate=debate, team=team, side=DebateTeam.Side.AFF)
+        ballotsub = BallotSubmission.objects.create(debate=debate, submitter_type=BallotSubmission.Submitter.TABROOM)
+        self.assertEqual(self.get_render_count(), 0)
+
+        ballotsub.confirmed = True
+        ballotsub.save()
+        self.assertEqual(self.get_render_count(), 1)
+
+    def test_released_draw_change_invalidates(self):
+        self.round.draw_status = Round.Status.RELEASED
+        self.round.save()
+        debate = Debate.objects.create(round=self.round)
+        self.assertEqual(self.get_render_count(), 1)
+
+        team = Team.objects.create(tournament=self.tournament, reference="A")
+        debate = Debate.objects.get(id=debate.id)  # without the round loaded
+        DebateTeam.objects.create(debate_id=debate.id, team=team, side=DebateTeam.Side.AFF)
+        self.assertEqual(self.get_render_count(), 1)
+
+    def test_private_preference_does_not_invalidate(self):
+        self.assertEqual(self.get_render_count(), 1)
+        self.tournament.preferences['email__reply_to_name'] = "Tab Team"
+        self.assertEqual(self.get_render_count(), 0)
+        self.tournament.preferences['public_features__public_draw'] = 'current'
+        self.assertEqual(self.get_render_count(), 1)
+
+    def test_data_entry_preference_invalidates(self):
+        # The public navigation links to ballot entry if participants can submit ballots
+        self.assertEqual(self.get_render_count(), 1)
+        self.tournament.preferences['data_entry__participant_ballots'] = 'public'
+        self.assertEqual(self.get_render_count(), 1)
+
+    def test_stale_page_served_during_regeneration(self):
+        self.assertEqual(self.get_render_count(), 1)
+        invalidate_public_pages(self.tournament.id)
+
+        # Simulate another request regenerating the page
+        key_prefix = "%s_public_pages_%s" % (self.tournament.slug, get_public_pages_version(self.tournament))
+        lock_key = "%s_lock_%s" % (key_prefix, md5(("http://testserver" + self.url).encode()).hexdigest())
+        cache.add(lock_key, True)
+        self.assertEqual(self.get_render_count(2), 0)
+
+        cache.delete(lock_key)
+        self.assertEqual(self.get_render_count(2), 1)
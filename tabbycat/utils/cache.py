@@ -0,0 +1,38 @@
+"""Versioning of cached public pages.
+
+Each tournament has a version number for its cached public pages (see
+`utils.mixins.CacheMixin`), which is part of the cache keys of those pages.
+Signal receivers (see `tournaments.signals`) change the version whenever
+something that public pages show changes, e.g. when a draw, results or motions
+are released, so that pages are regenerated straight away, rather than when
+they expire.
+"""
+
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _version_key(tournament_id):
+    return "%s_public_pages_version" % tournament_id
+
+
+def get_public_pages_version(tournament):
+    key = _version_key(tournament.id)
+    cache.add(key, uuid4().hex, None)
+    return cache.get(key)
+
+
+def invalidate_public_pages(tournament_id):
+    """Changes the version of a tournament's cached public pages. This is done
+    both immediately and when the current transaction commits, so that a page
+    generated from uncommitted data in the meantime isn't used."""
+    if tournament_id is None:
+        return
+
+    def invalidate():
+        cache.set(_version_key(tournament_id), uuid4().hex, None)
+
+    invalidate()
+    transaction.on_commit(invalidate)
@@ -1,5 +1,6 @@
 from django.contrib.auth import get_user_model
 
+from adjallocation.allocation import save_allocations
 from adjallocation.allocators.hungarian import ConsensusHungarianAllocator, VotingHungarianAllocator
 from availability.utils import activate_all, set_availability
 from draw.manager import DrawManager
@@ -47,8 +48,7 @@ class Command(GenerateResultsCommandMixin, RoundCommand):
             allocator = ConsensusHungarianAllocator(debates, adjs, round)
 
         allocation, extra_msgs = allocator.allocate()
-        for alloc in allocation:
-            alloc.save()
+        save_allocations(allocation)
 
         allocate_venues(round)
 
@@ -1,7 +1,10 @@
 import logging
+from contextlib import contextmanager
 from secrets import SystemRandom
 from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
 
+from django.db import router
+from django.db.models.signals import post_save, pre_save
 from django.shortcuts import redirect
 from django.urls import reverse
 from django.utils import formats, timezone, translation
@@ -80,3 +83,26 @@ def add_query_string_parameter(url, key, value):
     query_parts[key] = value
     query = urlencode(query_parts, safe='/')
     return urlunparse((scheme, netloc, path, params, query, fragment))
+
+
+@contextmanager
+def sending_save_signals(model, instances, created, update_fields=None):
+    """Sends `pre_save` for each of `instances` before the block, and
+    `post_save` after it, as `save()` would. Bulk operations like
+    `bulk_create()` and `bulk_update()` don't send these signals, so wrap them
+    in this when receivers need to hear about the saves. If `model` has no
+    receivers for either signal, this does nothing."""
+    if not (pre_save.has_listeners(model) or post_save.has_listeners(model)):
+        yield
+        return
+
+    instances = list(instances)
+    using = router.db_for_write(model)
+    if update_fields is not None:
+        update_fields = frozenset(update_fields)
+
+    for inst in instances:
+        pre_save.send(sender=model, instance=inst, raw=False, using=using, update_fields=update_fields)
+    yield
+    for inst in instances:
+        post_save.send(sender=model, instance=inst, created=created, update_fields=update_fields, raw=False, using=using)
@@ -1,13 +1,16 @@
 import logging
 import os
+from hashlib import md5
 
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.core.cache import cache
 from django.db import connection
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
+from django.middleware.cache import CacheMiddleware
 from django.views.generic.base import ContextMixin
 
+from .cache import get_public_pages_version
+
 logger = logging.getLogger(__name__)
 
 
@@ -134,10 +137,65 @@ class WarnAboutLegacySendgridConfigVarsMixin(ContextMixin):
 
 
 class CacheMixin:
-    """Mixin for views that cache the page and need to update quickly."""
+    """Mixin for views that cache the page and need to update quickly.
 
-    cache_timeout = settings.PUBLIC_FAST_CACHE_TIMEOUT
+    Pages are cached under keys that include the tournament's public pages
+    version (see `utils.cache`), which changes when, for example, a draw or
+    results are released, so such changes show straight away. The
+    `cache_timeout` only limits how long other changes can take to show.
+
+    Only one request at a time regenerates a page that isn't in the cache. Any
+    others that arrive in the meantime are served the previous version of the
+    page, if there is one, rather than all regenerating it at once."""
 
-    @method_decorator(cache_page(cache_timeout))
-    def dispatch(self, *args, **kwargs):
-        return super().dispatch(*args, **kwargs)
+    cache_timeout = settings.PUBLIC_FAST_CACHE_TIMEOUT
+    stale_cache_timeout = settings.PUBLIC_STALE_CACHE_TIMEOUT
+    regenerate_lock_timeout = 30
+
+    def get_cache_key_prefix(self):
+        tournament = getattr(self, 'tournament', None)
+        if tournament is None:
+            return "public_pages"
+        return "%s_public_pages_%s" % (tournament.slug, get_public_pages_version(tournament))
+
+    def get_stale_cache_key_prefix(self):
+        tournament = getattr(self, 'tournament', None)
+        if tournament is None:
+            return "public_pages_stale"
+        return "%s_public_pages_stale" % tournament.slug
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+
+        view = super().dispatch
+        current = CacheMiddleware(view, page_timeout=self.cache_timeout, key_prefix=self.get_cache_key_prefix())
+        stale = CacheMiddleware(view, page_timeout=self.stale_cache_timeout, key_prefix=self.get_stale_cache_key_prefix())
+
+        response = current.process_request(request)
+        if response is not None:
+            return response
+
+        lock_key = "%s_lock_%s" % (current.key_prefix, md5(request.build_absolute_uri().encode()).hexdigest())
+        if not cache.add(lock_key, True, self.regenerate_lock_timeout):
+            response = stale.process_request(request)
+            if response is not None:
+                logger.debug("Serving stale page while %s is regenerated", request.path)
+                return response
+            request._cache_update_cache = True
+
+        try:
+            response = view(request, *args, **kwargs)
+        except Exception:
+            cache.delete(lock_key)
+            raise
+
+        def release_lock(response=None):
+            cache.delete(lock_key)
+
+        response = stale.process_response(request, current.process_response(request, response))
+        if hasattr(response, 'render') and callable(response.render) and not response.is_rendered:
+            response.add_post_render_callback(release_lock)
+        else:
+            release_lock()
+        return response
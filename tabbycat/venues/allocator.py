@@ -1,36 +1,47 @@
 import itertools
 import logging
 import random
+from collections import Counter
 
 from django.db.models import Q
 
+from draw.generator.assignment import solve_assignment
 from draw.models import Debate, DebateTeam
 
 from .models import VenueConstraint
 
 logger = logging.getLogger(__name__)
 
+# Largest integer up to which all integers are exactly representable as floats
+MAX_EXACT_COST = 2 ** 53
+
 
 def allocate_venues(round, debates=None):
     allocator = VenueAllocator()
-    allocator.allocate(round, debates)
+    debate_venues = allocator.allocate(round, debates)
+    allocator.save_venues(debate_venues)
 
 
 class VenueAllocator:
     """Allocates venues in a draw to satisfy, as best it can, applicable venue
     constraints.
 
-    The algorithm naïvely allocates from the debate with the highest-priority
-    constraint to the debate with the lowest-priority constraint, choosing at
-    random if more than one is available. This isn't guaranteed to be optimal,
-    since a flexible high-priority debate might randomly choose a room demanded
-    by a picky low-priority room.
+    Debates with constraints are allocated together as a single minimum-cost
+    assignment of debates to venues, in which higher-priority constraints take
+    absolute precedence over lower-priority constraints, and, subject to that,
+    preferred venues (the highest-priority venues, enough for every debate) are
+    used where possible. Unconstrained debates are then randomly allocated the
+    remaining preferred venues.
     """
 
     def allocate(self, round, debates=None):
+        """Returns a dict mapping each debate to its venue, or to None if there
+        weren't enough venues. The allocation isn't saved; use `save_venues()`."""
         if debates is None:
             debates = round.debate_set_with_prefetches(speakers=False, institutions=True, filter_args=[~Q(debateteam__side=DebateTeam.Side.BYE)])
-        self._all_venues = list(round.active_venues.order_by('-priority'))
+        self._all_venues = list(round.active_venues.prefetch_related('venuecategory_set'))
+        random.shuffle(self._all_venues)  # break ties between venues of equal priority at random
+        self._all_venues.sort(key=lambda v: v.priority, reverse=True)
         self._preferred_venues = self._all_venues[:len(debates)]
 
         # take note of how many venues we expect to be short by (for error checking)
@@ -50,111 +61,131 @@ class VenueAllocator:
                 self._venue_shortage, len(debates_without_venues))
         debate_venues.update({debate: None for debate in debates_without_venues})
 
-        self.save_venues(debate_venues)
+        return debate_venues
 
     def collect_constraints(self, debates):
         """Returns a list of tuples `(debate, constraints)`, where `constraints`
-        is a list of constraints. Each list of constraints is sorted by
-        descending order of priority. Debates with no constraints are omitted
-        from the dict, so each list of constraints is guaranteed not to be
-        empty.
-
-        The constraints for each debate are just all the venue constraints
-        relating to the teams, adjudicators, and institutions of the debate."""
+        is a list of lists of constraints, one list for each subject (team,
+        adjudicator or institution) of the debate that has constraints. Each
+        subject's list is sorted by descending order of priority. Debates with
+        no constraints are omitted, so each list of constraints is guaranteed
+        not to be empty."""
 
         all_constraints = {}
-        for vc in VenueConstraint.objects.filter_for_debates(debates).prefetch_related('subject'):
+        for vc in VenueConstraint.objects.filter_for_debates(debates).select_related('category').prefetch_related('subject'):
             all_constraints.setdefault(vc.subject, []).append(vc)
+        for constraints in all_constraints.values():
+            constraints.sort(key=lambda x: x.priority, reverse=True)
 
         debate_constraints = []
 
         for debate in debates:
-            subjects = itertools.chain(
+            subjects = dict.fromkeys(itertools.chain(
                 debate.teams,
                 debate.adjudicators.all(),
                 [team.institution for team in debate.teams],
-            )
-            constraints = [vc for subject in subjects for vc in all_constraints.get(subject, [])]
+            ))  # an institution may appear twice
+            constraints = [all_constraints[subject] for subject in subjects if subject in all_constraints]
 
             if len(constraints) > 0:
-                constraints.sort(key=lambda x: x.priority, reverse=True)
                 debate_constraints.append((debate, constraints))
-                logger.info("Constraints on %s: %s", debate, constraints)
-
-        debate_constraints.sort(key=lambda x: x[1][0].priority, reverse=True)
+                logger.info("Constraints on debate %d: %s", debate.id, ["%s [%s]" % (vc.category, vc.priority)
+                    for subject_constraints in constraints for vc in subject_constraints])
 
         return debate_constraints
 
     def allocate_constrained_venues(self, debate_constraints):
         """Allocates venues for debates that have one or more constraints on
-        them. `debate_constraints` should be
+        them, by solving a single assignment problem. `debate_constraints`
+        should be a list as returned by `collect_constraints()`.
+
+        The cost of allocating a venue to a debate is, for each subject in the
+        debate, the weight of the subject's highest-priority constraint, less
+        the weight of the highest-priority constraint the venue satisfies (if
+        any). Weights are given by `constraint_weights()`. Using a venue that
+        isn't preferred costs one unit, less than any constraint.
+
+        Venues with the same relevant categories and preferred status are
+        interchangeable, so at most one per debate of each such kind needs to
+        be considered; this keeps the problem small when there are many venues.
+        """
 
-        For each debate, it finds the set of venues that meet all its
-        constraints, or if that set is empty, then it satisfies as many
-        constraints as it can, with higher-priority constraints taking absolute
-        precedence over lower-priority constraints. It then chooses a random
-        venue from the preferred venues in that set, or if there are no
-        preferred venues, then from all venues in that set.
+        if len(debate_constraints) == 0:
+            return {}
 
-        It runs through debates in descending order of priority, where the
-        priority of a debate is the priority of its highest-priority constraint.
-        """
+        weights = self.constraint_weights(debate_constraints)
 
-        debate_venues = dict()
+        relevant_categories = {vc.category_id for _, constraints in debate_constraints
+                               for subject_constraints in constraints for vc in subject_constraints}
+        preferred_venues = set(self._preferred_venues)
+        kinds = {}
+        for venue in self._all_venues:
+            categories = frozenset(c.id for c in venue.venuecategory_set.all() if c.id in relevant_categories)
+            kind = kinds.setdefault((categories, venue in preferred_venues), [])
+            if len(kind) < len(debate_constraints):
+                kind.append(venue)
+
+        candidates = [(kind, venue) for kind, venues in kinds.items() for venue in venues]
+        costs = []
+        for debate, constraints in debate_constraints:
+            kind_costs = {kind: self.venue_cost(constraints, *kind, weights) for kind in kinds}
+            costs.append([kind_costs[kind] for kind, venue in candidates])
 
-        while len(debate_constraints) > 0:
-            debate, constraints = debate_constraints.pop(0)
-
-            highest_constraint = constraints.pop(0)
-            eligible_venues = set(highest_constraint.category.venues.all()) & set(self._all_venues)
-
-            # If we can't fulfil the highest constraint, bump it down the list.
-            if len(eligible_venues) == 0:
-                logger.debug("Unfulfilled (highest): %s", highest_constraint)
-                if len(constraints) == 0:
-                    logger.debug("%s is now unconstrained", debate)
-                    continue  # Failed all constraints, debate is now unconstrained
-                new_priority = constraints[0].priority
-                for i, dc in enumerate(debate_constraints):
-                    if new_priority >= dc[1][0].priority:
-                        break
-                else:
-                    i = 0
-                debate_constraints.insert(i, (debate, constraints))
-                continue
-
-            # If we get this far, we have at least one eligible venue.
-
-            # Find the set of eligible venues satisfying the best set of constraints.
-            satisified_constraints = []
-            for constraint in constraints:
-                if any(sc.subject == constraint.subject for sc in satisified_constraints):
-                    continue  # Skip if we've already done a constraint for this subject
-                constraint_venues = set(constraint.category.venues.all())
-                if eligible_venues.isdisjoint(constraint_venues):
-                    logger.debug("Unfilfilled: %s", constraint)
-                else:
-                    eligible_venues &= constraint_venues
-                    satisified_constraints.append(constraint)
-
-            # If no eligible venues are preferred venues, drop the last preferred venue.
-            preferred_venues = set(self._preferred_venues)
-            if eligible_venues.isdisjoint(preferred_venues):
-                logger.debug("No preferred venues available: %s", debate)
-                self._preferred_venues = self._preferred_venues[:-1]
-            else:
-                eligible_venues &= preferred_venues
-
-            # Finally, assign the venue.
-            venue = random.choice(list(eligible_venues))
+        debate_venues = dict()
+        for i, j in solve_assignment(costs):
+            debate, venue = debate_constraints[i][0], candidates[j][1]
             debate_venues[debate] = venue
-            self._all_venues.remove(venue)
-            if venue in self._preferred_venues:
-                self._preferred_venues.remove(venue)
             logger.debug("Assigning %s to %s", venue, debate)
 
+        # Unconstrained debates get the highest-priority venues left over
+        used_venues = set(debate_venues.values())
+        unused_venues = [v for v in self._all_venues if v not in used_venues]
+        self._preferred_venues = unused_venues[:len(self._preferred_venues) - len(debate_venues)]
+
         return debate_venues
 
+    def constraint_weights(self, debate_constraints):
+        """Returns a dict mapping each priority to the weight of constraints
+        with that priority. Each priority's weight exceeds the most that all
+        lower-priority constraints (and non-preferred venues) could add to the
+        cost of an allocation, so that satisfying a higher-priority constraint
+        always outweighs any number of lower-priority constraints.
+
+        Costs must stay below 2**53 to be exact in floating point. If there are
+        too many distinct priorities for that, the lowest priorities are merged
+        (given the same weight) until it fits, so that higher priorities still
+        take precedence."""
+
+        # Number of subjects with a constraint of each priority
+        counts = Counter(priority for _, constraints in debate_constraints
+                         for subject_constraints in constraints
+                         for priority in {vc.priority for vc in subject_constraints})
+
+        levels = [[priority] for priority in sorted(counts)]
+        while True:
+            weights = {}
+            max_cost = len(debate_constraints)  # one unit per debate in a non-preferred venue
+            for level in levels:
+                weight = max_cost + 1
+                weights.update(dict.fromkeys(level, weight))
+                max_cost += weight * sum(counts[priority] for priority in level)
+            if max_cost < MAX_EXACT_COST or len(levels) == 1:
+                return weights
+            logger.warning("Too many venue constraint priorities to distinguish, treating priorities %s as equal",
+                ", ".join(str(priority) for priority in levels[0] + levels[1]))
+            levels[0:2] = [levels[0] + levels[1]]
+
+    def venue_cost(self, constraints, categories, preferred, weights):
+        """Returns the cost of allocating a venue in `categories` to a debate
+        with `constraints`, as described in `allocate_constrained_venues()`."""
+        cost = 0 if preferred else 1
+        for subject_constraints in constraints:
+            cost += weights[subject_constraints[0].priority]
+            satisfied = next((vc for vc in subject_constraints if vc.category_id in categories), None)
+            if satisfied is not None:
+                cost -= weights[satisfied.priority]
+        return cost
+
     def allocate_unconstrained_venues(self, debates):
         """Allocates unconstrained venues by randomly shuffling the remaining
         preferred venues."""
@@ -2,9 +2,10 @@ from django.utils.translation import gettext as _
 
 from actionlog.models import ActionLogEntry
 from draw.consumers import EditDebateOrPanelWorkerMixin
+from jobs.models import Job
 from tournaments.models import Round
 
-from .allocator import allocate_venues
+from .allocator import VenueAllocator
 from .serializers import SimpleDebateVenueSerializer
 
 
@@ -12,18 +13,22 @@ class VenuesWorkerConsumer(EditDebateOrPanelWorkerMixin):
 
     def allocate_debate_venues(self, event):
         round = Round.objects.get(pk=event['extra']['round_id'])
-        group = event['extra']['group_name']
 
         if round.draw_status == Round.Status.RELEASED:
-            self.return_error(group, _("Draw is already released, unrelease draw to assign rooms."))
+            self.return_error(event, _("Draw is already released, unrelease draw to assign rooms."))
             return
         if round.draw_status != Round.Status.CONFIRMED:
-            self.return_error(group, _("Draw is not confirmed, confirm draw to assign rooms."))
+            self.return_error(event, _("Draw is not confirmed, confirm draw to assign rooms."))
             return
 
-        allocate_venues(round)
-        self.log_action(event['extra'], round, ActionLogEntry.ActionType.VENUES_AUTOALLOCATE)
+        self.report_progress(event, Job.Stage.SOLVING)
+        allocator = VenueAllocator()
+        debate_venues = allocator.allocate(round)
+
+        with self.saving(event):
+            allocator.save_venues(debate_venues)
+            self.log_action(event['extra'], round, ActionLogEntry.ActionType.VENUES_AUTOALLOCATE)
 
         content = self.reserialize_debates(SimpleDebateVenueSerializer, round)
         msg = _("Successfully auto-allocated rooms to debates.")
-        self.return_response(content, group, msg, 'success')
+        self.return_response(content, event, msg, 'success')
@@ -0,0 +1,90 @@
+from types import SimpleNamespace
+
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from availability.utils import activate_all
+from draw.models import DebateTeam
+from utils.tests import CompletedTournamentTestMixin
+from venues.allocator import allocate_venues, VenueAllocator
+from venues.models import VenueCategory, VenueConstraint
+
+
+class TestVenueAllocator(CompletedTournamentTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.round = self.tournament.round_set.get(seq=4)
+        activate_all(self.round)
+        self.debates = list(self.round.debate_set_with_prefetches(speakers=False, institutions=True,
+            filter_args=[~Q(debateteam__side=DebateTeam.Side.BYE)]))
+        self.venues = list(self.round.active_venues.order_by('-priority'))
+
+    def add_category(self, venues):
+        category = VenueCategory.objects.create(name="Category %d" % VenueCategory.objects.count(),
+                                                tournament=self.tournament)
+        category.venues.set(venues)
+        return category
+
+    def add_constraint(self, debate, category, priority):
+        return VenueConstraint.objects.create(subject=debate.get_team('aff'), category=category, priority=priority)
+
+    def allocate(self):
+        allocate_venues(self.round, self.debates)
+        for debate in self.debates:
+            debate.refresh_from_db(fields=['venue'])
+
+    def test_all_debates_allocated(self):
+        self.allocate()
+        allocated = [debate.venue for debate in self.debates]
+        self.assertNotIn(None, allocated)
+        self.assertEqual(len(set(allocated)), len(self.debates))
+        self.assertEqual(sorted(v.priority for v in allocated),
+                         sorted(v.priority for v in self.venues[:len(self.debates)]))
+
+    def test_flexible_debate_yields_to_picky_debate(self):
+        flexible, picky = self.debates[:2]
+        shared, other = self.venues[:2]
+        self.add_constraint(flexible, self.add_category([shared, other]), 10)
+        self.add_constraint(picky, self.add_category([shared]), 5)
+
+        for _ in range(10):  # a greedy allocation would fail about half the time
+            self.allocate()
+            self.assertEqual(flexible.venue, other)
+            self.assertEqual(picky.venue, shared)
+
+    def test_higher_priority_takes_precedence(self):
+        high, low = self.debates[:2]
+        category = self.add_category(self.venues[:1])
+        self.add_constraint(high, category, 10)
+        self.add_constraint(low, category, 5)
+        self.add_constraint(low, self.add_category(self.venues[1:2]), 1)
+
+        self.allocate()
+        self.assertEqual(high.venue, self.venues[0])
+        self.assertEqual(low.venue, self.venues[1])
+
+    def test_query_count_independent_of_constraints(self):
+        query_counts = []
+        for debates in [self.debates[:1], self.debates[1:]]:
+            for debate in debates:
+                self.add_constraint(debate, self.add_category(self.venues[:3]), 5)
+            with CaptureQueriesContext(connection) as context:
+                allocate_venues(self.round, self.debates)
+            query_counts.append(len(context.captured_queries))
+
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_weights_stay_exact(self):
+        # 60 debates, each with one subject with a constraint of a distinct priority
+        debate_constraints = [(None, [[SimpleNamespace(priority=i)]]) for i in range(60)]
+        with self.assertLogs('venues.allocator', 'WARNING'):
+            weights = VenueAllocator().constraint_weights(debate_constraints)
+
+        self.assertLess(sum(weights.values()) + len(debate_constraints), 2 ** 53)
+        self.assertEqual(weights[0], weights[1])  # lowest priorities merged
+        for priority in range(50, 60):  # highest priorities still take precedence
+            lower = sum(w for p, w in weights.items() if p < priority)
+            self.assertGreater(weights[priority], lower + len(debate_constraints))